@@ -0,0 +1,350 @@
+# backend/bulk_generate.py
+"""
+Resumable offline bulk generation of aptitude questions and SJT scenarios
+
+Tops the bank up to a target inventory: a matrix of categories x difficulties
+x counts, plus SJT categories x counts. Combinations are generated
+concurrently (the LLM rate limiter still paces the calls), and every accepted
+batch is appended to a staging NDJSON file before anything touches the bank.
+Once every combination is staged, the file is bulk-loaded through the same
+dedupe + INSERT ... ON CONFLICT DO NOTHING path as the app.
+
+The staging directory is the checkpoint:
+    checkpoint.json   the matrix, how many items each combination still needed
+                      when the run started, and whether the load finished
+    staged.ndjson     one accepted item per line, fsync'ed per batch
+
+Run the same command again after a crash (or Ctrl-C): combinations already
+staged are not generated again, the rest continue from their staged count,
+and an interrupted load is simply repeated - rows already saved are skipped.
+A combination the LLM keeps failing on is left short and reported; a later
+--fresh run plans from the bank's new stock and only tops up what is missing.
+
+Usage:
+    python bulk_generate.py                           # default matrix, see below
+    python bulk_generate.py --questions 100 --scenarios 30 --concurrency 8
+    python bulk_generate.py --matrix inventory.json   # {"questions": {"Verbal": {"easy": 50}},
+                                                      #  "sjt": {"Teamwork": 20}}
+    python bulk_generate.py --no-load                 # stage only; the next run loads
+    python bulk_generate.py --fresh                   # discard the staging directory first
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+sys.path.append(str(Path(__file__).parent))
+
+from sqlalchemy import select, func
+from dotenv import load_dotenv
+from backend.database import AsyncSessionLocal, engine
+from backend.db_models import AptitudeQuestion, SJTScenario
+from backend.utils.ai_question_generator import get_ai_generator
+from backend.utils.circuit_breaker import llm_circuit_breaker
+from backend.utils.content_hash import dedupe_by_content_hash
+from backend.utils.question_manager import QuestionManager
+from backend.utils.question_replenisher import QUESTION_CATEGORIES, QUESTION_DIFFICULTIES, SJT_CATEGORIES
+from backend.utils.sjt_manager import SJTManager
+
+load_dotenv()
+
+BULK_STAGING_DIR = os.getenv("BULK_STAGING_DIR", "bulk_generation")
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", 4))  # combinations generated at once
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", 10))  # items asked for per LLM call
+BULK_MAX_EMPTY_BATCHES = int(os.getenv("BULK_MAX_EMPTY_BATCHES", 3))  # in a row, before a combination is left short
+BULK_LOAD_CHUNK = int(os.getenv("BULK_LOAD_CHUNK", 500))  # items per INSERT (and commit) when loading
+
+# The categories the app serves (and the replenisher keeps stocked)
+DEFAULT_CATEGORIES = QUESTION_CATEGORIES
+DEFAULT_DIFFICULTIES = QUESTION_DIFFICULTIES
+DEFAULT_SJT_CATEGORIES = SJT_CATEGORIES
+
+
+def build_matrix(categories: List[str], difficulties: List[str], questions: int,
+                 sjt_categories: List[str], scenarios: int) -> Dict:
+    return {
+        "questions": {category: {difficulty: questions for difficulty in difficulties} for category in categories},
+        "sjt": {category: scenarios for category in sjt_categories},
+    }
+
+
+def matrix_cells(matrix: Dict) -> Dict[str, int]:
+    """Combination key -> target inventory; keys are "question|<category>|<difficulty>" or "sjt|<category>" """
+    cells = {}
+    for category, counts in matrix.get("questions", {}).items():
+        for difficulty, count in counts.items():
+            cells[f"question|{category}|{difficulty}"] = int(count)
+    for category, count in matrix.get("sjt", {}).items():
+        cells[f"sjt|{category}"] = int(count)
+    return cells
+
+
+class BulkGeneration:
+    def __init__(self, staging_dir: str, concurrency: int = BULK_CONCURRENCY):
+        self.staging_dir = Path(staging_dir)
+        self.checkpoint_file = self.staging_dir / "checkpoint.json"
+        self.staged_file = self.staging_dir / "staged.ndjson"
+        self.concurrency = concurrency
+        self.question_manager = QuestionManager()
+        self.sjt_manager = SJTManager()
+        self.checkpoint: Optional[Dict] = None
+        self.staged: Dict[str, int] = {}  # combination -> items staged
+        self.staged_hashes = set()
+        self.calls = 0
+
+    @property
+    def ai_generator(self):
+        return get_ai_generator()
+
+    # =================== CHECKPOINT ===================
+    def load_checkpoint(self) -> Optional[Dict]:
+        if self.checkpoint_file.exists():
+            self.checkpoint = json.loads(self.checkpoint_file.read_text())
+        return self.checkpoint
+
+    def save_checkpoint(self):
+        # Write-then-rename: a crash never leaves half a checkpoint
+        tmp = self.checkpoint_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.checkpoint, indent=2))
+        os.replace(tmp, self.checkpoint_file)
+
+    async def plan(self, matrix: Dict):
+        """Start a run: what each combination needs on top of the bank's current stock"""
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(AptitudeQuestion.category, AptitudeQuestion.difficulty, func.count(AptitudeQuestion.id))
+                .group_by(AptitudeQuestion.category, AptitudeQuestion.difficulty)
+            )
+            stock = {f"question|{category}|{difficulty}": n for category, difficulty, n in result.all()}
+            result = await db.execute(
+                select(SJTScenario.category, func.count(SJTScenario.id)).group_by(SJTScenario.category)
+            )
+            stock.update({f"sjt|{category}": n for category, n in result.all()})
+
+        self.checkpoint = {
+            "matrix": matrix,
+            "needed": {cell: max(0, target - stock.get(cell, 0)) for cell, target in matrix_cells(matrix).items()},
+            "status": "generating",
+            "loaded": {},
+        }
+        self.save_checkpoint()
+        self.staged_file.touch()
+
+    def read_staged(self):
+        """Recount what is already staged; a line torn by a crash is cut off"""
+        self.staged, self.staged_hashes = {}, set()
+        if not self.staged_file.exists():
+            return
+        data = self.staged_file.read_bytes()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            print(f"✂️  Dropping a partly written line at the end of {self.staged_file}")
+            with open(self.staged_file, "r+b") as f:
+                f.truncate(complete)
+        for line in data[:complete].splitlines():
+            record = json.loads(line)
+            self.staged[record["cell"]] = self.staged.get(record["cell"], 0) + 1
+            self.staged_hashes.add(record["item"]["content_hash"])
+
+    def append_staged(self, cell: str, items: List[Dict]):
+        lines = "".join(json.dumps({"cell": cell, "item": item}) + "\n" for item in items)
+        with open(self.staged_file, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        self.staged[cell] = self.staged.get(cell, 0) + len(items)
+
+    # =================== GENERATION ===================
+    async def generate(self):
+        needed = self.checkpoint["needed"]
+        pending = [cell for cell, n in needed.items() if self.staged.get(cell, 0) < n]
+        done = len(needed) - len(pending)
+        print(f"📋 {len(needed)} combinations: {done} already complete, {len(pending)} to generate "
+              f"({sum(needed[cell] - self.staged.get(cell, 0) for cell in pending):,} items)")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(cell: str):
+            async with semaphore:
+                await self._generate_cell(cell, needed[cell])
+
+        await asyncio.gather(*(run(cell) for cell in pending))
+
+    async def _generate_cell(self, cell: str, needed: int):
+        kind, category, *rest = cell.split("|")
+        difficulty = rest[0] if rest else None
+        empty_batches = 0
+        while self.staged.get(cell, 0) < needed and empty_batches < BULK_MAX_EMPTY_BATCHES:
+            if not self.ai_generator.available():
+                print(f"⏸️ {cell} paused while the LLM is unavailable")
+                await asyncio.sleep(max(1.0, llm_circuit_breaker.retry_in()))
+                continue
+            count = min(BULK_BATCH_SIZE, needed - self.staged.get(cell, 0))
+            self.calls += 1
+            if kind == "question":
+                items = await self.ai_generator.generate_questions(category, count, difficulty)
+            else:
+                items = await self.ai_generator.generate_sjt_scenarios(category, count)
+            if not items and not self.ai_generator.available():
+                continue  # the circuit opened during the call - retry this batch
+
+            accepted = await self._accept(kind, items)
+            accepted = accepted[:needed - self.staged.get(cell, 0)]
+            if accepted:
+                self.append_staged(cell, accepted)
+                empty_batches = 0
+            else:
+                empty_batches += 1
+            print(f"📦 {cell}: {self.staged.get(cell, 0)}/{needed} staged")
+
+        if self.staged.get(cell, 0) < needed:
+            print(f"⚠️ {cell}: left at {self.staged.get(cell, 0)}/{needed} after "
+                  f"{BULK_MAX_EMPTY_BATCHES} batches with nothing new - the next run retries it")
+
+    async def _accept(self, kind: str, items: List[Dict]) -> List[Dict]:
+        """LLM output (not built-in fallbacks) that is neither in the bank nor staged yet"""
+        items = [item for item in items if item.get("source") == "ai_generated"]
+        if not items:
+            return []
+        model, text_field = (AptitudeQuestion, "question_text") if kind == "question" else (SJTScenario, "scenario_text")
+        async with AsyncSessionLocal() as db:
+            fresh, _ = await dedupe_by_content_hash(db, model, items, text_field)
+        accepted = [item for item in fresh if item["content_hash"] not in self.staged_hashes]
+        self.staged_hashes.update(item["content_hash"] for item in accepted)
+        return accepted
+
+    # =================== LOAD ===================
+    async def load(self) -> Dict[str, int]:
+        """Bulk-load the staging file; safe to repeat, rows already in the bank are skipped"""
+        self.checkpoint["status"] = "loading"
+        self.save_checkpoint()
+
+        loaded = {"questions": 0, "sjt_scenarios": 0, "duplicates": 0, "rejected": 0}
+        chunks = {"question": [], "sjt": []}
+        with open(self.staged_file, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                kind = record["cell"].split("|", 1)[0]
+                chunks[kind].append(record["item"])
+                if len(chunks[kind]) >= BULK_LOAD_CHUNK:
+                    await self._load_chunk(kind, chunks[kind], loaded)
+                    chunks[kind] = []
+        for kind, items in chunks.items():
+            if items:
+                await self._load_chunk(kind, items, loaded)
+
+        self.checkpoint["status"] = "loaded"
+        self.checkpoint["loaded"] = loaded
+        self.save_checkpoint()
+        return loaded
+
+    async def _load_chunk(self, kind: str, items: List[Dict], loaded: Dict):
+        async with AsyncSessionLocal() as db:
+            if kind == "question":
+                outcome = await self.question_manager.save_generated_questions(db, items, commit=False)
+                await db.commit()
+                self.question_manager.index_saved_questions(outcome["saved"])
+                loaded["questions"] += len(outcome["saved"])
+                loaded["rejected"] += outcome["rejected"]
+            else:
+                outcome = await self.sjt_manager.save_generated_scenarios(db, items)
+                loaded["sjt_scenarios"] += len(outcome["saved"])
+            loaded["duplicates"] += outcome["duplicates"]
+        print(f"💾 Loaded {len(outcome['saved'])}/{len(items)} staged {kind} items")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Resumable bulk generation of questions and SJT scenarios")
+    parser.add_argument("--matrix", help="JSON file with the target inventory matrix")
+    parser.add_argument("--questions", type=int, help="target questions per category/difficulty (default 50)")
+    parser.add_argument("--categories", nargs="+", help="question categories")
+    parser.add_argument("--difficulties", nargs="+", help="question difficulties")
+    parser.add_argument("--scenarios", type=int, help="target SJT scenarios per category (default 20)")
+    parser.add_argument("--sjt-categories", nargs="+", help="SJT categories")
+    parser.add_argument("--concurrency", type=int, default=BULK_CONCURRENCY, help="combinations generated at once")
+    parser.add_argument("--staging-dir", default=BULK_STAGING_DIR, help="staging/checkpoint directory")
+    parser.add_argument("--no-load", action="store_true", help="stage only, do not load into the bank")
+    parser.add_argument("--fresh", action="store_true", help="discard an existing staging directory first")
+    return parser.parse_args()
+
+
+def requested_matrix(args) -> Optional[Dict]:
+    """The matrix asked for on the command line, or None to keep the checkpoint's"""
+    if args.matrix:
+        return json.loads(Path(args.matrix).read_text())
+    if any(value is not None for value in (args.questions, args.categories, args.difficulties,
+                                           args.scenarios, args.sjt_categories)):
+        return build_matrix(
+            args.categories or DEFAULT_CATEGORIES,
+            args.difficulties or DEFAULT_DIFFICULTIES,
+            50 if args.questions is None else args.questions,
+            args.sjt_categories or DEFAULT_SJT_CATEGORIES,
+            20 if args.scenarios is None else args.scenarios,
+        )
+    return None
+
+
+async def main():
+    args = parse_args()
+    print("=" * 60)
+    print("🏭 BULK QUESTION GENERATION")
+    print("=" * 60)
+
+    bulk = BulkGeneration(args.staging_dir, args.concurrency)
+    if args.fresh and bulk.staging_dir.exists():
+        shutil.rmtree(bulk.staging_dir)
+        print(f"🗑️  Discarded {bulk.staging_dir}")
+
+    matrix = requested_matrix(args)
+    try:
+        checkpoint = bulk.load_checkpoint()
+        if checkpoint is not None:
+            if matrix is not None and matrix != checkpoint["matrix"]:
+                print(f"❌ {bulk.staging_dir} holds a run with a different matrix - "
+                      f"rerun without matrix options to resume it, or pass --fresh")
+                return
+            if checkpoint["status"] == "loaded":
+                print(f"✅ This run was already loaded: {checkpoint['loaded']}")
+                print("💡 Pass --fresh to start a new run")
+                return
+            print(f"🔁 Resuming the run in {bulk.staging_dir}")
+        else:
+            await bulk.plan(matrix or build_matrix(DEFAULT_CATEGORIES, DEFAULT_DIFFICULTIES, 50,
+                                                   DEFAULT_SJT_CATEGORIES, 20))
+            print(f"📝 New run in {bulk.staging_dir}")
+
+        bulk.read_staged()
+        started = time.perf_counter()
+        await bulk.generate()
+        needed = bulk.checkpoint["needed"]
+        short = {cell: n - bulk.staged.get(cell, 0) for cell, n in needed.items() if bulk.staged.get(cell, 0) < n}
+        print(f"\n📦 Staged {sum(bulk.staged.values()):,} items with {bulk.calls} LLM calls "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        if short:
+            print(f"⚠️ {len(short)} combinations came up short (a --fresh run later tops them up):")
+            for cell, missing in short.items():
+                print(f"   {cell}: {missing} missing")
+        if args.no_load:
+            print("⏭️ Not loading (--no-load); run again to load the staged items")
+            return
+
+        loaded = await bulk.load()
+        print("\n" + "=" * 60)
+        print("🎉 BULK GENERATION COMPLETE")
+        print("=" * 60)
+        print(f"   ✅ Questions saved: {loaded['questions']:,}")
+        print(f"   ✅ SJT scenarios saved: {loaded['sjt_scenarios']:,}")
+        print(f"   ⚠️  Duplicates skipped: {loaded['duplicates']:,}, invalid: {loaded['rejected']:,}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
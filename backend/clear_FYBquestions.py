@@ -45,6 +45,8 @@ def clear_questions():
             "aptitude_attempts",
             "aptitude_tests", 
             "aptitude_progress",
+            "aptitude_seen_questions",
+            "aptitude_review_items",
             "aptitude_questions",
             "sjt_scenarios"
         ]
@@ -1,12 +1,26 @@
 # backend/db_models.py - UPDATED (keep only FlexYourBrain models)
 
 from datetime import datetime, timedelta
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Float, JSON, ForeignKey, Date
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Float, JSON, ForeignKey, Date, Index, LargeBinary
+from sqlalchemy.orm import declarative_base, relationship, deferred
+import hashlib
+import random
+import re
 import secrets
 
 Base = declarative_base()
 
+
+def content_hash(text: str) -> str:
+    """SHA-256 of text with case and whitespace normalised - used to dedupe questions/scenarios"""
+    normalized = re.sub(r"\s+", " ", (text or "").strip().lower())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _content_hash_default(column_name: str):
+    # Column default computed from the row's text, so every insert path gets a hash
+    return lambda context: content_hash(context.get_current_parameters()[column_name])
+
 # ============================================
 # USER & AUTH
 # ============================================
@@ -188,8 +202,26 @@ class AptitudeQuestion(Base):
     time_limit = Column(Integer, default=60)
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    # Uniform random sort key in [0, 1) - lets the sampler pick rows with
+    # index range probes instead of ORDER BY random() over a whole category
+    random_key = Column(Float, nullable=False, default=lambda: random.random())
+    
+    # Normalised question_text hash - the unique index makes dedupe an index probe
+    content_hash = Column(String(64), default=_content_hash_default("question_text"))
+    
+    # MinHash signature of question_text for near-duplicate checks (see
+    # utils/near_duplicate.py); deferred so normal question loads skip it
+    minhash_signature = deferred(Column(LargeBinary))
+    
     # Relationships
     attempts = relationship("AptitudeAttempt", back_populates="question")
+    
+    __table_args__ = (
+        Index("ix_aptitude_questions_category_random_key", "category", "random_key"),
+        Index("ix_aptitude_questions_category_difficulty_random_key", "category", "difficulty", "random_key"),
+        Index("ix_aptitude_questions_content_hash", "content_hash", unique=True),
+        Index("ix_aptitude_questions_created_at", "created_at"),
+    )
 
 
 class AptitudeTest(Base):
@@ -198,7 +230,7 @@ class AptitudeTest(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    test_type = Column(String(50), nullable=False)  # practice, mock, sjt
+    test_type = Column(String(50), nullable=False)  # practice, review, mock, sjt
     category = Column(String(100), index=True)
     total_questions = Column(Integer, default=0)
     correct_answers = Column(Integer, default=0)
@@ -265,6 +297,44 @@ class AptitudeProgress(Base):
     user = relationship("User", back_populates="aptitude_progress")
 
 
+class AptitudeSeenQuestions(Base):
+    """Per-user, per-category set of attempted question IDs (compressed bitmap, see utils/seen_questions.py)"""
+    __tablename__ = "aptitude_seen_questions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    category = Column(String(100), nullable=False)
+    bitmap = Column(LargeBinary, nullable=False)
+    question_count = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_aptitude_seen_questions_user_category", "user_id", "category", unique=True),
+    )
+
+
+class AptitudeReviewItem(Base):
+    """Spaced-repetition schedule of questions a user got wrong (see utils/review_schedule.py)"""
+    __tablename__ = "aptitude_review_items"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    question_id = Column(Integer, ForeignKey("aptitude_questions.id", ondelete="CASCADE"), nullable=False)
+    category = Column(String(100), nullable=False)
+    due_at = Column(DateTime, nullable=False)
+    interval_days = Column(Float, nullable=False, default=1.0)
+    ease = Column(Float, nullable=False, default=2.5)
+    streak = Column(Integer, default=0)  # correct reviews in a row
+    lapses = Column(Integer, default=0)  # times answered wrong
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_aptitude_review_items_user_question", "user_id", "question_id", unique=True),
+        # Review sets are a range read: (user, category, due_at <= now) in due order
+        Index("ix_aptitude_review_items_user_category_due", "user_id", "category", "due_at"),
+    )
+
+
 class SJTScenario(Base):
     """Situational Judgement Test scenarios"""
     __tablename__ = "sjt_scenarios"
@@ -277,6 +347,41 @@ class SJTScenario(Base):
     explanation = Column(Text)
     category = Column(String(100), index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Normalised scenario_text hash - the unique index makes dedupe an index probe
+    content_hash = Column(String(64), default=_content_hash_default("scenario_text"))
+    
+    __table_args__ = (
+        Index("ix_sjt_scenarios_content_hash", "content_hash", unique=True),
+    )
+
+
+class GenerationJob(Base):
+    """Admin AI question generation job, worked off the request path (see utils/generation_jobs.py)"""
+    __tablename__ = "generation_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, completed, failed, cancelled
+
+    # [[domain, difficulty], ...] in run order; the first combinations_done are finished
+    combinations = Column(JSON, nullable=False)
+    questions_per_combination = Column(Integer, nullable=False, default=3)
+    combinations_done = Column(Integer, nullable=False, default=0)
+
+    accepted = Column(Integer, nullable=False, default=0)  # saved to the bank
+    rejected = Column(Integer, nullable=False, default=0)  # missing, malformed or invalid
+    duplicates = Column(Integer, nullable=False, default=0)  # exact or near duplicates of bank questions
+    error = Column(Text)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)  # a running job with a stale heartbeat lost its worker
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_generation_jobs_status_created", "status", "created_at"),
+    )
 
 
 # ============================================
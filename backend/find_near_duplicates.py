@@ -0,0 +1,152 @@
+# backend/find_near_duplicates.py
+"""
+Near-duplicate clustering of the question bank
+
+Streams every question once, computes the MinHash signatures that are missing
+(and stores them), then groups near-duplicates with LSH buckets + union-find.
+Only questions that share an LSH band are ever compared, so this scales with
+the number of candidate pairs instead of n².
+
+Usage:
+    python find_near_duplicates.py            # report clusters, store missing signatures
+    python find_near_duplicates.py --delete   # also delete all but the oldest question of
+                                              # each cluster (questions with attempts are kept)
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy import select, update, delete
+from dotenv import load_dotenv
+from backend.db_models import AptitudeQuestion, AptitudeAttempt
+from backend.utils.near_duplicate import (
+    NearDuplicateIndex, NEAR_DUPLICATE_THRESHOLD, minhash_signature, signature_from_bytes, similarity
+)
+
+load_dotenv()
+
+LOAD_BATCH_SIZE = 5_000
+
+
+class UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        root = x
+        while self.parent.get(root, root) != root:
+            root = self.parent[root]
+        while self.parent.get(x, x) != root:  # path compression
+            self.parent[x], x = root, self.parent[x]
+        return root
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            # Keep the smaller (older) ID as the root
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+async def load_signatures(db: AsyncSession, index: NearDuplicateIndex, texts: dict) -> int:
+    """Fill index with every question's signature; returns how many were newly stored"""
+    stored = 0
+    result = await db.stream(
+        select(AptitudeQuestion.id, AptitudeQuestion.minhash_signature, AptitudeQuestion.question_text)
+        .order_by(AptitudeQuestion.id)
+    )
+    missing = []
+    async for partition in result.partitions(LOAD_BATCH_SIZE):
+        for question_id, signature_bytes, question_text in partition:
+            texts[question_id] = question_text[:80]
+            if signature_bytes:
+                index.add(question_id, signature_from_bytes(signature_bytes))
+                continue
+            signature = minhash_signature(question_text)
+            index.add(question_id, signature)
+            missing.append({"id": question_id, "minhash_signature": signature.tobytes()})
+
+    # ORM bulk UPDATE by primary key
+    for start in range(0, len(missing), LOAD_BATCH_SIZE):
+        batch = missing[start:start + LOAD_BATCH_SIZE]
+        await db.execute(update(AptitudeQuestion), batch)
+        stored += len(batch)
+    await db.commit()
+    return stored
+
+
+def cluster(index: NearDuplicateIndex) -> dict:
+    """root id -> sorted member ids, for clusters of two or more questions"""
+    clusters = UnionFind()
+    compared = set()
+    for a, b in index.candidate_pairs():
+        pair = (a, b) if a < b else (b, a)
+        if pair in compared:
+            continue
+        compared.add(pair)
+        if similarity(index.signature(a), index.signature(b)) >= NEAR_DUPLICATE_THRESHOLD:
+            clusters.union(a, b)
+
+    groups = {}
+    for question_id in list(clusters.parent):
+        groups.setdefault(clusters.find(question_id), set()).add(question_id)
+    for root, members in groups.items():
+        members.add(root)
+    print(f"🔎 Compared {len(compared):,} candidate pairs")
+    return {root: sorted(members) for root, members in groups.items()}
+
+
+async def main(delete_duplicates: bool):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        print("❌ DATABASE_URL not found in .env file")
+        return
+    if database_url.startswith("postgresql://"):
+        database_url = database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    engine = create_async_engine(database_url, echo=False)
+    AsyncSessionLocal = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    try:
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            index = NearDuplicateIndex()
+            texts = {}
+            stored = await load_signatures(db, index, texts)
+            print(f"🧬 {len(index):,} signatures ({stored:,} newly stored) in {time.perf_counter() - start:.1f}s")
+
+            start = time.perf_counter()
+            clusters = cluster(index)
+            duplicates = sum(len(members) - 1 for members in clusters.values())
+            print(f"🧩 {len(clusters):,} clusters, {duplicates:,} near-duplicate questions "
+                  f"(threshold {NEAR_DUPLICATE_THRESHOLD:.0%}) in {time.perf_counter() - start:.1f}s\n")
+
+            for root, members in sorted(clusters.items(), key=lambda item: -len(item[1])):
+                print(f"📌 [{root}] {texts[root]}")
+                for member in members[1:]:
+                    print(f"     ↳ [{member}] {texts[member]}")
+
+            if delete_duplicates and duplicates:
+                extra_ids = [member for members in clusters.values() for member in members[1:]]
+                attempted = set((await db.execute(
+                    select(AptitudeAttempt.question_id).where(AptitudeAttempt.question_id.in_(extra_ids)).distinct()
+                )).scalars())
+                to_delete = [qid for qid in extra_ids if qid not in attempted]
+                await db.execute(delete(AptitudeQuestion).where(AptitudeQuestion.id.in_(to_delete)))
+                await db.commit()
+                print(f"\n🗑️ Deleted {len(to_delete):,} near-duplicates "
+                      f"(kept {len(attempted):,} that already have attempts)")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧠 FLEXYOURBRAIN NEAR-DUPLICATE QUESTIONS")
+    print("=" * 60)
+    asyncio.run(main("--delete" in sys.argv[1:]))
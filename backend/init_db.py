@@ -13,7 +13,8 @@ import os
 # Import ONLY the models we need
 from db_models import (
     Base, User, PasswordResetToken,
-    AptitudeQuestion, AptitudeTest, AptitudeAttempt, AptitudeProgress, SJTScenario
+    AptitudeQuestion, AptitudeTest, AptitudeAttempt, AptitudeProgress, AptitudeSeenQuestions, AptitudeReviewItem, SJTScenario,
+    GenerationJob
 )
 
 load_dotenv()
@@ -77,9 +78,12 @@ async def init():
         print("   ✓ aptitude_tests - Test sessions")
         print("   ✓ aptitude_attempts - Individual answers")
         print("   ✓ aptitude_progress - Progress tracking by category")
+        print("   ✓ aptitude_seen_questions - Questions each user has already attempted")
+        print("   ✓ aptitude_review_items - Spaced-repetition queue of missed questions")
         print("   ✓ sjt_scenarios - Situational judgement tests")
+        print("   ✓ generation_jobs - Admin AI question generation jobs")
         print()
-        print("📊 Total Tables: 7")
+        print("📊 Total Tables: 10")
         print()
         print("🚀 Next steps:")
         print("   1. Run: python -m uvicorn main:app --reload")
@@ -9,7 +9,8 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy import select, func
 from backend.db_models import AptitudeQuestion
 from backend.utils.question_manager import QuestionManager
-from backend.utils.ai_question_generator import AIQuestionGenerator
+from backend.utils.ai_question_generator import get_ai_generator
+from backend.utils.content_hash import dedupe_by_content_hash, insert_new_rows
 import os
 from dotenv import load_dotenv
 
@@ -51,7 +52,7 @@ async def generate_ai_questions(db: AsyncSession):
 async def direct_ai_generation(db: AsyncSession):
     """Direct AI generation bypassing question manager (fallback)"""
     print("🔄 Direct AI generation (fallback method)...")
-    generator = AIQuestionGenerator()
+    generator = get_ai_generator()
     
     domains = ["Logical", "Quantitative", "Verbal", "Coding"]
     difficulties = ["easy", "medium", "hard"]
@@ -62,32 +63,26 @@ async def direct_ai_generation(db: AsyncSession):
     for domain in domains:
         for difficulty in difficulties:
             print(f"   Generating {questions_per_combination} {difficulty} questions for {domain}...")
-            questions = generator.generate_questions(domain, questions_per_combination, difficulty)
+            questions = await generator.generate_questions(domain, questions_per_combination, difficulty)
             
             if questions:
-                for q_data in questions:
-                    # Check if question already exists
-                    from sqlalchemy import select
-                    result = await db.execute(
-                        select(AptitudeQuestion).where(
-                            AptitudeQuestion.question_text == q_data["question_text"]
-                        )
+                # One content_hash lookup per batch instead of a text scan per question
+                fresh_questions, _ = await dedupe_by_content_hash(db, AptitudeQuestion, questions, "question_text")
+                added = await insert_new_rows(db, AptitudeQuestion, [
+                    dict(
+                        category=q_data["category"],
+                        subcategory=q_data.get("subcategory", "General"),
+                        difficulty=q_data.get("difficulty", "medium"),
+                        question_text=q_data["question_text"],
+                        options=q_data["options"],
+                        correct_answer=q_data["correct_answer"],
+                        explanation=q_data.get("explanation", ""),
+                        time_limit=q_data.get("time_limit", 60),
+                        content_hash=q_data["content_hash"]
                     )
-                    existing = result.scalar_one_or_none()
-                    
-                    if not existing:
-                        question = AptitudeQuestion(
-                            category=q_data["category"],
-                            subcategory=q_data.get("subcategory", "General"),
-                            difficulty=q_data.get("difficulty", "medium"),
-                            question_text=q_data["question_text"],
-                            options=q_data["options"],
-                            correct_answer=q_data["correct_answer"],
-                            explanation=q_data.get("explanation", ""),
-                            time_limit=q_data.get("time_limit", 60)
-                        )
-                        db.add(question)
-                        total_added += 1
+                    for q_data in fresh_questions
+                ])
+                total_added += len(added)
     
     await db.commit()
     return total_added
@@ -44,7 +44,17 @@ from backend.auth import (
     get_current_user, get_optional_user, get_db_dependency as auth_get_db_dependency
 )
 from backend.utils.email_utils import send_reset_email
-from backend.routes.aptitude import router as aptitude_router
+from backend.routes.aptitude import (
+    router as aptitude_router, practice_decks, mock_test_pool, DEFAULT_MOCK_CATEGORIES,
+    question_manager, sjt_manager
+)
+from backend.migrate_question_bank import migrate as migrate_question_bank
+from backend.utils.question_bank_index import question_bank_index
+from backend.utils.llm_providers import close_llm_provider
+from backend.utils.question_exposure import question_exposure
+from backend.utils.near_duplicate import near_duplicate_index
+from backend.utils.question_replenisher import question_replenisher
+from backend.utils.generation_jobs import generation_jobs
 
 # =================== ENVIRONMENT SETUP ===================
 load_dotenv()
@@ -52,6 +62,8 @@ load_dotenv()
 # Environment detection
 ENV = os.getenv("ENV", "development")
 DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+# The ORM maps columns that older databases lack until migrate_question_bank.py runs
+RUN_MIGRATIONS_ON_STARTUP = os.getenv("RUN_MIGRATIONS_ON_STARTUP", "true").lower() == "true"
 
 # Force disable debug in production
 if ENV == "production" and DEBUG:
@@ -231,11 +243,59 @@ async def startup_event():
     except Exception as e:
         print(f"❌ Database connection failed: {e}")
         raise
+    
+    # Bring an existing database up to the current schema before anything queries it
+    if RUN_MIGRATIONS_ON_STARTUP:
+        try:
+            await migrate_question_bank(engine)
+        except Exception as e:
+            print(f"❌ Question bank migration failed: {e}")
+            raise
+    
+    # Load the in-process question ID index (sampling falls back to DB probes without it)
+    try:
+        async with AsyncSessionLocal() as session:
+            await question_bank_index.load(session)
+    except Exception as e:
+        print(f"⚠️ Question bank index not loaded: {e}")
+    
+    # Attempt counts for exposure-weighted sampling (uniform sampling without them)
+    try:
+        async with AsyncSessionLocal() as session:
+            await question_exposure.load(session)
+        # Weighted draws need the alias tables; later rebuilds run in the background
+        if question_bank_index.loaded:
+            await question_bank_index.rebuild_alias_tables()
+    except Exception as e:
+        print(f"⚠️ Question exposure not loaded: {e}")
+    
+    # Near-duplicate signatures for new AI questions (only in-batch checks without it)
+    try:
+        async with AsyncSessionLocal() as session:
+            await near_duplicate_index.load(session)
+    except Exception as e:
+        print(f"⚠️ Near-duplicate index not loaded: {e}")
+    
+    # Keep pre-shuffled practice decks and mock tests topped up in the background
+    practice_decks.start()
+    mock_test_pool.warm(tuple(DEFAULT_MOCK_CATEGORIES))
+    mock_test_pool.start()
+    
+    # Generate questions/scenarios ahead of demand (requests never wait on the LLM)
+    question_replenisher.start(question_manager, sjt_manager)
+    
+    # Admin generation jobs (including any a previous process left unfinished)
+    generation_jobs.start(question_manager)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
+    await practice_decks.stop()
+    await mock_test_pool.stop()
+    await question_replenisher.stop()
+    await generation_jobs.stop()
+    await close_llm_provider()
     await engine.dispose()
     print("🛑 Database connections closed")
 
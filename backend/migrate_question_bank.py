@@ -0,0 +1,222 @@
+# backend/migrate_question_bank.py
+"""
+Question bank migrations
+Brings an existing database up to the current question bank schema (new
+columns, tables, indexes and backfills). Every step is idempotent, so the
+script can simply be re-run after each upgrade. The API runs it on startup
+too (RUN_MIGRATIONS_ON_STARTUP), under an advisory lock so that workers
+starting together apply it once.
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent))
+
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy import text
+from dotenv import load_dotenv
+from backend.db_models import content_hash, AptitudeSeenQuestions, AptitudeReviewItem, GenerationJob
+from backend.utils.review_schedule import FIRST_INTERVAL_DAYS, DEFAULT_EASE
+from backend.utils.near_duplicate import minhash_signature
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    print("❌ DATABASE_URL not found in .env file")
+    sys.exit(1)
+
+if DATABASE_URL.startswith("postgresql://"):
+    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+BACKFILL_BATCH_SIZE = 5_000
+
+
+def backfill_content_hash(table: str, text_column: str):
+    """
+    Hash rows that have no content_hash yet, in id order. Only the first row
+    with a given text gets the hash; later duplicates stay NULL so the unique
+    index can still be built (NULLs never conflict).
+    """
+    async def backfill(conn):
+        result = await conn.execute(text(f"SELECT content_hash FROM {table} WHERE content_hash IS NOT NULL"))
+        seen = set(result.scalars())
+        hashed = duplicates = 0
+
+        rows = await conn.stream(text(f"SELECT id, {text_column} FROM {table} WHERE content_hash IS NULL ORDER BY id"))
+        async for partition in rows.partitions(BACKFILL_BATCH_SIZE):
+            updates = []
+            for row_id, body in partition:
+                row_hash = content_hash(body)
+                if row_hash in seen:
+                    duplicates += 1
+                    continue
+                seen.add(row_hash)
+                updates.append({"id": row_id, "content_hash": row_hash})
+            if updates:
+                await conn.execute(text(f"UPDATE {table} SET content_hash = :content_hash WHERE id = :id"), updates)
+                hashed += len(updates)
+
+        return f"{hashed} hashed, {duplicates} duplicate(s) left without a hash"
+    return backfill
+
+
+async def backfill_minhash_signature(conn):
+    # Signatures the app would otherwise compute on every index load
+    hashed = 0
+    rows = await conn.stream(text(
+        "SELECT id, question_text FROM aptitude_questions WHERE minhash_signature IS NULL ORDER BY id"
+    ))
+    async for partition in rows.partitions(BACKFILL_BATCH_SIZE):
+        updates = [{"id": row_id, "signature": minhash_signature(body).tobytes()} for row_id, body in partition]
+        await conn.execute(text("UPDATE aptitude_questions SET minhash_signature = :signature WHERE id = :id"), updates)
+        hashed += len(updates)
+    return f"{hashed} hashed"
+
+
+def create_table(model):
+    async def create(conn):
+        await conn.run_sync(lambda sync_conn: model.__table__.create(sync_conn, checkfirst=True))
+        return "ready"
+    return create
+
+
+async def backfill_review_items(conn):
+    # Queue every question a user has answered wrong, due a first interval after
+    # the last wrong answer; rows that already exist are left alone
+    result = await conn.execute(text(
+        "INSERT INTO aptitude_review_items "
+        "(user_id, question_id, category, due_at, interval_days, ease, streak, lapses, updated_at) "
+        "SELECT t.user_id, a.question_id, q.category, "
+        "       max(a.attempted_at) + make_interval(secs => :interval_days * 86400), "
+        "       :interval_days, :ease, 0, count(*), now() "
+        "FROM aptitude_attempts a "
+        "JOIN aptitude_tests t ON t.id = a.test_id "
+        "JOIN aptitude_questions q ON q.id = a.question_id "
+        "WHERE t.test_type <> 'sjt' AND a.is_correct IS FALSE "
+        "GROUP BY t.user_id, a.question_id, q.category "
+        "ON CONFLICT (user_id, question_id) DO NOTHING"
+    ), {"interval_days": FIRST_INTERVAL_DAYS, "ease": DEFAULT_EASE})
+    return f"{result.rowcount} queued"
+
+
+# (description, SQL or async callable taking the connection) - applied in order
+MIGRATIONS = [
+    (
+        "aptitude_questions.random_key (backfilled with random())",
+        "ALTER TABLE aptitude_questions "
+        "ADD COLUMN IF NOT EXISTS random_key DOUBLE PRECISION NOT NULL DEFAULT random()"
+    ),
+    (
+        "index (category, random_key)",
+        "CREATE INDEX IF NOT EXISTS ix_aptitude_questions_category_random_key "
+        "ON aptitude_questions (category, random_key)"
+    ),
+    (
+        "index (category, difficulty, random_key)",
+        "CREATE INDEX IF NOT EXISTS ix_aptitude_questions_category_difficulty_random_key "
+        "ON aptitude_questions (category, difficulty, random_key)"
+    ),
+    (
+        "aptitude_questions.content_hash",
+        "ALTER TABLE aptitude_questions ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"
+    ),
+    (
+        "aptitude_questions.content_hash backfill",
+        backfill_content_hash("aptitude_questions", "question_text")
+    ),
+    (
+        "unique index (content_hash) on aptitude_questions",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_aptitude_questions_content_hash "
+        "ON aptitude_questions (content_hash)"
+    ),
+    (
+        "aptitude_questions.minhash_signature",
+        "ALTER TABLE aptitude_questions ADD COLUMN IF NOT EXISTS minhash_signature BYTEA"
+    ),
+    (
+        "aptitude_questions.minhash_signature backfill",
+        backfill_minhash_signature
+    ),
+    (
+        "index (created_at) on aptitude_questions",
+        "CREATE INDEX IF NOT EXISTS ix_aptitude_questions_created_at "
+        "ON aptitude_questions (created_at)"
+    ),
+    (
+        "aptitude_seen_questions table",
+        create_table(AptitudeSeenQuestions)
+    ),
+    (
+        "aptitude_review_items table",
+        create_table(AptitudeReviewItem)
+    ),
+    (
+        "aptitude_review_items backfill from wrong answers",
+        backfill_review_items
+    ),
+    (
+        "sjt_scenarios.content_hash",
+        "ALTER TABLE sjt_scenarios ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"
+    ),
+    (
+        "sjt_scenarios.content_hash backfill",
+        backfill_content_hash("sjt_scenarios", "scenario_text")
+    ),
+    (
+        "unique index (content_hash) on sjt_scenarios",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_sjt_scenarios_content_hash "
+        "ON sjt_scenarios (content_hash)"
+    ),
+    (
+        "generation_jobs table",
+        create_table(GenerationJob)
+    ),
+]
+
+
+async def migrate(engine: AsyncEngine = None):
+    """Apply MIGRATIONS in order - on engine if given, else on a throwaway engine for DATABASE_URL"""
+    own_engine = engine is None
+    if own_engine:
+        engine = create_async_engine(DATABASE_URL, echo=False)
+
+    try:
+        async with engine.connect() as lock_conn:
+            # Held for the whole run: other workers wait here, then find nothing to do
+            await lock_conn.execute(text("SELECT pg_advisory_lock(hashtext('migrate_question_bank'))"))
+            try:
+                await _apply_migrations(engine)
+            finally:
+                await lock_conn.execute(text("SELECT pg_advisory_unlock(hashtext('migrate_question_bank'))"))
+    finally:
+        if own_engine:
+            await engine.dispose()
+
+
+async def _apply_migrations(engine: AsyncEngine):
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT to_regclass('aptitude_questions')"))
+        if result.scalar() is None:
+            print("⚠️ aptitude_questions does not exist yet - run init_db.py first, nothing to migrate")
+            return
+
+    for description, step in MIGRATIONS:
+        async with engine.begin() as conn:
+            if callable(step):
+                outcome = await step(conn)
+                print(f"✅ {description}: {outcome}")
+                continue
+            await conn.execute(text(step))
+        print(f"✅ {description}")
+
+    print("\n🎉 Question bank schema is up to date")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧠 FLEXYOURBRAIN QUESTION BANK MIGRATION")
+    print("=" * 60)
+    asyncio.run(migrate())
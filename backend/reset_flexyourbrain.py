@@ -13,10 +13,15 @@ sys.path.append(str(Path(__file__).parent))
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import text, select, func, delete
-from backend.db_models import AptitudeQuestion, SJTScenario, AptitudeTest, AptitudeAttempt, AptitudeProgress
+from backend.db_models import (
+    AptitudeQuestion, SJTScenario, AptitudeTest, AptitudeAttempt, AptitudeProgress, AptitudeSeenQuestions,
+    AptitudeReviewItem
+)
 import os
 from dotenv import load_dotenv
-from backend.utils.ai_question_generator import AIQuestionGenerator
+from backend.utils.ai_question_generator import get_ai_generator
+from backend.utils.content_hash import dedupe_by_content_hash, insert_new_rows
+from backend.utils.question_replenisher import QUESTION_CATEGORIES, QUESTION_DIFFICULTIES
 from datetime import datetime, timezone
 
 load_dotenv()
@@ -29,7 +34,7 @@ class FlexYourBrainReset:
         
         self.engine = create_async_engine(self.DATABASE_URL, echo=False)
         self.AsyncSessionLocal = sessionmaker(self.engine, expire_on_commit=False, class_=AsyncSession)
-        self.ai_generator = AIQuestionGenerator()
+        self.ai_generator = get_ai_generator()
         
     async def check_database_status(self):
         """Check current status of FlexYourBrain tables"""
@@ -98,6 +103,8 @@ class FlexYourBrainReset:
                     ("aptitude_attempts", "Individual question attempts"),
                     ("aptitude_tests", "Test sessions"),
                     ("aptitude_progress", "User progress tracking"),
+                    ("aptitude_seen_questions", "Seen-question bitmaps"),
+                    ("aptitude_review_items", "Review queue"),
                     ("aptitude_questions", "Question bank"),
                     ("sjt_scenarios", "SJT scenarios")
                 ]
@@ -114,6 +121,10 @@ class FlexYourBrainReset:
                         result = await db.execute(delete(AptitudeAttempt))
                     elif table_name == "aptitude_progress":
                         result = await db.execute(delete(AptitudeProgress))
+                    elif table_name == "aptitude_seen_questions":
+                        result = await db.execute(delete(AptitudeSeenQuestions))
+                    elif table_name == "aptitude_review_items":
+                        result = await db.execute(delete(AptitudeReviewItem))
                     
                     deleted = result.rowcount
                     total_deleted += deleted
@@ -133,56 +144,67 @@ class FlexYourBrainReset:
         print("\n🤖 GENERATING AI APTITUDE QUESTIONS")
         print("=" * 50)
         
-        # ONLY THESE 4 CATEGORIES
-        domains = ["Logical Reasoning", "Quantitative Aptitude", "Verbal Ability", "Coding Challenge"]
-        difficulties = ["easy", "medium", "hard"]
+        # Only the categories the app serves
+        domains = QUESTION_CATEGORIES
+        difficulties = QUESTION_DIFFICULTIES
         questions_per_combination = 5  # 5 questions per domain/difficulty combo
         
         total_generated = 0
         
+        async def generate(domain: str, difficulty: str):
+            print(f"   Generating {questions_per_combination} {difficulty} questions for {domain}...")
+            ai_questions = await self.ai_generator.generate_questions(
+                domain=domain,
+                count=questions_per_combination,
+                difficulty=difficulty
+            )
+            return domain, difficulty, ai_questions
+        
         async with self.AsyncSessionLocal() as db:
             try:
-                for domain in domains:
-                    print(f"\n🌐 Domain: {domain}")
+                # All combinations at once - the LLM rate limiter bounds concurrency and pace
+                for next_batch in asyncio.as_completed([
+                    generate(domain, difficulty) for domain in domains for difficulty in difficulties
+                ]):
+                    domain, difficulty, ai_questions = await next_batch
                     
-                    for difficulty in difficulties:
-                        print(f"   Generating {questions_per_combination} {difficulty} questions...")
-                        
-                        # Generate questions via AI
-                        ai_questions = self.ai_generator.generate_questions(
-                            domain=domain,
-                            count=questions_per_combination,
-                            difficulty=difficulty
-                        )
-                        
-                        if not ai_questions:
-                            print(f"   ⚠️  No questions generated for {domain}/{difficulty}")
+                    if not ai_questions:
+                        print(f"   ⚠️  No questions generated for {domain}/{difficulty}")
+                        continue
+                    
+                    # Validate questions before saving
+                    valid_questions = []
+                    for q_data in ai_questions:
+                        if not self._validate_question(q_data):
+                            print(f"   ⚠️  Skipping invalid question")
                             continue
-                        
-                        # Save to database
-                        for q_data in ai_questions:
-                            # Validate question before saving
-                            if not self._validate_question(q_data):
-                                print(f"   ⚠️  Skipping invalid question")
-                                continue
-                            
-                            question = AptitudeQuestion(
-                                category=q_data["category"],
-                                subcategory=q_data.get("subcategory", "General"),
-                                difficulty=q_data.get("difficulty", "medium"),
-                                question_text=q_data["question_text"],
-                                options=q_data["options"],
-                                correct_answer=q_data["correct_answer"],
-                                explanation=q_data.get("explanation", ""),
-                                time_limit=q_data.get("time_limit", 60),
-                                created_at=datetime.now(timezone.utc)
-                            )
-                            db.add(question)
-                            total_generated += 1
-                        
-                        print(f"   ✅ Added {len(ai_questions)} questions")
+                        valid_questions.append(q_data)
+                    
+                    # Drop repeats (the unique content_hash index would reject them)
+                    fresh_questions, _ = await dedupe_by_content_hash(
+                        db, AptitudeQuestion, valid_questions, "question_text"
+                    )
+                    
+                    # Save to database - the whole batch in one INSERT
+                    added = await insert_new_rows(db, AptitudeQuestion, [
+                        dict(
+                            category=q_data["category"],
+                            subcategory=q_data.get("subcategory", "General"),
+                            difficulty=q_data.get("difficulty", "medium"),
+                            question_text=q_data["question_text"],
+                            options=q_data["options"],
+                            correct_answer=q_data["correct_answer"],
+                            explanation=q_data.get("explanation", ""),
+                            time_limit=q_data.get("time_limit", 60),
+                            created_at=datetime.now(timezone.utc),
+                            content_hash=q_data["content_hash"]
+                        )
+                        for q_data in fresh_questions
+                    ])
+                    total_generated += len(added)
                     
                     await db.commit()
+                    print(f"   ✅ Added {len(added)} {domain}/{difficulty} questions")
                 
                 print(f"\n🎉 Total aptitude questions generated: {total_generated:,}")
                 return total_generated
@@ -276,7 +298,7 @@ class FlexYourBrainReset:
                     print(f"\n📋 Category: {category}")
                     
                     # Generate scenarios using AI
-                    ai_scenarios = self.ai_generator.generate_sjt_scenarios(
+                    ai_scenarios = await self.ai_generator.generate_sjt_scenarios(
                         category=category,
                         count=scenarios_per_category
                     )
@@ -286,24 +308,31 @@ class FlexYourBrainReset:
                         # Use fallback scenarios
                         ai_scenarios = self._get_fallback_sjt_scenarios(category, scenarios_per_category)
                     
-                    for scenario_data in ai_scenarios:
-                        # Validate scenario before saving
-                        if not self._validate_sjt_scenario(scenario_data):
-                            print(f"   ⚠️  Skipping invalid SJT scenario")
-                            continue
-                        
-                        scenario = SJTScenario(
+                    valid_scenarios = [s for s in ai_scenarios if self._validate_sjt_scenario(s)]
+                    if len(valid_scenarios) < len(ai_scenarios):
+                        print(f"   ⚠️  Skipping {len(ai_scenarios) - len(valid_scenarios)} invalid SJT scenario(s)")
+                    
+                    # Drop repeats (the unique content_hash index would reject them)
+                    fresh_scenarios, _ = await dedupe_by_content_hash(
+                        db, SJTScenario, valid_scenarios, "scenario_text"
+                    )
+                    
+                    added = await insert_new_rows(db, SJTScenario, [
+                        dict(
                             scenario_text=scenario_data["scenario_text"],
                             options=scenario_data["options"],
                             most_effective=scenario_data["most_effective"],
                             least_effective=scenario_data["least_effective"],
                             explanation=scenario_data.get("explanation", ""),
                             category=category,
-                            created_at=datetime.now()  # Use datetime.now() instead of utcnow()
+                            created_at=datetime.now(),  # Use datetime.now() instead of utcnow()
+                            content_hash=scenario_data["content_hash"]
                         )
-                        db.add(scenario)
-                        total_generated += 1
-                        print(f"   ✅ Added scenario: {scenario_data['scenario_text'][:50]}...")
+                        for scenario_data in fresh_scenarios
+                    ])
+                    total_generated += len(added)
+                    for scenario in added:
+                        print(f"   ✅ Added scenario: {scenario.scenario_text[:50]}...")
                     
                     await db.commit()
                 
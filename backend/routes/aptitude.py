@@ -1,4 +1,5 @@
 # backend/routes/aptitude.py
+import os
 import json
 import random
 from datetime import datetime
@@ -6,7 +7,7 @@ import traceback
 from typing import List, Optional, Dict, Any
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_
 
@@ -16,9 +17,19 @@ from backend.db_models import (
 )
 from backend.auth import get_current_user, get_db_dependency
 
-from backend.utils.question_manager import QuestionManager
+from backend.utils.question_manager import QuestionManager, LEAN_COLUMNS
 from backend.utils.sjt_manager import SJTManager
-from backend.utils.question_tracker import question_tracker
+from backend.utils.seen_questions import seen_questions, SeenBitmap
+from backend.utils.question_cache import question_json_cache, question_to_dict
+from backend.utils.review_schedule import review_schedule
+from backend.utils.question_replenisher import QUESTION_CATEGORIES, QUESTION_DIFFICULTIES, question_replenisher
+from backend.utils.generation_jobs import generation_jobs
+from backend.utils.rate_limiter import llm_rate_limiter
+from backend.utils.circuit_breaker import llm_circuit_breaker
+from backend.utils.question_decks import (
+    QuestionDeckPool, validate_questions, shuffle_question_options, strip_answer_key, shuffle_answer, unshuffle_answer
+)
+from backend.utils.test_blueprint import build_quotas
 
 # =================== PATHS ===================
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -27,6 +38,12 @@ router = APIRouter()
 question_manager = QuestionManager()
 sjt_manager = SJTManager() 
 
+# What practice drills and mock tests can be started with. Deck pools keep
+# decks per combination, so request values are checked against these first
+APTITUDE_CATEGORIES = QUESTION_CATEGORIES
+PRACTICE_DIFFICULTIES = ['easy', 'medium', 'hard', 'all']
+PRACTICE_QUESTION_COUNTS = list(range(5, 51, 5))  # the practice drill slider
+
 def _get_display_category(category: str) -> str:
     display_map = {
         "Logical": "Logical Reasoning",
@@ -118,7 +135,7 @@ async def get_questions_by_category(
     try:
         # Get questions directly from database
         questions = await question_manager.get_questions_by_domain(
-            db, category, limit, difficulty or "all"
+            db, category, limit, difficulty or "all", lean=True
         )
         
         if not questions:
@@ -128,7 +145,7 @@ async def get_questions_by_category(
             "category": category,
             "difficulty_filter": difficulty,
             "count": len(questions),
-            "questions": questions
+            "questions": strip_answer_key(questions)
         }
         
     except HTTPException:
@@ -136,6 +153,40 @@ async def get_questions_by_category(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching questions: {str(e)}")
 
+MAX_QUESTIONS_PER_REQUEST = 200
+
+@router.get("/questions")
+async def get_questions_by_ids(
+    ids: str = Query(..., description="Comma-separated question IDs"),
+    db: AsyncSession = Depends(get_db_dependency),
+    current_user: User = Depends(get_current_user)
+):
+    """Get several questions by ID in one request, without the answer key, from the pre-encoded JSON cache"""
+    try:
+        question_ids = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if not question_ids:
+        raise HTTPException(status_code=400, detail="No question IDs given")
+    if len(question_ids) > MAX_QUESTIONS_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_QUESTIONS_PER_REQUEST} question IDs per request")
+
+    try:
+        fragments = await question_json_cache.get_many(db, question_ids, public=True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Response body is the cached fragments joined together, in request order
+    missing = [qid for qid in question_ids if qid not in fragments]
+    body = b"".join((
+        b'{"questions":[',
+        b",".join(fragments[qid] for qid in question_ids if qid in fragments),
+        b'],"missing":',
+        json.dumps(missing).encode(),
+        b"}",
+    ))
+    return Response(content=body, media_type="application/json")
+
 @router.get("/question/{question_id}")
 async def get_question_by_id(
     question_id: int,
@@ -143,33 +194,31 @@ async def get_question_by_id(
 ):
     """Get specific question by ID from database"""
     try:
-        result = await db.execute(
-            select(AptitudeQuestion).where(AptitudeQuestion.id == question_id)
-        )
-        question = result.scalar_one_or_none()
-        
-        if not question:
-            raise HTTPException(status_code=404, detail=f"Question with ID {question_id} not found")
-        
-        # Convert to dict format
-        question_dict = {
-            "id": question.id,
-            "category": question.category,
-            "subcategory": question.subcategory,
-            "difficulty": question.difficulty,
-            "question_text": question.question_text,
-            "options": question.options,
-            "correct_answer": question.correct_answer,
-            "explanation": question.explanation,
-            "time_limit": question.time_limit
-        }
-        
-        return question_dict
-        
+        fragments = await question_json_cache.get_many(db, [question_id])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    if question_id not in fragments:
+        raise HTTPException(status_code=404, detail=f"Question with ID {question_id} not found")
+    return Response(content=fragments[question_id], media_type="application/json")
+
 # =================== PRACTICE DRILLS ROUTES ===================
+async def build_practice_deck(db: AsyncSession, key, exclude: SeenBitmap = None) -> List[Dict[str, Any]]:
+    """Sample, validate and option-shuffle one practice question set (answers come back on submit)"""
+    category, difficulty, question_count = key
+    questions = await question_manager.get_questions_by_domain(
+        db, category, question_count, difficulty, exclude=exclude, lean=True
+    )
+    return strip_answer_key(shuffle_question_options(validate_questions(questions)))
+
+practice_decks = QuestionDeckPool("Practice", build_practice_deck)
+
+async def build_review_deck(db: AsyncSession, user_id: int, category: str, question_count: int) -> List[Dict[str, Any]]:
+    """The user's most overdue missed questions in category, served like a practice deck"""
+    questions = await review_schedule.due_questions(db, user_id, category, question_count, columns=LEAN_COLUMNS)
+    questions = [question_to_dict(q, lean=True) for q in questions]
+    return strip_answer_key(shuffle_question_options(validate_questions(questions)))
+
 @router.post("/practice/start")
 async def start_practice_session(
     request_data: Dict[str, Any],
@@ -180,85 +229,54 @@ async def start_practice_session(
         category = request_data.get('category', 'Logical')
         difficulty = request_data.get('difficulty', 'medium')
         question_count = request_data.get('question_count', 10)
+        mode = request_data.get('mode', 'practice')  # "review": questions due from the user's mistakes
+        
+        if category not in APTITUDE_CATEGORIES:
+            raise HTTPException(status_code=400, detail=f"Unknown category: {category}")
+        if mode != "review" and difficulty not in PRACTICE_DIFFICULTIES:
+            raise HTTPException(status_code=400, detail=f"Unknown difficulty: {difficulty}")
+        if not isinstance(question_count, int) or isinstance(question_count, bool):
+            raise HTTPException(status_code=400, detail="question_count must be an integer")
+        # Nearest slider value, so a client can't create a deck key per count
+        question_count = min(PRACTICE_QUESTION_COUNTS, key=lambda n: abs(n - question_count))
 
-        # Clear previous session for this user/category
-        question_tracker.clear_session(current_user.id, category)
-        
-        print(f"🔧 Starting practice session from database: {category}, {difficulty}, {question_count}")
-        
-        # Get questions directly from database
-        questions = await question_manager.get_questions_by_domain(
-            db, category, question_count, difficulty
-        )
-        
-        if not questions:
-            raise HTTPException(
-                status_code=500, 
-                detail=f"Could not get questions for {category}"
-            )
-        
-        # Validate questions structure and fix any issues
-        validated_questions = []
-        for i, q in enumerate(questions):
-            # Check required fields
-            if not all(key in q for key in ['question_text', 'options', 'correct_answer']):
-                print(f"❌ Invalid question at index {i}: {q}")
-                continue
-            
-            # Validate correct_answer format
-            correct_answer = str(q['correct_answer']).upper().strip()
-            if correct_answer not in ['A', 'B', 'C', 'D']:
-                print(f"⚠️ Fixing invalid correct_answer: {q['correct_answer']}")
-                # Default to A if invalid
-                q['correct_answer'] = 'A'
-            
-            # Validate options count
-            if not isinstance(q['options'], list) or len(q['options']) != 4:
-                print(f"⚠️ Invalid options for question: {q['question_text'][:50]}...")
-                continue
-                
-            validated_questions.append(q)
+        print(f"🔧 Starting {mode} session: {category}, {difficulty}, {question_count}")
+        
+        if mode == "review":
+            difficulty = "mixed"
+            validated_questions = await build_review_deck(db, current_user.id, category, question_count)
+            if not validated_questions:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"No {category} questions are due for review"
+                )
+        else:
+            # Questions this user already answered in earlier sessions
+            seen = await seen_questions.get(db, current_user.id, category)
             
-        for q in validated_questions:
-            question_tracker.add_question(current_user.id, category, q['id'])
+            # Ready-made deck from the pool with the questions this user has seen swapped
+            # out, or built inline when the pool has none
+            deck_key = (category, difficulty, question_count)
+            validated_questions, removed = practice_decks.pop_unseen(deck_key, seen)
+            if validated_questions is None:
+                validated_questions = await build_practice_deck(db, deck_key, exclude=seen)
+            elif removed:
+                kept_ids = {q['id'] for q in validated_questions}
+                seen.update(kept_ids)  # request-local copy
+                replacements = await build_practice_deck(db, (category, difficulty, len(removed)), exclude=seen)
+                # Short on unseen stock the sampler repeats seen questions - never one already in the deck
+                validated_questions += [q for q in replacements if q['id'] not in kept_ids]
         
         if not validated_questions:
             raise HTTPException(
                 status_code=500,
-                detail="No valid questions available after validation"
+                detail=f"Could not get valid questions for {category}"
             )
         
-        # Shuffle options for each question to prevent pattern recognition
-        for question in validated_questions:
-            options = question["options"][:]
-            correct_answer = question["correct_answer"]
-            
-            # Validate correct_answer before shuffling
-            if correct_answer not in ['A', 'B', 'C', 'D']:
-                print(f"⚠️ Invalid correct_answer before shuffling: {correct_answer}, defaulting to A")
-                correct_answer = 'A'
-                question["correct_answer"] = 'A'
-            
-            # Create mapping for option shuffling
-            option_mapping = {chr(65 + i): chr(65 + i) for i in range(len(options))}
-            shuffled_indices = list(range(len(options)))
-            random.shuffle(shuffled_indices)
-            
-            shuffled_options = [options[i] for i in shuffled_indices]
-            for new_idx, old_idx in enumerate(shuffled_indices):
-                old_letter = chr(65 + old_idx)
-                new_letter = chr(65 + new_idx)
-                option_mapping[old_letter] = new_letter
-            
-            # Update question with shuffled options and new correct answer
-            question["options"] = shuffled_options
-            question["correct_answer"] = option_mapping[correct_answer]
-            question["original_correct_answer"] = correct_answer  # Store for verification
-        
         # Create test record
         test = AptitudeTest(
             user_id=current_user.id,
-            test_type="practice",
+            test_type="review" if mode == "review" else "practice",
             category=category,
             total_questions=len(validated_questions),
             time_limit=0,  # No time limit for practice
@@ -267,8 +285,7 @@ async def start_practice_session(
         )
         
         db.add(test)
-        await db.commit()
-        await db.refresh(test)
+        await db.commit()  # expire_on_commit=False keeps test.id, no refresh round trip
         
         print(f"✅ Practice session created with ID: {test.id}")
         
@@ -279,7 +296,7 @@ async def start_practice_session(
             "difficulty": difficulty,
             "questions": validated_questions,
             "total_questions": len(validated_questions),
-            "test_type": "practice",
+            "test_type": "review" if mode == "review" else "practice",
             "ai_generated": any(q.get('source') == 'ai_generated' for q in validated_questions)
         }
     
@@ -316,6 +333,13 @@ async def submit_practice_answer(
         question_id = attempt_data['question_id']
         user_answer = attempt_data.get('user_answer')
         time_taken = attempt_data.get('time_taken', 0)
+        option_order = attempt_data.get('option_order')  # as served with the (shuffled) question
+        
+        # The user picked a letter of the shuffled options - grade the stored one
+        try:
+            user_answer = unshuffle_answer(user_answer, option_order) if user_answer else user_answer
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         print(f"Question ID: {question_id}")
         print(f"User Answer: {user_answer}")
@@ -336,11 +360,14 @@ async def submit_practice_answer(
         
         print(f"✅ Test found: {test.id}, Status: {test.status}")
         
-        # Get question directly from database
+        # Only what grading needs - the rest of the question was served at start
         result = await db.execute(
-            select(AptitudeQuestion).where(AptitudeQuestion.id == question_id)
+            select(
+                AptitudeQuestion.id, AptitudeQuestion.category, AptitudeQuestion.question_text,
+                AptitudeQuestion.correct_answer, AptitudeQuestion.explanation
+            ).where(AptitudeQuestion.id == question_id)
         )
-        question = result.scalar_one_or_none()
+        question = result.one_or_none()
         
         if not question:
             print(f"❌ Question {question_id} not found in database")
@@ -364,6 +391,9 @@ async def submit_practice_answer(
         )
         
         db.add(attempt)
+        # Keep it out of this user's future sessions, and (re)schedule its review
+        await seen_questions.mark_seen(db, current_user.id, question.category, [question.id])
+        await review_schedule.record_answer(db, current_user.id, question.id, question.category, is_correct)
         await db.commit()
         await db.refresh(attempt)
         
@@ -374,7 +404,7 @@ async def submit_practice_answer(
         return {
             "attempt_id": attempt.id,
             "is_correct": is_correct,
-            "correct_answer": question.correct_answer,
+            "correct_answer": shuffle_answer(question.correct_answer, option_order),
             "explanation": question.explanation,
             "database_question_id": question_id
         }
@@ -450,7 +480,61 @@ async def complete_practice_session(
         print(f"Error completing practice: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/review/summary")
+async def get_review_summary(
+    db: AsyncSession = Depends(get_db_dependency),
+    current_user: User = Depends(get_current_user)
+):
+    """Missed questions due for review per category (start them with mode="review")"""
+    try:
+        categories = await review_schedule.summary(db, current_user.id)
+        return {
+            "categories": categories,
+            "total_due": sum(c["due"] for c in categories.values())
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # =================== MOCK TEST ROUTES ===================
+MOCK_TEST_QUESTION_COUNT = 50
+MOCK_TEST_TIME_LIMIT = 60 * 60  # 60 minutes in seconds
+DEFAULT_MOCK_CATEGORIES = APTITUDE_CATEGORIES
+MOCK_TEST_POOL_DEPTH = int(os.getenv("MOCK_TEST_POOL_DEPTH", 20))  # a class starting at once
+
+async def build_mock_test(db: AsyncSession, key, exclude: SeenBitmap = None) -> List[Dict[str, Any]]:
+    """Assemble one balanced, option-shuffled mock test for a category set"""
+    categories = list(key)
+    
+    # Exact 40/40/20 difficulty mix per category, fetched in one round trip
+    quotas = build_quotas(categories, MOCK_TEST_QUESTION_COUNT)
+    selected_questions = await question_manager.get_stratified_questions(db, quotas, exclude=exclude)
+    
+    # Categories with no stock at all go through the generating path
+    served = {q["category"] for q in selected_questions}
+    for category in categories:
+        if category not in served and len(selected_questions) < MOCK_TEST_QUESTION_COUNT:
+            category_quota = sum(n for (cat, _), n in quotas.items() if cat == category)
+            selected_questions.extend(await question_manager.get_questions_by_domain(
+                db, category, category_quota, "all", exclude=exclude
+            ))
+    
+    # Shuffle options for each question in mock test
+    return shuffle_question_options(selected_questions)
+
+mock_test_pool = QuestionDeckPool("Mock test", build_mock_test, depth=MOCK_TEST_POOL_DEPTH)
+
+async def replace_seen_mock_questions(db: AsyncSession, unseen: List[Dict[str, Any]], removed: List[Dict[str, Any]],
+                                      seen: SeenBitmap) -> List[Dict[str, Any]]:
+    """Refill a pooled mock test's seen questions from the same (category, difficulty) strata"""
+    quotas: Dict[tuple, int] = {}
+    for q in removed:
+        quotas[(q["category"], q["difficulty"])] = quotas.get((q["category"], q["difficulty"]), 0) + 1
+    kept_ids = {q["id"] for q in unseen}
+    seen.update(kept_ids)  # request-local copy
+    replacements = await question_manager.get_stratified_questions(db, quotas, exclude=seen)
+    # Short on unseen stock the sampler repeats seen questions - never one already in the test
+    return unseen + shuffle_question_options([q for q in replacements if q["id"] not in kept_ids])
+
 @router.post("/mock-test/start")
 async def start_mock_test(
     request_data: Dict[str, Any],
@@ -459,63 +543,27 @@ async def start_mock_test(
 ):
     """Start a new mock test (50 questions, 60 minutes) using database"""
     try:
-        categories = request_data.get('categories', ['Logical', 'Quantitative', 'Verbal', 'Coding'])
-        question_count = 50  # Fixed for mock test
-        time_limit = 60 * 60  # 60 minutes in seconds
-        
-        all_questions = []
-        
-        for category in categories:
-            # Get questions for each category from database
-            category_questions = await question_manager.get_questions_by_domain(
-                db, category, 20, "all"  # Get more questions to select from
-            )
-            
-            if category_questions:
-                # Categorize by difficulty
-                easy_q = [q for q in category_questions if q["difficulty"] == "easy"]
-                medium_q = [q for q in category_questions if q["difficulty"] == "medium"]
-                hard_q = [q for q in category_questions if q["difficulty"] == "hard"]
-                
-                # Select proportional questions (40% easy, 40% medium, 20% hard)
-                easy_count = max(1, int(question_count * 0.4 / len(categories)))
-                medium_count = max(1, int(question_count * 0.4 / len(categories)))
-                hard_count = max(1, int(question_count * 0.2 / len(categories)))
-                
-                selected = []
-                if easy_q:
-                    selected.extend(random.sample(easy_q, min(easy_count, len(easy_q))))
-                if medium_q:
-                    selected.extend(random.sample(medium_q, min(medium_count, len(medium_q))))
-                if hard_q:
-                    selected.extend(random.sample(hard_q, min(hard_count, len(hard_q))))
-                
-                all_questions.extend(selected)
-        
-        # If we don't have enough questions, take what we have
-        if len(all_questions) > question_count:
-            selected_questions = random.sample(all_questions, question_count)
-        else:
-            selected_questions = all_questions
-        
-        # Shuffle options for each question in mock test
-        for question in selected_questions:
-            options = question["options"][:]
-            correct_answer = question["correct_answer"]
-            
-            option_mapping = {chr(65 + i): chr(65 + i) for i in range(len(options))}
-            shuffled_indices = list(range(len(options)))
-            random.shuffle(shuffled_indices)
-            
-            shuffled_options = [options[i] for i in shuffled_indices]
-            for new_idx, old_idx in enumerate(shuffled_indices):
-                old_letter = chr(65 + old_idx)
-                new_letter = chr(65 + new_idx)
-                option_mapping[old_letter] = new_letter
-            
-            question["options"] = shuffled_options
-            question["correct_answer"] = option_mapping[correct_answer]
-            question["original_correct_answer"] = correct_answer
+        categories = request_data.get('categories', DEFAULT_MOCK_CATEGORIES)
+        time_limit = MOCK_TEST_TIME_LIMIT
+        
+        if not isinstance(categories, list) or not categories:
+            raise HTTPException(status_code=400, detail="categories must be a non-empty list")
+        unknown = [c for c in categories if c not in APTITUDE_CATEGORIES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown categories: {unknown}")
+        # One pool key per category set, whatever order (or repeats) it was sent in
+        categories = [c for c in APTITUDE_CATEGORIES if c in categories]
+        
+        # Questions this user already answered in earlier sessions
+        seen = await seen_questions.get_many(db, current_user.id, categories)
+        
+        # Claim a pre-assembled test from the pool with the questions this user has
+        # seen swapped out, or build one inline when the pool has none
+        selected_questions, removed = mock_test_pool.pop_unseen(tuple(categories), seen)
+        if selected_questions is None:
+            selected_questions = await build_mock_test(db, tuple(categories), exclude=seen)
+        elif removed:
+            selected_questions = await replace_seen_mock_questions(db, selected_questions, removed, seen)
         
         # Create test record
         test = AptitudeTest(
@@ -529,8 +577,7 @@ async def start_mock_test(
         )
         
         db.add(test)
-        await db.commit()
-        await db.refresh(test)
+        await db.commit()  # expire_on_commit=False keeps test.id, no refresh round trip
         
         return {
             "test_id": test.id,
@@ -541,6 +588,8 @@ async def start_mock_test(
             "test_type": "mock"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -811,41 +860,73 @@ async def get_category_analytics(
         raise HTTPException(status_code=500, detail=str(e))
 
 # =================== AI QUESTION MANAGEMENT ROUTES ===================
-@router.post("/ai/generate-questions")
+MAX_QUESTIONS_PER_COMBINATION = 20
+
+@router.post("/ai/generate-questions", status_code=202)
 async def generate_ai_questions(
     request_data: Dict[str, Any] = None,
     db: AsyncSession = Depends(get_db_dependency),
     current_user: User = Depends(get_current_user)
 ):
-    """Generate new AI questions and add them to the database"""
+    """Queue an AI question generation job; poll /ai/generate-questions/{job_id} for progress"""
+    # Check if user has admin privileges
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    if request_data is None:
+        request_data = {}
+    
+    domains = request_data.get('domains', APTITUDE_CATEGORIES)
+    difficulties = request_data.get('difficulties', QUESTION_DIFFICULTIES)
+    questions_per_combination = request_data.get('questions_per_combination', 3)
+    
+    # Checked here, not by the worker: a bad job would only fail later, after queueing
+    if not isinstance(domains, list) or not domains or any(d not in APTITUDE_CATEGORIES for d in domains):
+        raise HTTPException(status_code=400, detail=f"domains must be a non-empty list of {APTITUDE_CATEGORIES}")
+    if not isinstance(difficulties, list) or not difficulties or any(d not in QUESTION_DIFFICULTIES for d in difficulties):
+        raise HTTPException(status_code=400, detail=f"difficulties must be a non-empty list of {QUESTION_DIFFICULTIES}")
+    if (not isinstance(questions_per_combination, int) or isinstance(questions_per_combination, bool)
+            or not 1 <= questions_per_combination <= MAX_QUESTIONS_PER_COMBINATION):
+        raise HTTPException(
+            status_code=400,
+            detail=f"questions_per_combination must be an integer from 1 to {MAX_QUESTIONS_PER_COMBINATION}"
+        )
+    domains, difficulties = list(dict.fromkeys(domains)), list(dict.fromkeys(difficulties))
+    
     try:
-        # Check if user has admin privileges
-        if current_user.role != "admin":
-            raise HTTPException(status_code=403, detail="Admin access required")
-        
-        if request_data is None:
-            request_data = {}
-        
-        domains = request_data.get('domains', ["Logical", "Quantitative", "Verbal", "Coding"])
-        difficulties = request_data.get('difficulties', ["easy", "medium", "hard"])
-        questions_per_combination = request_data.get('questions_per_combination', 3)
-        
-        new_questions_count = await question_manager.refresh_question_bank(
-            db, domains, difficulties, questions_per_combination
+        job = await generation_jobs.enqueue(
+            db, domains, difficulties, questions_per_combination, created_by=current_user.id
         )
-        
-        stats = await question_manager.get_question_stats(db)
-        
-        return {
-            "message": "AI question generation completed",
-            "new_questions_count": new_questions_count,
-            "domains": domains,
-            "difficulties": difficulties,
-            "total_questions_now": stats["total_questions"]
-        }
-        
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating questions: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error queueing question generation: {str(e)}")
+    
+    return {
+        "message": "AI question generation queued",
+        "status_url": f"/api/aptitude/ai/generate-questions/{job.id}",
+        **generation_jobs.to_dict(job)
+    }
+
+@router.get("/ai/generate-questions/{job_id}")
+async def get_generation_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db_dependency),
+    current_user: User = Depends(get_current_user)
+):
+    """Progress of a generation job: combinations done, accepted, rejected and duplicate questions"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    job = await generation_jobs.get(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Generation job not found")
+    return generation_jobs.to_dict(job)
+
+@router.get("/ai/replenisher")
+async def get_replenisher_metrics():
+    """Background generation queue depth, unseen inventory per category/difficulty, LLM rate budget and health, deck pool hit rates"""
+    return {**question_replenisher.metrics(), "rate_limiter": llm_rate_limiter.stats(),
+            "circuit_breaker": llm_circuit_breaker.stats(),
+            "decks": {"practice": practice_decks.stats(), "mock_test": mock_test_pool.stats()}}
 
 @router.get("/ai/question-stats")
 async def get_ai_question_statistics(db: AsyncSession = Depends(get_db_dependency)):
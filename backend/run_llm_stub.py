@@ -0,0 +1,40 @@
+# backend/run_llm_stub.py
+"""
+Run the stub LLM as a localhost OpenAI-compatible server
+
+    python backend/run_llm_stub.py [port]
+
+then start the backend with GROQ_BASE_URL=http://127.0.0.1:<port> (and any
+GROQ_API_KEY). Behaviour comes from LLM_STUB_LATENCY, LLM_STUB_JITTER,
+LLM_STUB_MALFORMED_RATE, LLM_STUB_RATE_LIMIT_RATE and LLM_STUB_SEED.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from backend.utils.llm_providers import StubProvider
+from backend.utils.llm_stub_server import start_stub_server
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    stub = StubProvider()
+    server, base_url = start_stub_server(stub, port=port)
+    print(f"🧪 Stub LLM listening on {base_url}")
+    print(f"   latency {stub.latency}s ±{stub.jitter:.0%}, malformed {stub.malformed_rate:.0%}, "
+          f"rate limited {stub.rate_limit_rate:.0%}")
+    print(f"   export GROQ_BASE_URL={base_url}")
+    try:
+        while True:
+            time.sleep(60)
+            print(f"📊 {stub.calls} calls, {stub.malformed} malformed, {stub.rate_limited} rate limited")
+    except KeyboardInterrupt:
+        server.shutdown()
+        print("👋 Stub LLM stopped")
+
+
+if __name__ == "__main__":
+    main()
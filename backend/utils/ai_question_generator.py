@@ -1,67 +1,187 @@
 import os
 import json
+import asyncio
 import hashlib
-from typing import List, Dict, Optional
-import requests
+import random
+from typing import AsyncIterator, List, Dict, Optional
 from pathlib import Path
 from dotenv import load_dotenv
-from groq import Groq
+
+from backend.utils.circuit_breaker import AI_LATENCY_BUDGET, CircuitOpenError, llm_circuit_breaker
+from backend.utils.json_stream import JSONArrayStream, extract_json_objects
+from backend.utils.llm_cache import llm_cache
+from backend.utils.llm_providers import get_llm_provider
+from backend.utils.rate_limiter import llm_rate_limiter
 
 load_dotenv()
 
+MAX_COMPLETION_TOKENS = 2000
+# Fixes the "Random seed" line of the prompts, so that re-runs send the same
+# prompts and replay from the LLM cache (utils/llm_cache.py)
+AI_PROMPT_SEED = os.getenv("AI_PROMPT_SEED")
+
+
+# Map the category names to what the AI understands
+DOMAIN_MAPPING = {
+    "Logical Reasoning": "Logical",
+    "Quantitative Aptitude": "Quantitative",
+    "Verbal Ability": "Verbal",
+    "Coding Challenge": "Coding"
+}
+
+QUESTION_SYSTEM_PROMPT = (
+    "You are a JSON-only generator. Your ONLY output should be a valid JSON array. "
+    "Do NOT include any explanation, comments, text, or markdown outside JSON. "
+    "You are an expert aptitude test creator. Generate high-quality aptitude questions with: "
+    "- Clear question text "
+    "- 4 multiple choice options (A, B, C, D) "
+    "- One correct answer (MUST be A, B, C, or D - NOT numbers) "
+    "- Brief explanation "
+    "Format as JSON array."
+)
+
+_prompt_counts: Dict[tuple, int] = {}
+
+
+def _prompt_seed(*prompt_kind) -> int:
+    """
+    The prompt's "Random seed" value. With AI_PROMPT_SEED set, the n-th prompt of
+    a kind (e.g. 10 hard Logical questions) gets the same seed in every run, however
+    the calls for different kinds interleave.
+    """
+    if AI_PROMPT_SEED is None:
+        return random.randint(1, 1000)
+    n = _prompt_counts[prompt_kind] = _prompt_counts.get(prompt_kind, 0) + 1
+    digest = hashlib.sha256(f"{AI_PROMPT_SEED}:{prompt_kind}:{n}".encode()).digest()
+    return int.from_bytes(digest[:4], "big") % 1000 + 1
+
+
 class AIQuestionGenerator:
     def __init__(self):
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        self.model = "llama-3.1-8b-instant"
         self.base_dir = Path(__file__).parent.parent
         self.questions_file = self.base_dir / "models" / "aptitude_questions.json"
-        
-    def generate_questions(self, domain: str, count: int = 5, difficulty: str = "medium") -> List[Dict]:
+    
+    @property
+    def provider(self):
+        """The process-wide LLM provider, created on first use"""
+        return get_llm_provider()
+    
+    @property
+    def model(self) -> str:
+        return self.provider.model
+    
+    def available(self) -> bool:
+        """False while the LLM circuit breaker is open - skip generation and serve existing stock"""
+        return not llm_circuit_breaker.is_open()
+    
+    async def _complete(self, system_prompt: str, prompt: str, timeout: Optional[float] = None) -> str:
+        """
+        One chat completion without blocking the event loop, paced by the
+        process-wide rate limiter and guarded by the circuit breaker (raises
+        CircuitOpenError at once while it is open). The call is abandoned after
+        `timeout` seconds (the latency budget by default, once admitted), and
+        cancelling the awaiting task cancels the HTTP request. With AI_HEDGE=1
+        a call slower than the recent p95 is hedged with a second request.
+        With LLM_CACHE_DIR set, answers are replayed from (and saved to) the
+        on-disk cache without touching the rate limiter.
+        """
+        if llm_cache is not None:
+            cached = await asyncio.to_thread(llm_cache.get, self.model, system_prompt, prompt)
+            if cached is not None:
+                return cached
+        llm_circuit_breaker.check()
+        
+        # ~4 characters per token for the prompt, plus the whole completion budget
+        estimated_tokens = (len(system_prompt) + len(prompt)) // 4 + MAX_COMPLETION_TOKENS
+        async with llm_rate_limiter.slot(estimated_tokens) as usage:
+            async with llm_circuit_breaker.guard():
+                content = await asyncio.wait_for(
+                    self._hedged_complete(system_prompt, prompt, estimated_tokens, usage),
+                    timeout=timeout or AI_LATENCY_BUDGET
+                )
+        if llm_cache is not None:
+            await asyncio.to_thread(llm_cache.put, self.model, system_prompt, prompt, content)
+        return content
+    
+    async def _hedged_complete(self, system_prompt: str, prompt: str, estimated_tokens: int, usage: Dict) -> str:
+        """The provider call; past the hedge delay a second request races it and the first answer wins"""
+        primary = asyncio.ensure_future(self.provider.complete(system_prompt, prompt, MAX_COMPLETION_TOKENS, usage))
+        hedge_after = llm_circuit_breaker.hedge_delay()
+        if hedge_after is None:
+            return await primary
+        
+        async def hedge() -> str:
+            # A real second request: it needs its own rate limiter slot
+            async with llm_rate_limiter.slot(estimated_tokens) as hedge_usage:
+                return await self.provider.complete(system_prompt, prompt, MAX_COMPLETION_TOKENS, hedge_usage)
+        
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_after)
+            if not done:
+                llm_circuit_breaker.hedged += 1
+                pending.add(asyncio.ensure_future(hedge()))
+            error = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def _stream_complete(self, system_prompt: str, prompt: str,
+                               timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        _complete, but yields the completion text as it arrives. `timeout`
+        bounds the whole stream (once admitted). Streams are not hedged.
+        """
+        if llm_cache is not None:
+            cached = await asyncio.to_thread(llm_cache.get, self.model, system_prompt, prompt)
+            if cached is not None:
+                yield cached
+                return
+        llm_circuit_breaker.check()
+        
+        received = []
+        estimated_tokens = (len(system_prompt) + len(prompt)) // 4 + MAX_COMPLETION_TOKENS
+        async with llm_rate_limiter.slot(estimated_tokens) as usage, llm_circuit_breaker.guard():
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + (timeout or AI_LATENCY_BUDGET)
+            chunks = self.provider.stream(system_prompt, prompt, MAX_COMPLETION_TOKENS, usage)
+            try:
+                while True:
+                    try:
+                        text = await asyncio.wait_for(chunks.__anext__(), timeout=max(0, deadline - loop.time()))
+                    except StopAsyncIteration:
+                        break
+                    received.append(text)
+                    yield text
+            finally:
+                await chunks.aclose()
+        # Only a completion that arrived in full is worth replaying
+        if llm_cache is not None:
+            await asyncio.to_thread(llm_cache.put, self.model, system_prompt, prompt, "".join(received))
+        
+    async def generate_questions(self, domain: str, count: int = 5, difficulty: str = "medium",
+                                 timeout: Optional[float] = None) -> List[Dict]:
         """
         Generate aptitude questions for a specific domain using AI
         """
         print(f"🤖 AI Generating {count} {difficulty} questions for {domain}")
         
-        # Map the category names to what the AI understands
-        domain_mapping = {
-            "Logical Reasoning": "Logical",
-            "Quantitative Aptitude": "Quantitative", 
-            "Verbal Ability": "Verbal",
-            "Coding Challenge": "Coding"
-        }
-        
         # Use mapped domain for AI prompt, but store as requested domain
-        ai_domain = domain_mapping.get(domain, domain)
+        ai_domain = DOMAIN_MAPPING.get(domain, domain)
         
         prompt = self._build_prompt(ai_domain, count, difficulty)
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a JSON-only generator. Your ONLY output should be a valid JSON array. "
-                            "Do NOT include any explanation, comments, text, or markdown outside JSON. "
-                            "You are an expert aptitude test creator. Generate high-quality aptitude questions with: "
-                            "- Clear question text "
-                            "- 4 multiple choice options (A, B, C, D) "
-                            "- One correct answer (MUST be A, B, C, or D - NOT numbers) "
-                            "- Brief explanation "
-                            "Format as JSON array."
-                        )
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=2000
-            )
+            content = await self._complete(QUESTION_SYSTEM_PROMPT, prompt, timeout)
             
-            content = response.choices[0].message.content
             print(f"🤖 AI Raw response: {content[:200]}...")
             
             questions = self._parse_ai_response(content)
@@ -74,15 +194,59 @@ class AIQuestionGenerator:
             print(f"🤖 AI Generated {len(formatted_questions)} valid questions")
             return formatted_questions
             
+        except CircuitOpenError as e:
+            print(f"⚡ Skipping AI generation: {e}")
+            return []
         except Exception as e:
-            print(f"❌ AI Generation error: {e}")
+            print(f"❌ AI Generation error: {e!r}")
             # Return fallback questions if AI fails
             return self._get_fallback_questions(domain, count, difficulty)
     
+    async def stream_questions(self, domain: str, count: int = 5, difficulty: str = "medium",
+                               timeout: Optional[float] = None) -> AsyncIterator[Dict]:
+        """
+        Streaming generate_questions: yields each validated question as soon as
+        its array element closes in the completion, while the rest is still
+        being generated. Falls back like generate_questions if nothing came through.
+        """
+        print(f"🤖 AI Streaming {count} {difficulty} questions for {domain}")
+        prompt = self._build_prompt(DOMAIN_MAPPING.get(domain, domain), count, difficulty)
+        parser = JSONArrayStream()
+        produced = 0
+        
+        try:
+            async for text in self._stream_complete(QUESTION_SYSTEM_PROMPT, prompt, timeout):
+                for question in self._questions_from(parser.feed(text), domain, difficulty):
+                    produced += 1
+                    yield question
+            
+            # A response cut off by max_tokens still has its last question
+            for question in self._questions_from(parser.finish(), domain, difficulty):
+                produced += 1
+                yield question
+            if parser.errors:
+                print(f"⚠️ Skipped {parser.errors} malformed questions in the stream")
+            
+        except CircuitOpenError as e:
+            print(f"⚡ Skipping AI streaming: {e}")
+            return
+        except Exception as e:
+            print(f"❌ AI Streaming error: {e!r}")
+            if not produced:
+                for question in self._get_fallback_questions(domain, count, difficulty):
+                    yield question
+            return
+        
+        print(f"🤖 AI Streamed {produced} valid questions")
+    
+    def _questions_from(self, elements: List, domain: str, difficulty: str) -> List[Dict]:
+        """Validated, formatted questions from parsed stream elements"""
+        questions = [element for element in elements if isinstance(element, dict)]
+        return self._format_questions(self._validate_ai_questions(questions), domain, difficulty) if questions else []
+    
     def _build_prompt(self, domain: str, count: int, difficulty: str) -> str:
 
-        import random
-        random_seed = random.randint(1, 1000)
+        random_seed = _prompt_seed("questions", domain, count, difficulty)
         domain_prompts = {
             "Logical": "logical reasoning, pattern recognition, sequences, analogies, deductive reasoning",
             "Quantitative": "mathematical problems, percentages, ratios, algebra, arithmetic, word problems", 
@@ -122,149 +286,11 @@ class AIQuestionGenerator:
         """
     
     def _parse_ai_response(self, content: str) -> List[Dict]:
-        """Parse AI response and extract JSON with robust error handling"""
-        try:
-            # Clean the response more aggressively
-            content = content.strip()
-            
-            # Remove markdown code blocks if present
-            lines = content.split('\n')
-            cleaned_lines = []
-            in_json_block = False
-            
-            for line in lines:
-                line = line.strip()
-                if line.startswith('```json'):
-                    in_json_block = True
-                    continue
-                elif line.startswith('```') and in_json_block:
-                    in_json_block = False
-                    continue
-                elif line.startswith('```'):
-                    continue
-                
-                if in_json_block or line:
-                    cleaned_lines.append(line)
-            
-            cleaned_content = '\n'.join(cleaned_lines)
-            
-            # If still empty, use original content
-            if not cleaned_content:
-                cleaned_content = content
-            
-            # Fix common JSON issues
-            # 1. Look for the actual JSON array (find the first [ and last ])
-            if '[' in cleaned_content and ']' in cleaned_content:
-                start = cleaned_content.find('[')
-                end = cleaned_content.rfind(']') + 1
-                json_str = cleaned_content[start:end]
-                
-                # 2. Fix trailing commas before } or ]
-                import re
-                json_str = re.sub(r',\s*}', '}', json_str)
-                json_str = re.sub(r',\s*]', ']', json_str)
-                
-                # 3. Fix unclosed strings by checking for patterns
-                # Find all strings and ensure they're properly closed
-                lines = json_str.split('\n')
-                fixed_lines = []
-                for line in lines:
-                    # Count quotes in line
-                    quote_count = line.count('"')
-                    if quote_count % 2 == 1:  # Odd number of quotes
-                        # Check if line ends with a comma or is part of a value
-                        if line.strip().endswith(','):
-                            # Add closing quote before comma
-                            line = line.rstrip(',') + '"' + ','
-                        elif ': ' in line and line.count('"') == 1:
-                            # This is a value that's missing closing quote
-                            parts = line.split(': ', 1)
-                            if len(parts) == 2:
-                                key, value = parts
-                                if not value.endswith('"'):
-                                    line = f'{key}: {value}"'
-                    
-                    fixed_lines.append(line)
-                
-                json_str = '\n'.join(fixed_lines)
-                
-                # 4. Try parsing with error recovery
-                try:
-                    return json.loads(json_str)
-                except json.JSONDecodeError as e:
-                    print(f"JSON decode error at position {e.pos}: {e.msg}")
-                    print(f"Context: ...{json_str[max(0, e.pos-50):min(len(json_str), e.pos+50)]}...")
-                    
-                    # Try to fix by adding missing closing braces/brackets
-                    # Count opening vs closing braces/brackets
-                    open_braces = json_str.count('{')
-                    close_braces = json_str.count('}')
-                    open_brackets = json_str.count('[')
-                    close_brackets = json_str.count(']')
-                    
-                    if open_braces > close_braces:
-                        json_str += '}' * (open_braces - close_braces)
-                    if open_brackets > close_brackets:
-                        json_str += ']' * (open_brackets - close_brackets)
-                    
-                    # Try parsing again
-                    try:
-                        return json.loads(json_str)
-                    except:
-                        # Last resort: extract JSON-like objects manually
-                        return self._extract_json_objects(json_str)
-            
-            # If no array found, try to extract objects
-            return self._extract_json_objects(cleaned_content)
-            
-        except Exception as e:
-            print(f"Error parsing AI response: {e}")
-            print(f"First 500 chars of raw content: {content[:500]}")
-            return []
-    
-    def _extract_json_objects(self, text: str) -> List[Dict]:
-        """Extract JSON objects from malformed text"""
-        objects = []
-        lines = text.split('\n')
-        
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            
-            # Look for object start
-            if line.startswith('{'):
-                obj_lines = [line]
-                brace_count = line.count('{') - line.count('}')
-                i += 1
-                
-                # Collect until braces are balanced
-                while i < len(lines) and brace_count > 0:
-                    next_line = lines[i].strip()
-                    obj_lines.append(next_line)
-                    brace_count += next_line.count('{') - next_line.count('}')
-                    i += 1
-                
-                obj_text = '\n'.join(obj_lines)
-                
-                # Try to parse as JSON
-                try:
-                    # Fix common issues in object text
-                    obj_text = obj_text.replace('\n', ' ').replace('\r', ' ')
-                    obj_text = obj_text.replace(', }', ' }').replace(', ]', ' ]')
-                    
-                    # Ensure it ends properly
-                    if not obj_text.endswith('}'):
-                        obj_text += '}'
-                    
-                    obj = json.loads(obj_text)
-                    objects.append(obj)
-                except:
-                    # Skip malformed objects
-                    pass
-            else:
-                i += 1
-        
-        return objects
+        """Parse AI response in one pass, repairing common LLM JSON faults (see utils/json_stream.py)"""
+        items = extract_json_objects(content)
+        if not items:
+            print(f"Error parsing AI response, first 500 chars: {content[:500]}")
+        return [item for item in items if isinstance(item, dict)]
 
     def _format_questions(self, questions: List[Dict], domain: str, difficulty: str) -> List[Dict]:
         """Format questions with additional metadata and validate correct_answer format"""
@@ -430,7 +456,8 @@ class AIQuestionGenerator:
         }
         return limits.get(difficulty, 60)
 
-    def generate_sjt_scenarios(self, category: str, count: int = 3) -> List[Dict]:
+    async def generate_sjt_scenarios(self, category: str, count: int = 3,
+                                     timeout: Optional[float] = None) -> List[Dict]:
         """
         Generate Situational Judgement Test scenarios using AI
         """
@@ -439,33 +466,22 @@ class AIQuestionGenerator:
         prompt = self._build_sjt_prompt(category, count)
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a JSON-only generator. Your ONLY output should be a valid JSON array. "
-                            "You are an expert workplace psychologist creating realistic workplace scenarios. "
-                            "Generate high-quality situational judgement test scenarios with: "
-                            "- Realistic workplace scenario text "
-                            "- 4 multiple choice options for responses "
-                            "- Most effective response (MUST be A, B, C, or D) "
-                            "- Least effective response (MUST be A, B, C, or D - different from most effective) "
-                            "- Clear explanation of why each is effective/ineffective "
-                            "Format as JSON array."
-                        )
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=2000
+            content = await self._complete(
+                (
+                    "You are a JSON-only generator. Your ONLY output should be a valid JSON array. "
+                    "You are an expert workplace psychologist creating realistic workplace scenarios. "
+                    "Generate high-quality situational judgement test scenarios with: "
+                    "- Realistic workplace scenario text "
+                    "- 4 multiple choice options for responses "
+                    "- Most effective response (MUST be A, B, C, or D) "
+                    "- Least effective response (MUST be A, B, C, or D - different from most effective) "
+                    "- Clear explanation of why each is effective/ineffective "
+                    "Format as JSON array."
+                ),
+                prompt,
+                timeout
             )
             
-            content = response.choices[0].message.content
             print(f"🤖 AI SJT Raw response: {content[:200]}...")
             
             scenarios = self._parse_ai_response(content)
@@ -478,8 +494,11 @@ class AIQuestionGenerator:
             print(f"🤖 AI Generated {len(formatted_scenarios)} valid SJT scenarios")
             return formatted_scenarios
             
+        except CircuitOpenError as e:
+            print(f"⚡ Skipping AI SJT generation: {e}")
+            return []
         except Exception as e:
-            print(f"❌ AI SJT Generation error: {e}")
+            print(f"❌ AI SJT Generation error: {e!r}")
             # Return fallback scenarios if AI fails
             return self._get_fallback_sjt_scenarios(category, count)
 
@@ -502,6 +521,7 @@ class AIQuestionGenerator:
         
         return f"""
         Generate {count} situational judgement test scenarios for workplace {category}.
+        Random seed: {_prompt_seed("sjt", category, count)}
         
         Focus on: {category_guide}
         
@@ -644,10 +664,8 @@ class AIQuestionGenerator:
             ]
         }
         
-        # Get scenarios for the category, repeat if needed
+        # Get scenarios for the category (each at most once)
         scenarios = fallback_scenarios.get(category, [])
-        while len(scenarios) < count and scenarios:
-            scenarios.append(scenarios[0])
         
         # Add metadata
         for scenario in scenarios:
@@ -695,12 +713,10 @@ class AIQuestionGenerator:
             ]
         }
         
+        # Each fallback at most once: padding the batch with copies of one
+        # question only hands callers duplicates to reject
         questions = fallback_questions.get(domain, [])
         
-        # Repeat questions if needed to reach count
-        while len(questions) < count and questions:
-            questions.append(questions[0])
-        
         # Format with proper metadata
         formatted_questions = []
         for q in questions[:count]:
@@ -715,4 +731,15 @@ class AIQuestionGenerator:
                 "time_limit": 60
             })
         
-        return formatted_questions
\ No newline at end of file
+        return formatted_questions
+
+
+_generator: Optional[AIQuestionGenerator] = None
+
+
+def get_ai_generator() -> AIQuestionGenerator:
+    """The process-wide generator, shared by the managers and scripts; created on first use"""
+    global _generator
+    if _generator is None:
+        _generator = AIQuestionGenerator()
+    return _generator
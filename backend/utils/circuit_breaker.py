@@ -0,0 +1,144 @@
+# backend/utils/circuit_breaker.py
+"""
+Circuit breaker and latency tracking for LLM calls
+
+After AI_BREAKER_FAILURES consecutive failed calls (errors, 429s, calls over
+the latency budget) the circuit opens: generation is refused at once with
+CircuitOpenError instead of every caller waiting out its own timeout, and the
+replenisher, jobs and refreshes leave the bank's existing stock to serve
+requests. After AI_BREAKER_COOLDOWN seconds one trial call is let through
+(half-open); its success closes the circuit, its failure opens it again.
+
+Successful call latencies are kept in a rolling window; with AI_HEDGE=1 a call
+still running past their p95 gets a second, hedged request and the first
+answer wins.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+AI_BREAKER_FAILURES = int(os.getenv("AI_BREAKER_FAILURES", 5))  # consecutive failures that open the circuit
+AI_BREAKER_COOLDOWN = float(os.getenv("AI_BREAKER_COOLDOWN", 60))  # seconds open before a trial call
+AI_LATENCY_BUDGET = float(os.getenv("AI_LATENCY_BUDGET", 20))  # seconds per LLM call, hedge included
+AI_HEDGE = os.getenv("AI_HEDGE", "0") == "1"
+AI_HEDGE_MIN_SAMPLES = int(os.getenv("AI_HEDGE_MIN_SAMPLES", 20))  # latencies needed before hedging
+
+
+class CircuitOpenError(Exception):
+    """The LLM provider is considered down; the call was not made"""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"LLM circuit open, next trial call in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = AI_BREAKER_FAILURES, cooldown: float = AI_BREAKER_COOLDOWN,
+                 hedge: bool = AI_HEDGE, window: int = 200):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.hedge = hedge
+        self._latencies = deque(maxlen=window)
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+        self.hedged = 0
+
+    # =================== STATE ===================
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "open" if self.retry_in() > 0 or self._trial_in_flight else "half_open"
+
+    def retry_in(self) -> float:
+        """Seconds until the next trial call (0 when closed)"""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self.cooldown - time.monotonic())
+
+    def is_open(self) -> bool:
+        """True while calls would be refused - callers should skip generation"""
+        return self.state == "open"
+
+    # =================== CALLS ===================
+    def check(self):
+        """Raise CircuitOpenError while the circuit is open"""
+        if self.is_open():
+            self.rejected += 1
+            raise CircuitOpenError(max(self.retry_in(), 1.0))
+
+    @asynccontextmanager
+    async def guard(self):
+        """
+        Wrap one provider call: raises CircuitOpenError instead of running it
+        while the circuit is open, and records the outcome. Cancellation is
+        neither a success nor a failure.
+        """
+        self.check()
+        trial = self.state == "half_open"
+        if trial:
+            self._trial_in_flight = True
+        started = time.monotonic()
+        try:
+            yield
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._record_failure()
+            raise
+        else:
+            self._record_success(time.monotonic() - started)
+        finally:
+            if trial:
+                self._trial_in_flight = False
+
+    def _record_success(self, latency: float):
+        self._latencies.append(latency)
+        self._failures = 0
+        if self._opened_at is not None:
+            print("✅ LLM circuit closed")
+        self._opened_at = None
+
+    def _record_failure(self):
+        self._failures += 1
+        if self._opened_at is not None or self._failures >= self.failure_threshold:
+            if self._opened_at is None:
+                self.times_opened += 1
+                print(f"⚡ LLM circuit open after {self._failures} failures, retrying in {self.cooldown:.0f}s")
+            self._opened_at = time.monotonic()
+
+    # =================== LATENCY ===================
+    def p95(self) -> Optional[float]:
+        if not self._latencies:
+            return None
+        latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before a hedged request, or None for no hedging"""
+        if not self.hedge or len(self._latencies) < AI_HEDGE_MIN_SAMPLES:
+            return None
+        return self.p95()
+
+    def stats(self) -> dict:
+        p95 = self.p95()
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "retry_in": round(self.retry_in(), 1),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "hedged": self.hedged,
+            "p95_latency": round(p95, 3) if p95 is not None else None,
+        }
+
+
+# Global instance - guards every LLM call in the process
+llm_circuit_breaker = CircuitBreaker()
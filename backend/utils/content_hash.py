@@ -0,0 +1,62 @@
+# backend/utils/content_hash.py
+"""
+Set-based dedupe of generated questions / SJT scenarios
+
+Every AptitudeQuestion and SJTScenario row carries content_hash (SHA-256 of its
+normalised text, see db_models.content_hash) under a unique index. A batch of
+AI output is checked with one IN query over that index instead of one
+text-column scan per item, and saved with one INSERT ... ON CONFLICT
+(content_hash) DO NOTHING RETURNING statement instead of one row (and, on a
+conflict, one failed batch) at a time.
+"""
+
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+
+from backend.db_models import content_hash
+
+
+async def dedupe_by_content_hash(db: AsyncSession, model, items: List[Dict], text_field: str) -> Tuple[List[Dict], List]:
+    """
+    Split generated items into (new items, rows already in the database).
+    Repeats within the batch are dropped too. New items get their
+    "content_hash" filled in, ready to be passed to the model.
+    """
+    new_items: Dict[str, Dict] = {}
+    for item in items:
+        item_hash = content_hash(item[text_field])
+        if item_hash not in new_items:
+            new_items[item_hash] = {**item, "content_hash": item_hash}
+
+    if not new_items:
+        return [], []
+
+    result = await db.execute(select(model).where(model.content_hash.in_(list(new_items))))
+    existing = result.scalars().all()
+    for row in existing:
+        new_items.pop(row.content_hash, None)
+
+    return list(new_items.values()), existing
+
+
+async def insert_new_rows(db: AsyncSession, model, rows: List[Dict]) -> List:
+    """
+    Insert column dicts in a single statement, skipping rows whose content_hash
+    is already taken (by another worker since the dedupe lookup, or within the
+    batch). Returns the inserted rows - IDs, defaults and deferred columns such
+    as minhash_signature filled in - from the same round trip. Not committed.
+    """
+    if not rows:
+        return []
+    result = await db.scalars(
+        insert(model)
+        .on_conflict_do_nothing(index_elements=[model.content_hash])
+        .returning(model)
+        .options(undefer("*")),  # read after commit, when a lazy load can't run
+        rows
+    )
+    return list(result.all())
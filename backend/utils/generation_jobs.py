@@ -0,0 +1,219 @@
+# backend/utils/generation_jobs.py
+"""
+Admin AI question generation jobs
+
+POST /ai/generate-questions only stores a GenerationJob row and returns its
+ID; a background worker claims queued jobs (FOR UPDATE SKIP LOCKED, so several
+app processes never claim the same one) and runs them one combination at a
+time. Each combination's questions and the job's progress counters are
+committed in the same transaction, so after a restart the job resumes at the
+first combination that was not finished.
+
+A running job whose heartbeat is older than JOB_STALE_AFTER lost its worker
+and is claimed again. While the LLM circuit breaker is open a job pauses
+(keeping its heartbeat) rather than recording empty combinations.
+"""
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import AsyncSessionLocal
+from backend.db_models import GenerationJob
+from backend.utils.circuit_breaker import llm_circuit_breaker
+
+JOB_POLL_INTERVAL = int(os.getenv("GENERATION_JOB_POLL_INTERVAL", 30))  # seconds between queue checks
+JOB_STALE_AFTER = int(os.getenv("GENERATION_JOB_STALE_AFTER", 600))  # seconds without a heartbeat
+FINISHED_STATUSES = ("completed", "failed")
+
+
+class GenerationJobRunner:
+    def __init__(self):
+        self._task = None
+        self._wake: Optional[asyncio.Event] = None
+        self._question_manager = None
+        self.current_job_id: Optional[int] = None
+
+    # =================== LIFECYCLE ===================
+    def start(self, question_manager):
+        """Start the worker (app startup); picks up jobs left queued or running by a previous process"""
+        if self._task is not None:
+            return
+        self._question_manager = question_manager
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        print("🧾 Generation job worker started")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    # =================== JOBS ===================
+    async def enqueue(self, db: AsyncSession, domains: List[str], difficulties: List[str],
+                      questions_per_combination: int, created_by: int = None) -> GenerationJob:
+        job = GenerationJob(
+            created_by=created_by,
+            status="queued",
+            combinations=[[domain, difficulty] for domain in domains for difficulty in difficulties],
+            questions_per_combination=questions_per_combination,
+        )
+        db.add(job)
+        await db.commit()
+        if self._wake is not None:
+            self._wake.set()
+        print(f"🧾 Queued generation job {job.id} ({len(job.combinations)} combinations)")
+        return job
+
+    async def get(self, db: AsyncSession, job_id: int) -> Optional[GenerationJob]:
+        return await db.get(GenerationJob, job_id)
+
+    @staticmethod
+    def to_dict(job: GenerationJob) -> Dict:
+        total = len(job.combinations)
+        current = job.combinations[job.combinations_done] if job.combinations_done < total else None
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "combinations_total": total,
+            "combinations_done": job.combinations_done,
+            "progress": round(job.combinations_done / total * 100, 1) if total else 100.0,
+            "current_combination": None if job.status in FINISHED_STATUSES or current is None
+            else {"domain": current[0], "difficulty": current[1]},
+            "questions_per_combination": job.questions_per_combination,
+            "accepted": job.accepted,
+            "rejected": job.rejected,
+            "duplicates": job.duplicates,
+            "error": job.error,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        }
+
+    # =================== WORKER ===================
+    async def _run(self):
+        while True:
+            try:
+                job_id = await self._claim()
+                if job_id is None:
+                    self._wake.clear()
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), timeout=JOB_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                self.current_job_id = job_id
+                try:
+                    await self._work(job_id)
+                finally:
+                    self.current_job_id = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Generation job worker error: {e}")
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+
+    async def _claim(self) -> Optional[int]:
+        """Oldest queued (or abandoned running) job, marked running by this worker"""
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(GenerationJob)
+                .where(or_(
+                    GenerationJob.status == "queued",
+                    and_(GenerationJob.status == "running",
+                         GenerationJob.heartbeat_at < now - timedelta(seconds=JOB_STALE_AFTER))
+                ))
+                .order_by(GenerationJob.created_at, GenerationJob.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            job = result.scalar_one_or_none()
+            if job is None:
+                return None
+            if job.status == "running":
+                print(f"🧾 Resuming generation job {job.id} at combination {job.combinations_done + 1}")
+            job.status = "running"
+            job.started_at = job.started_at or now
+            job.heartbeat_at = now
+            await session.commit()
+            return job.id
+
+    async def _work(self, job_id: int):
+        async with AsyncSessionLocal() as session:
+            job = await session.get(GenerationJob, job_id)
+            combinations, per_combination = job.combinations, job.questions_per_combination
+            index = job.combinations_done
+
+        generator = self._question_manager.ai_generator
+        try:
+            while index < len(combinations):
+                if not generator.available():
+                    print(f"⏸️ Job {job_id} paused while the LLM is unavailable")
+                    await self._heartbeat(job_id)
+                    await asyncio.sleep(max(1.0, llm_circuit_breaker.retry_in()))
+                    continue
+                domain, difficulty = combinations[index]
+                print(f"🤖 Job {job_id}: generating {per_combination} {difficulty} questions for {domain}")
+                new_questions = await generator.generate_questions(domain, per_combination, difficulty)
+                if not new_questions and not generator.available():
+                    continue  # the circuit opened during the call - retry this combination
+                if not await self._record(job_id, index, per_combination, new_questions):
+                    print(f"⚠️ Job {job_id} was taken over by another worker, stopping")
+                    return
+                index += 1
+        except Exception as e:
+            await self._finish(job_id, "failed", error=str(e))
+            print(f"❌ Generation job {job_id} failed: {e}")
+            return
+
+        await self._finish(job_id, "completed")
+
+    async def _record(self, job_id: int, index: int, requested: int, new_questions: List[Dict]) -> bool:
+        """Save one combination's questions and advance the job in the same commit"""
+        async with AsyncSessionLocal() as session:
+            job = (await session.execute(
+                select(GenerationJob).where(GenerationJob.id == job_id).with_for_update()
+            )).scalar_one()
+            if job.status != "running" or job.combinations_done != index:
+                await session.rollback()
+                return False
+
+            outcome = await self._question_manager.save_generated_questions(session, new_questions, commit=False)
+            job.combinations_done = index + 1
+            job.heartbeat_at = datetime.utcnow()
+            job.accepted += len(outcome["saved"])
+            # Questions the LLM did not return (or that could not be parsed) count as rejected
+            job.rejected += outcome["rejected"] + max(0, requested - len(new_questions))
+            job.duplicates += outcome["duplicates"]
+            await session.commit()
+        self._question_manager.index_saved_questions(outcome["saved"])
+        return True
+
+    async def _heartbeat(self, job_id: int):
+        async with AsyncSessionLocal() as session:
+            job = await session.get(GenerationJob, job_id)
+            job.heartbeat_at = datetime.utcnow()
+            await session.commit()
+
+    async def _finish(self, job_id: int, status: str, error: str = None):
+        async with AsyncSessionLocal() as session:
+            job = await session.get(GenerationJob, job_id)
+            job.status = status
+            job.error = error
+            job.finished_at = datetime.utcnow()
+            await session.commit()
+        print(f"🧾 Generation job {job_id} {status}")
+
+
+# Global instance
+generation_jobs = GenerationJobRunner()
@@ -0,0 +1,332 @@
+# backend/utils/json_stream.py
+"""
+Single-pass tolerant parser for LLM JSON output
+
+JSONArrayStream reads a JSON array of objects once, left to right, and repairs
+the usual LLM faults as it goes instead of re-scanning the text:
+- prose or a ```json fence around the array (skipped), bare objects without
+  the array, and a {"questions": [...]} wrapper (unwrapped)
+- missing or trailing commas, a missing colon, a key with no value
+- strings left open at the end of a line, raw newlines/tabs and invalid
+  escapes inside strings
+- unquoted keys and values, Python True/False/None
+- mismatched or missing closing brackets, and a truncated last object
+  (closed by finish())
+
+It can be fed in chunks (token streams): feed() returns every top-level
+element that closed in the chunk, so a caller can act on the first question
+while the model is still writing the rest. An element that still does not
+parse is counted in `errors` and dropped rather than ending the stream.
+
+A fault usually breaks one element, not the response, so every element is
+first handed to the C decoder (raw_decode) as it starts; only an element that
+fails there, or is not complete in the chunk, goes through the repairing
+character loop.
+"""
+
+import json
+import re
+from typing import Any, List
+
+_TOP_LEVEL = re.compile(r"[\[\]{]")
+_STRING_SPECIAL = re.compile(r'["\\\x00-\x1f]')
+_NON_SPACE = re.compile(r"\S")
+# Inside an element: optional whitespace, then a string without escapes or control
+# characters, a bare word (number, literal, unquoted key/value) or one other character
+_TOKEN = re.compile(r'[ \t\r\n]*(?:(?P<string>"[^"\\\x00-\x1f]*")|(?P<word>[\w.+-]+)|(?P<char>[^ \t\r\n]))')
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+# Well-formed runs inside a faulty element, copied as they are: an object member
+# with a plain value, and a list of plain values, each followed by its separator
+_PLAIN_VALUE = r'(?:"[^"\\\x00-\x1f]*"|' + _NUMBER.pattern + r"|true|false|null)"
+_MEMBER = re.compile(r'[ \t\r\n]*"[^"\\\x00-\x1f]*"[ \t\r\n]*:[ \t\r\n]*' + _PLAIN_VALUE + r"(?=[ \t\r\n]*[,}])")
+_VALUES = re.compile(
+    r"[ \t\r\n]*" + _PLAIN_VALUE + r"(?:[ \t\r\n]*,[ \t\r\n]*" + _PLAIN_VALUE + r")*(?=[ \t\r\n]*[,\]])"
+)
+_LITERALS = {"true": "true", "false": "false", "null": "null", "True": "true", "False": "false", "None": "null"}
+_ESCAPABLE = set('"\\/bfnrtu')
+
+
+def _reject_constant(name: str):
+    raise ValueError(f"not JSON: {name}")  # NaN/Infinity are left to the repairing path
+
+
+_DECODER = json.JSONDecoder(parse_constant=_reject_constant)
+
+
+class JSONArrayStream:
+    def __init__(self):
+        self.started = False  # seen the opening '[' or a bare top-level object
+        self.done = False  # seen the closing ']'
+        self.errors = 0  # elements dropped because they could not be repaired
+        self.repairs = 0  # faults fixed
+        self._in_array = False
+        # [kind, state] per open container of the current element; state is what
+        # comes next: "key", "colon", "value" or "end" (a comma or the closer)
+        self._stack: List[list] = []
+        self._out: List[str] = []  # repaired text of the current element
+        self._in_string = False
+        self._string_role = "value"
+        self._escaped = False
+        self._open_line = False  # raw newline in a string: closed there, or multi-line?
+        self._word: List[str] = []
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume the next piece of text; returns the elements completed by it"""
+        completed = []
+        i, n = 0, len(chunk)
+        while i < n and not self.done:
+            if self._in_string:
+                i = self._scan_string(chunk, i)
+                continue
+
+            if not self._stack:
+                # Between elements only '[', '{' and the array's closing ']' matter
+                found = _TOP_LEVEL.search(chunk, i)
+                if found is None:
+                    break
+                char, i = found.group(), found.end()
+                if char == "{":
+                    self.started = True
+                    try:
+                        element, i = _DECODER.raw_decode(chunk, i - 1)
+                        completed.extend(self._unwrap(element))
+                    except ValueError:
+                        self._open("{")  # faulty or cut off by the chunk: repair it char by char
+                elif char == "[" and not self._in_array:
+                    self.started = self._in_array = True
+                elif char == "]" and self._in_array:
+                    self.done = True
+                continue
+
+            top = self._stack[-1]
+            if not self._word and top[1] == ("key" if top[0] == "{" else "value"):
+                run = (_MEMBER if top[0] == "{" else _VALUES).match(chunk, i)
+                if run is not None:
+                    self._out.append(run.group())
+                    top[1] = "end"
+                    i = run.end()
+                    continue
+
+            # One C-level match per token: skips whitespace, takes a plain string whole
+            token = _TOKEN.match(chunk, i)
+            if token is None:  # only whitespace left in the chunk
+                if self._word:
+                    self._flush_word()
+                break
+            kind = token.lastgroup
+            if self._word and not (kind == "word" and token.start(kind) == i):
+                self._flush_word()
+            i = token.end()
+
+            if kind == "string":
+                role = self._value_start()
+                self._out.append(token.group(kind))
+                self._value_end(role)
+                continue
+            if kind == "word":
+                # A word may continue in the next chunk
+                self._word.append(token.group(kind))
+                if i < n:
+                    self._flush_word()
+                continue
+
+            char = token.group(kind)
+            if char == '"':
+                # Escapes, control characters or the chunk's end before the closing quote
+                self._string_role = self._value_start()
+                self._out.append('"')
+                self._in_string = True
+            elif char in "{[":
+                self._value_start()
+                self._open(char)
+            elif char in "}]":
+                self._close(char)
+                if not self._stack:
+                    completed.extend(self._finish_element())
+            elif char == ",":
+                self._comma()
+            elif char == ":":
+                self._colon()
+            else:
+                self.repairs += 1  # stray character (single quotes, comments...)
+        return completed
+
+    def finish(self) -> List[Any]:
+        """End of input: close whatever a truncated response left open"""
+        if not self._stack:
+            return []
+        self.repairs += 1
+        self._escaped = self._open_line = False
+        if self._in_string:
+            self._close_string()
+        if self._word:
+            self._flush_word()
+        while self._stack:
+            self._close("}" if self._stack[-1][0] == "{" else "]")
+        return self._finish_element()
+
+    # =================== STRINGS ===================
+    def _scan_string(self, chunk: str, i: int) -> int:
+        if self._open_line:
+            visible = _NON_SPACE.search(chunk, i)
+            if visible is None:
+                return len(chunk)
+            i = visible.start()
+            self._open_line = False
+            closing_quote = chunk[i] == '"' and chunk[i + 1:i + 2] in (",", "}", "]", ":", "\n", " ")
+            if chunk[i] in '"}]' and not closing_quote:
+                # The string was never closed: it ended with its line
+                self.repairs += 1
+                self._close_string(strip_comma=True)
+                return i
+            if not closing_quote:
+                self._out.append("\\n")
+
+        if self._escaped:
+            self._escaped = False
+            char = chunk[i]
+            if char in _ESCAPABLE:
+                self._out.append("\\" + char)
+            else:
+                self.repairs += 1
+                self._out.append("'" if char == "'" else "\\\\" + json.dumps(char)[1:-1])
+            return i + 1
+
+        special = _STRING_SPECIAL.search(chunk, i)
+        if special is None:
+            self._out.append(chunk[i:])
+            return len(chunk)
+        j = special.start()
+        if j > i:
+            self._out.append(chunk[i:j])
+        char = chunk[j]
+        if char == '"':
+            self._close_string()
+        elif char == "\\":
+            self._escaped = True
+        elif char == "\n":
+            self._open_line = True
+        elif char != "\r":
+            self._out.append(json.dumps(char)[1:-1])  # raw control character
+        return j + 1
+
+    def _close_string(self, strip_comma: bool = False):
+        if strip_comma and self._out[-1] != '"':
+            self._out[-1] = self._out[-1].rstrip().rstrip(",")
+        self._out.append('"')
+        self._in_string = False
+        self._value_end(self._string_role)
+
+    # =================== STRUCTURE ===================
+    def _open(self, kind: str):
+        self._out.append(kind)
+        self._stack.append([kind, "key" if kind == "{" else "value"])
+
+    def _value_start(self) -> str:
+        """Something starts in the current container: insert a missing ',' or ':'; returns its role"""
+        top = self._stack[-1]
+        kind, state = top
+        if state == "end":
+            self.repairs += 1
+            self._out.append(",")
+            state = "key" if kind == "{" else "value"
+        elif state == "colon":
+            self.repairs += 1
+            self._out.append(":")
+            state = "value"
+        top[1] = state
+        return "key" if kind == "{" and state == "key" else "value"
+
+    def _value_end(self, role: str):
+        if self._stack:
+            self._stack[-1][1] = "colon" if role == "key" else "end"
+
+    def _close(self, char: str):
+        want = "{" if char == "}" else "["
+        if all(kind != want for kind, _ in self._stack):
+            want = self._stack[-1][0]  # stray closer: take it as the innermost one's
+        while True:
+            kind, state = self._stack.pop()
+            if self._out[-1] == ",":
+                self.repairs += 1
+                self._out.pop()  # trailing comma
+            if state == "colon":
+                self._out.append(":null")
+            elif state == "value" and kind == "{":
+                self._out.append("null")
+            self._out.append("}" if kind == "{" else "]")
+            self._value_end("value")
+            if kind == want:
+                break
+            self.repairs += 1  # closed on the way out
+
+    def _comma(self):
+        top = self._stack[-1]
+        kind, state = top
+        if state == "end":
+            self._out.append(",")
+        elif kind == "{" and state in ("colon", "value"):
+            self.repairs += 1
+            self._out.append(":null," if state == "colon" else "null,")
+        else:
+            self.repairs += 1  # leading or doubled comma
+            return
+        top[1] = "key" if kind == "{" else "value"
+
+    def _colon(self):
+        top = self._stack[-1]
+        if top[0] == "{" and top[1] == "colon":
+            self._out.append(":")
+            top[1] = "value"
+        else:
+            self.repairs += 1
+
+    def _flush_word(self):
+        word = "".join(self._word)
+        self._word.clear()
+        role = self._value_start()
+        if role == "value" and word in _LITERALS:
+            self._out.append(_LITERALS[word])
+        elif role == "value" and _NUMBER.fullmatch(word):
+            self._out.append(word)
+        else:
+            self.repairs += 1  # unquoted key or value
+            self._out.append(json.dumps(word))
+        self._value_end(role)
+
+    def _finish_element(self) -> List[Any]:
+        text = "".join(self._out)
+        self._out.clear()
+        try:
+            element = json.loads(text)
+        except json.JSONDecodeError:
+            self.errors += 1
+            return []
+        return self._unwrap(element)
+
+    @staticmethod
+    def _unwrap(element: Any) -> List[Any]:
+        # {"questions": [...]} around the array that was asked for
+        if isinstance(element, dict) and len(element) == 1:
+            (inner,) = element.values()
+            if isinstance(inner, list) and inner and all(isinstance(item, dict) for item in inner):
+                return inner
+        return [element]
+
+
+def extract_json_objects(text: str) -> List[Any]:
+    """
+    Every element of the JSON array (or the bare objects) in a complete response.
+    Well-formed output - the common case - costs one json.loads of the array;
+    anything else gets the repairing parser.
+    """
+    start, end = text.find("["), text.rfind("]")
+    if 0 <= start < end:
+        try:
+            items = json.loads(text[start:end + 1])
+            if isinstance(items, list) and all(isinstance(item, dict) for item in items):
+                return items
+        except json.JSONDecodeError:
+            pass
+    parser = JSONArrayStream()
+    return parser.feed(text) + parser.finish()
@@ -0,0 +1,93 @@
+# backend/utils/llm_cache.py
+"""
+On-disk cache of raw LLM completions, for replaying generation offline
+
+Each completion is stored as <LLM_CACHE_DIR>/<key[:2]>/<key>.txt, where key
+is the SHA-256 of (model, system prompt, user prompt) - so a cached answer is
+only ever replayed for exactly the request that produced it. Reads bump the
+file's mtime and, once the directory grows past LLM_CACHE_MAX_MB, the least
+recently used files are deleted until it is back under 90% of that.
+
+Off unless LLM_CACHE_DIR is set. Prompts carry a random seed, so replays
+only hit when AI_PROMPT_SEED fixes it too (see ai_question_generator.py):
+
+    LLM_CACHE_DIR=.llm_cache AI_PROMPT_SEED=1 python backend/reset_flexyourbrain.py
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "")
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", 256))
+
+
+class LLMResponseCache:
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._bytes: Optional[int] = None  # directory size, scanned on first write
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(model: str, system_prompt: str, prompt: str) -> str:
+        return hashlib.sha256("\0".join((model, system_prompt, prompt)).encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.txt"
+
+    def get(self, model: str, system_prompt: str, prompt: str) -> Optional[str]:
+        path = self._path(self.key(model, system_prompt, prompt))
+        try:
+            content = path.read_text(encoding="utf-8")
+            os.utime(path)  # recently used
+        except FileNotFoundError:  # never cached, or evicted meanwhile
+            self.misses += 1
+            return None
+        self.hits += 1
+        return content
+
+    def put(self, model: str, system_prompt: str, prompt: str, content: str):
+        path = self._path(self.key(model, system_prompt, prompt))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = content.encode("utf-8")
+        # Write-then-rename: a concurrent reader never sees half a completion
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+        if self._bytes is None:
+            self._bytes = self.size()
+        else:
+            self._bytes += len(data)
+        if self._bytes > self.max_bytes:
+            self._evict()
+
+    def size(self) -> int:
+        return sum(path.stat().st_size for path in self.directory.glob("*/*.txt"))
+
+    def _evict(self):
+        entries = []
+        for path in self.directory.glob("*/*.txt"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.evictions += 1
+        self._bytes = total
+
+
+# Global instance (None when caching is off)
+llm_cache = LLMResponseCache(LLM_CACHE_DIR, int(LLM_CACHE_MAX_MB * 2**20)) if LLM_CACHE_DIR else None
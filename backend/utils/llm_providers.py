@@ -0,0 +1,294 @@
+# backend/utils/llm_providers.py
+"""
+LLM providers for question/scenario generation
+
+AIQuestionGenerator talks to an LLMProvider instead of a Groq client, so the
+whole generation path (rate limiter, parsers, replenisher, jobs) can run
+without the network:
+
+    LLM_PROVIDER=groq   Groq chat completions (default); GROQ_BASE_URL points
+                        it at any OpenAI-compatible endpoint, e.g. the stub
+                        server in utils/llm_stub_server.py
+    LLM_PROVIDER=stub   in-process StubProvider
+
+The stub writes plausible question/SJT batches (every question distinct) and
+can be told to be slow (LLM_STUB_LATENCY, LLM_STUB_JITTER), to return
+malformed JSON (LLM_STUB_MALFORMED_RATE) and to answer with rate-limit errors
+(LLM_STUB_RATE_LIMIT_RATE).
+
+groq and httpx are only imported when the Groq provider makes its first call:
+they are most of this module's import cost, which every cold start pays.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq")
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.1-8b-instant")
+AI_REQUEST_TIMEOUT = float(os.getenv("AI_REQUEST_TIMEOUT", 30))  # seconds per LLM call, retries included
+AI_MAX_CONNECTIONS = int(os.getenv("AI_MAX_CONNECTIONS", 10))
+
+
+class LLMRateLimited(Exception):
+    """The provider refused the call for exceeding its rate limit"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMProvider:
+    """
+    One chat completion per call. `usage` is the rate limiter's slot dict:
+    providers set usage["tokens_used"] once the real token count is known.
+    """
+    name = "base"
+
+    def __init__(self, model: str = LLM_MODEL):
+        self.model = model
+
+    async def complete(self, system_prompt: str, prompt: str, max_tokens: int, usage: Dict) -> str:
+        raise NotImplementedError
+
+    def stream(self, system_prompt: str, prompt: str, max_tokens: int, usage: Dict) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+# =================== GROQ ===================
+class GroqProvider(LLMProvider):
+    name = "groq"
+
+    def __init__(self, model: str = LLM_MODEL):
+        super().__init__(model)
+        # One AsyncGroq client (and pooled HTTP connections) per event loop -
+        # scripts that call asyncio.run() more than once get a fresh one
+        self._clients: Dict[asyncio.AbstractEventLoop, "AsyncGroq"] = {}
+
+    def client(self) -> "AsyncGroq":
+        import httpx
+        from groq import AsyncGroq
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            for stale_loop in [l for l in self._clients if l.is_closed()]:
+                del self._clients[stale_loop]
+            client = self._clients[loop] = AsyncGroq(
+                api_key=os.getenv("GROQ_API_KEY"),
+                timeout=AI_REQUEST_TIMEOUT,
+                max_retries=1,
+                http_client=httpx.AsyncClient(
+                    timeout=AI_REQUEST_TIMEOUT,
+                    limits=httpx.Limits(max_connections=AI_MAX_CONNECTIONS, max_keepalive_connections=AI_MAX_CONNECTIONS),
+                ),
+            )
+        return client
+
+    def _request(self, system_prompt: str, prompt: str, max_tokens: int) -> Dict:
+        return dict(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=max_tokens
+        )
+
+    async def complete(self, system_prompt: str, prompt: str, max_tokens: int, usage: Dict) -> str:
+        from groq import RateLimitError
+
+        try:
+            response = await self.client().chat.completions.create(**self._request(system_prompt, prompt, max_tokens))
+        except RateLimitError as e:
+            raise LLMRateLimited(str(e), _retry_after(e.response)) from e
+        if response.usage is not None:
+            usage["tokens_used"] = response.usage.total_tokens
+        return response.choices[0].message.content
+
+    async def stream(self, system_prompt: str, prompt: str, max_tokens: int, usage: Dict) -> AsyncIterator[str]:
+        from groq import RateLimitError
+
+        try:
+            stream = await self.client().chat.completions.create(
+                **self._request(system_prompt, prompt, max_tokens), stream=True
+            )
+        except RateLimitError as e:
+            raise LLMRateLimited(str(e), _retry_after(e.response)) from e
+        try:
+            async for chunk in stream:
+                # Groq reports usage on the last chunk
+                chunk_usage = chunk.usage or (chunk.x_groq.usage if chunk.x_groq else None)
+                if chunk_usage is not None:
+                    usage["tokens_used"] = chunk_usage.total_tokens
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+
+    async def close(self):
+        """Close the current loop's client (app shutdown)"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+
+def _retry_after(response) -> Optional[float]:
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# =================== STUB ===================
+_SJT_ACTIONS = [
+    ("Raise it privately with the people involved and agree next steps", "effective"),
+    ("Escalate to senior management before talking to anyone", "ineffective"),
+    ("Ask the team for input and summarise the options in writing", "effective"),
+    ("Ignore it and wait to see whether it resolves itself", "least"),
+]
+
+
+class StubProvider(LLMProvider):
+    """
+    Local stand-in for the LLM. Batches have the size the prompt asks for
+    ("Generate N ..."); SJT prompts get scenarios, everything else questions.
+    """
+    name = "stub"
+
+    def __init__(self, latency: float = None, jitter: float = None, malformed_rate: float = None,
+                 rate_limit_rate: float = None, seed: int = None, model: str = "stub"):
+        super().__init__(model)
+        self.latency = float(os.getenv("LLM_STUB_LATENCY", 0.5)) if latency is None else latency
+        self.jitter = float(os.getenv("LLM_STUB_JITTER", 0)) if jitter is None else jitter
+        self.malformed_rate = float(os.getenv("LLM_STUB_MALFORMED_RATE", 0)) if malformed_rate is None else malformed_rate
+        self.rate_limit_rate = float(os.getenv("LLM_STUB_RATE_LIMIT_RATE", 0)) if rate_limit_rate is None else rate_limit_rate
+        if seed is None and os.getenv("LLM_STUB_SEED"):
+            seed = int(os.getenv("LLM_STUB_SEED"))
+        self._random = random.Random(seed)
+        self._serial = itertools.count(1)
+        self.calls = 0
+        self.rate_limited = 0
+        self.malformed = 0
+
+    # ---- shared with the HTTP stub server ----
+    def respond(self, prompt: str) -> Tuple[float, Optional[str]]:
+        """(seconds to take, completion text) - text is None for a rate-limit error"""
+        self.calls += 1
+        delay = max(0.0, self.latency * (1 + self._random.uniform(-self.jitter, self.jitter)))
+        if self._random.random() < self.rate_limit_rate:
+            self.rate_limited += 1
+            return min(delay, 0.05), None
+        match = re.search(r"Generate (\d+)", prompt)
+        count = int(match.group(1)) if match else 5
+        items = self._scenarios(count) if "situational judgement" in prompt.lower() else self._questions(count)
+        content = json.dumps(items, indent=2)
+        if self._random.random() < self.malformed_rate:
+            self.malformed += 1
+            content = self._corrupt(content)
+        return delay, content
+
+    def _questions(self, count: int) -> List[Dict]:
+        questions = []
+        for _ in range(count):
+            n = next(self._serial)
+            a, b = self._random.randint(2, 99), self._random.randint(2, 99)
+            answer = self._random.randrange(4)
+            options = [str(a + b + offset - answer) for offset in range(4)]
+            questions.append({
+                "question_text": f"Stub question {n}: what is {a} + {b}?",
+                "options": options,
+                "correct_answer": "ABCD"[answer],
+                "explanation": f"{a} + {b} = {a + b}."
+            })
+        return questions
+
+    def _scenarios(self, count: int) -> List[Dict]:
+        scenarios = []
+        for _ in range(count):
+            n = next(self._serial)
+            actions = self._random.sample(_SJT_ACTIONS, 4)
+            scenarios.append({
+                "scenario_text": f"Stub scenario {n}: a colleague's work keeps blocking your deliverable. What do you do?",
+                "options": [f"Option {'ABCD'[i]}: {text}" for i, (text, _) in enumerate(actions)],
+                "most_effective": "ABCD"[[kind for _, kind in actions].index("effective")],
+                "least_effective": "ABCD"[[kind for _, kind in actions].index("least")],
+                "explanation": "Addressing it directly works best; ignoring it helps nobody."
+            })
+        return scenarios
+
+    def _corrupt(self, content: str) -> str:
+        """One of the faults LLMs actually make"""
+        fault = self._random.choice(["fence", "trailing_comma", "missing_comma", "unclosed_string", "truncated", "prose"])
+        if fault == "fence":
+            return f"```json\n{content}\n```"
+        if fault == "trailing_comma":
+            return content.replace('"\n  }', '",\n  }')
+        if fault == "missing_comma":
+            return content.replace("},\n  {", "}\n  {")
+        if fault == "unclosed_string":
+            return content.replace('?",\n', '?,\n', 1)
+        if fault == "truncated":
+            return content[:int(len(content) * 0.8)]
+        return f"Sure! Here are the items you asked for:\n{content}\nLet me know if you need more."
+
+    # ---- LLMProvider ----
+    async def complete(self, system_prompt: str, prompt: str, max_tokens: int, usage: Dict) -> str:
+        delay, content = self.respond(prompt)
+        await asyncio.sleep(delay)
+        if content is None:
+            raise LLMRateLimited("stub rate limit", retry_after=1.0)
+        usage["tokens_used"] = (len(system_prompt) + len(prompt) + len(content)) // 4
+        return content
+
+    async def stream(self, system_prompt: str, prompt: str, max_tokens: int, usage: Dict) -> AsyncIterator[str]:
+        delay, content = self.respond(prompt)
+        if content is None:
+            await asyncio.sleep(delay)
+            raise LLMRateLimited("stub rate limit", retry_after=1.0)
+        pieces = [content[i:i + 16] for i in range(0, len(content), 16)]
+        for piece in pieces:
+            await asyncio.sleep(delay / len(pieces))
+            yield piece
+        usage["tokens_used"] = (len(system_prompt) + len(prompt) + len(content)) // 4
+
+
+def create_llm_provider(name: str = None) -> LLMProvider:
+    name = name or LLM_PROVIDER
+    if name == "stub":
+        return StubProvider()
+    if name == "groq":
+        return GroqProvider()
+    raise ValueError(f"Unknown LLM_PROVIDER: {name}")
+
+
+_provider: Optional[LLMProvider] = None
+
+
+def get_llm_provider() -> LLMProvider:
+    """The process-wide provider chosen by LLM_PROVIDER"""
+    global _provider
+    if _provider is None:
+        _provider = create_llm_provider()
+        print(f"🔌 LLM provider: {_provider.name} ({_provider.model})")
+    return _provider
+
+
+def set_llm_provider(provider: Optional[LLMProvider]):
+    """Swap the process-wide provider (benchmarks, scripts); None goes back to LLM_PROVIDER"""
+    global _provider
+    _provider = provider
+
+
+async def close_llm_provider():
+    """Release the provider's connections (app shutdown)"""
+    if _provider is not None:
+        await _provider.close()
@@ -0,0 +1,91 @@
+# backend/utils/llm_stub_server.py
+"""
+Localhost OpenAI-compatible chat completions endpoint backed by StubProvider
+
+Lets the real Groq client (HTTP, retries, streaming) be exercised without the
+network: point GROQ_BASE_URL at the returned URL. Latency, malformed output
+and 429s come from the StubProvider settings (LLM_STUB_* env vars). Run it
+standalone with backend/run_llm_stub.py.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+from backend.utils.llm_providers import StubProvider
+
+
+def _completion(content: str, usage: dict) -> bytes:
+    return json.dumps({
+        "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": "stub",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": usage,
+    }).encode()
+
+
+def _chunk(delta: dict, finish_reason=None, **extra) -> bytes:
+    event = {"id": "stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": "stub",
+             "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}], **extra}
+    return f"data: {json.dumps(event)}\n\n".encode()
+
+
+def start_stub_server(provider: StubProvider = None, host: str = "127.0.0.1", port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve in a background thread; returns (server, base_url). Stop with server.shutdown()"""
+    provider = provider or StubProvider()
+    lock = threading.Lock()  # StubProvider's random state is not thread-safe
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            prompt = "\n".join(message.get("content", "") for message in request.get("messages", []))
+            with lock:
+                delay, content = provider.respond(prompt)
+            usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content or "") // 4,
+                     "total_tokens": (len(prompt) + len(content or "")) // 4}
+            try:
+                if content is None:
+                    time.sleep(delay)
+                    self._send(429, json.dumps({"error": {"message": "Rate limit reached (stub)",
+                                                          "type": "rate_limit_exceeded"}}).encode(),
+                               {"retry-after": "1"})
+                elif request.get("stream"):
+                    self._stream(content, delay, usage)
+                else:
+                    time.sleep(delay)
+                    self._send(200, _completion(content, usage))
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client gave up (timeout / cancellation)
+
+        def _send(self, status: int, body: bytes, headers: dict = None):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream(self, content: str, delay: float, usage: dict):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            events = [_chunk({"role": "assistant", "content": content[i:i + 16]}) for i in range(0, len(content), 16)]
+            events += [_chunk({}, "stop", usage=usage), b"data: [DONE]\n\n"]
+            for event in events:
+                time.sleep(delay / len(events))
+                self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
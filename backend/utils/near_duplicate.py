@@ -0,0 +1,264 @@
+# backend/utils/near_duplicate.py
+"""
+Near-duplicate detection for question_text (MinHash + LSH banding)
+
+content_hash only catches exact copies. Here every question gets a MinHash
+signature over character 5-gram shingles of its normalised text; two texts
+agree on each signature slot with probability equal to their Jaccard
+similarity. Signatures are split into LSH_BANDS bands of LSH_ROWS slots and
+questions sharing any band are candidates, so a lookup touches only the
+matching buckets instead of the whole bank. Candidates are then confirmed
+against NEAR_DUPLICATE_THRESHOLD on the estimated similarity.
+
+The signature carries one extra slot: a CRC32 of the numbers in the text.
+Reworded copies keep their numbers, templated variants ("15% of 200" vs
+"25% of 200") do not, and those are different questions.
+
+Signatures are stored in aptitude_questions.minhash_signature. The in-process
+index is loaded at startup and kept in sync incrementally like the question
+bank index; find_near_duplicates.py clusters the whole bank in one pass.
+"""
+
+import asyncio
+import os
+import random
+import re
+import time
+import zlib
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, case, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import AsyncSessionLocal
+from backend.db_models import AptitudeQuestion
+
+NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS  # bands x rows = 16 x 4: candidates from ~0.5 similarity up
+SHINGLE_SIZE = 5
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", 0.7))
+
+SYNC_INTERVAL = 30  # seconds between incremental syncs
+RELOAD_INTERVAL = 600  # seconds between full reloads (picks up deletions)
+LOAD_BATCH_SIZE = 10_000
+
+# Fixed seed: persisted signatures must stay comparable across processes and restarts
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+Signature = array  # array('I') of NUM_PERM MinHash values + 1 numbers CRC
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", (text or "").lower()))
+
+
+def minhash_signature(text: str) -> Signature:
+    """MinHash signature of text (plus the CRC32 of its numbers)"""
+    normalized = _normalize(text)
+    if len(normalized) <= SHINGLE_SIZE:
+        shingles = {zlib.crc32(normalized.encode())}
+    else:
+        shingles = {
+            zlib.crc32(normalized[i:i + SHINGLE_SIZE].encode())
+            for i in range(len(normalized) - SHINGLE_SIZE + 1)
+        }
+
+    signature = array("I", (
+        min((a * x + b) % _MERSENNE_PRIME for x in shingles) & 0xFFFFFFFF
+        for a, b in _PERMUTATIONS
+    ))
+    signature.append(zlib.crc32(" ".join(re.findall(r"\d+(?:\.\d+)?", normalized)).encode()))
+    return signature
+
+
+def signature_from_bytes(data: bytes) -> Signature:
+    signature = array("I")
+    signature.frombytes(data)
+    return signature
+
+
+def similarity(a: Signature, b: Signature) -> float:
+    """Estimated Jaccard similarity; 0 when the numbers in the two texts differ"""
+    if a[NUM_PERM] != b[NUM_PERM]:
+        return 0.0
+    return sum(1 for i in range(NUM_PERM) if a[i] == b[i]) / NUM_PERM
+
+
+def band_keys(signature: Signature) -> List[Tuple]:
+    return [
+        (band, signature[NUM_PERM], *signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])
+        for band in range(LSH_BANDS)
+    ]
+
+
+class NearDuplicateIndex:
+    def __init__(self):
+        self._signatures: Dict[int, Signature] = {}
+        self._buckets: Dict[Tuple, List[int]] = {}
+        self._max_synced_id = 0
+        self._last_sync = 0.0
+        self._last_reload = 0.0
+        self._lock = asyncio.Lock()
+        self._reload_task = None
+        self.loaded = False
+
+    # =================== IN-MEMORY INDEX ===================
+    def add(self, question_id: int, signature: Signature):
+        if question_id in self._signatures:
+            return
+        self._signatures[question_id] = signature
+        for key in band_keys(signature):
+            self._buckets.setdefault(key, []).append(question_id)
+
+    def add_questions(self, questions: Iterable):
+        """Register freshly inserted AptitudeQuestion rows"""
+        if not self.loaded:
+            return
+        for question in questions:
+            if question.id is not None and question.minhash_signature:
+                self.add(question.id, signature_from_bytes(question.minhash_signature))
+
+    def find(self, signature: Signature) -> Optional[Tuple[int, float]]:
+        """Most similar indexed question at or above the threshold, as (id, similarity)"""
+        best = None
+        seen = set()
+        for key in band_keys(signature):
+            for candidate_id in self._buckets.get(key, ()):
+                if candidate_id in seen:
+                    continue
+                seen.add(candidate_id)
+                score = similarity(signature, self._signatures[candidate_id])
+                if score >= NEAR_DUPLICATE_THRESHOLD and (best is None or score > best[1]):
+                    best = (candidate_id, score)
+        return best
+
+    def candidate_pairs(self) -> Iterable[Tuple[int, int]]:
+        """Pairs of IDs sharing at least one band bucket (may repeat)"""
+        for ids in self._buckets.values():
+            for i in range(len(ids)):
+                for j in range(i + 1, len(ids)):
+                    yield ids[i], ids[j]
+
+    def signature(self, question_id: int) -> Signature:
+        return self._signatures[question_id]
+
+    def __len__(self):
+        return len(self._signatures)
+
+    # =================== DATABASE SYNC ===================
+    async def load(self, db: AsyncSession):
+        """Build the index from scratch"""
+        async with self._lock:
+            fresh = NearDuplicateIndex()
+            fresh._max_synced_id = await fresh._load_rows(db, after_id=0)
+            self._signatures, self._buckets = fresh._signatures, fresh._buckets
+            self._max_synced_id = fresh._max_synced_id
+            self._last_sync = self._last_reload = time.monotonic()
+            self.loaded = True
+
+        print(f"🧬 Near-duplicate index loaded: {len(self)} question signatures")
+
+    async def refresh_if_stale(self, db: AsyncSession):
+        """Incremental sync every SYNC_INTERVAL, full reload every RELOAD_INTERVAL"""
+        if not self.loaded:
+            return
+        now = time.monotonic()
+        if now - self._last_reload > RELOAD_INTERVAL and self._reload_task is None:
+            self._reload_task = asyncio.create_task(self._background_reload())
+
+        if now - self._last_sync < SYNC_INTERVAL or self._lock.locked():
+            return
+
+        async with self._lock:
+            self._max_synced_id = max(self._max_synced_id, await self._load_rows(db, after_id=self._max_synced_id))
+            self._last_sync = time.monotonic()
+
+    async def _background_reload(self):
+        try:
+            async with AsyncSessionLocal() as session:
+                await self.load(session)
+        except Exception as e:
+            print(f"⚠️ Near-duplicate index reload failed: {e}")
+        finally:
+            self._last_reload = time.monotonic()
+            self._reload_task = None
+
+    async def _load_rows(self, db: AsyncSession, after_id: int) -> int:
+        """
+        Add rows with id > after_id. Rows without a stored signature (saved before
+        signatures existed and not yet migrated) are hashed off the event loop and
+        the signatures written back, so this happens once per row, not per reload.
+        """
+        max_id = after_id
+        result = await db.stream(
+            select(
+                AptitudeQuestion.id,
+                AptitudeQuestion.minhash_signature,
+                # Only ship the text when there is no signature to use instead
+                case((AptitudeQuestion.minhash_signature.is_(None), AptitudeQuestion.question_text)),
+            )
+            .where(AptitudeQuestion.id > after_id)
+            .order_by(AptitudeQuestion.id)
+        )
+        async for partition in result.partitions(LOAD_BATCH_SIZE):
+            missing = []
+            for question_id, stored, question_text in partition:
+                if stored:
+                    self.add(question_id, signature_from_bytes(stored))
+                else:
+                    missing.append((question_id, question_text))
+                max_id = question_id
+            if missing:
+                signatures = await asyncio.to_thread(lambda: [minhash_signature(text) for _, text in missing])
+                for (question_id, _), signature in zip(missing, signatures):
+                    self.add(question_id, signature)
+                await _store_signatures([question_id for question_id, _ in missing], signatures)
+        return max_id
+
+
+async def _store_signatures(question_ids: List[int], signatures: List[Signature]):
+    """Persist signatures computed at load time (own session: the caller's may be a request's)"""
+    try:
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(AptitudeQuestion.__table__)
+                .where(AptitudeQuestion.__table__.c.id == bindparam("question_id"))
+                .where(AptitudeQuestion.__table__.c.minhash_signature.is_(None))
+                .values(minhash_signature=bindparam("signature")),
+                [{"question_id": question_id, "signature": signature.tobytes()}
+                 for question_id, signature in zip(question_ids, signatures)]
+            )
+            await session.commit()
+        print(f"🧬 Stored {len(question_ids)} missing question signatures")
+    except Exception as e:
+        print(f"⚠️ Could not store question signatures: {e}")
+
+
+async def filter_near_duplicates(db: AsyncSession, items: List[Dict], text_field: str = "question_text") -> List[Dict]:
+    """
+    Drop items that nearly duplicate a question in the bank or an earlier item
+    of the same batch. Kept items get "minhash_signature" (bytes) attached.
+    """
+    await near_duplicate_index.refresh_if_stale(db)
+
+    batch = NearDuplicateIndex()
+    kept = []
+    for item in items:
+        signature = minhash_signature(item[text_field])
+        match = near_duplicate_index.find(signature) if near_duplicate_index.loaded else None
+        if match is None:
+            match = batch.find(signature)
+        if match is not None:
+            print(f"⚠️ Skipping near-duplicate question (~{match[1]:.0%} similar): {item[text_field][:50]}...")
+            continue
+        batch.add(len(kept), signature)
+        kept.append({**item, "minhash_signature": signature.tobytes()})
+    return kept
+
+
+# Global instance
+near_duplicate_index = NearDuplicateIndex()
@@ -0,0 +1,349 @@
+# backend/utils/question_bank_index.py
+"""
+In-process index of question IDs per (category, difficulty)
+
+IDs are kept in compact array('i') buckets (4 bytes per question, so a
+1M-question bank costs about 4 MB per worker instead of ~36 MB for a list of
+Python ints). The sampler picks IDs from the buckets in O(k) and then fetches
+only the chosen rows by primary key, so no request has to SELECT over the bank.
+
+The index is loaded at startup, updated directly by the code paths that insert
+questions, and incrementally re-synced (id > last seen id) so rows committed by
+other workers or scripts show up too. A periodic full reload drops deleted rows.
+
+Draws are weighted by exposure: weight = freshness / (1 + times answered), with
+fresh (recently created) questions counting FRESH_BOOST times extra. Each
+bucket has a Vose alias table (O(n) to build, O(1) per draw). Strata whose
+exposure counts or stock changed are rebuilt by a background task in a worker
+thread, and the finished table replaces the old one in a single assignment, so
+sample() never builds a table and never sees a half-built one.
+"""
+
+import asyncio
+import os
+import random
+import time
+from array import array
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import AsyncSessionLocal
+from backend.db_models import AptitudeQuestion
+from backend.utils.question_cache import question_json_cache
+from backend.utils.question_exposure import question_exposure
+
+SYNC_INTERVAL = 30  # seconds between incremental syncs
+RELOAD_INTERVAL = 600  # seconds between full reloads
+LOAD_BATCH_SIZE = 10_000
+EXCLUDE_SAMPLE_ROUNDS = 3  # rejection-sampling rounds before scanning the bucket
+ALIAS_REBUILD_INTERVAL = 5  # minimum seconds between alias table rebuild rounds
+FRESH_BOOST = float(os.getenv("QUESTION_FRESH_BOOST", 1.0))  # extra weight for fresh questions
+WEIGHTED_DRAWS_PER_ITEM = 4  # weighted draws per requested ID before falling back to uniform
+
+
+class AliasTable:
+    """Vose alias table over the first `size` IDs of a bucket"""
+    __slots__ = ("bucket", "size", "prob", "alias", "total_weight", "unexposed", "built_at")
+
+    def __init__(self, bucket: array, weights: List[float], unexposed: int = 0):
+        size = len(weights)
+        total = sum(weights)
+        scaled = [w * size / total for w in weights]
+        prob = array("d", bytes(8 * size))
+        alias = array("i", bytes(4 * size))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            prob[less], alias[less] = scaled[less], more
+            scaled[more] += scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        for i in large + small:  # what is left is 1.0 up to rounding
+            prob[i] = 1.0
+
+        self.bucket, self.size, self.prob, self.alias = bucket, size, prob, alias
+        self.total_weight = total
+        self.unexposed = unexposed  # IDs nobody had answered when the table was built
+        self.built_at = time.monotonic()
+
+    def draw(self) -> int:
+        i = int(random.random() * self.size)
+        return self.bucket[i] if random.random() < self.prob[i] else self.bucket[self.alias[i]]
+
+
+class QuestionBankIndex:
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, str], array] = {}
+        self._max_synced_id = 0
+        # IDs added in-process that a later sync would otherwise append twice
+        self._added_since_sync: Set[int] = set()
+        self._last_sync = 0.0
+        self._last_reload = 0.0
+        self._lock = asyncio.Lock()
+        self._reload_task = None
+        self._alias: Dict[Tuple[str, str], AliasTable] = {}
+        self._dirty: Set[Tuple[str, str]] = set()
+        self._rebuild_task = None
+        self._last_rebuild = 0.0
+        self._fresh_from_id = None
+        self.loaded = False
+
+    # =================== LOADING ===================
+    async def load(self, db: AsyncSession):
+        """Build the index from scratch"""
+        async with self._lock:
+            buckets: Dict[Tuple[str, str], array] = {}
+            max_id = await self._load_rows(db, buckets, after_id=0)
+
+            self._buckets = buckets
+            # Old tables keep drawing from the old arrays until their rebuild lands
+            self._dirty |= set(buckets)
+            self._max_synced_id = max_id
+            self._added_since_sync.clear()
+            self._last_sync = self._last_reload = time.monotonic()
+            self.loaded = True
+
+        print(f"🗂️ Question bank index loaded: {self.total()} questions in {len(self._buckets)} buckets")
+
+    async def refresh_if_stale(self, db: AsyncSession):
+        """Incremental sync every SYNC_INTERVAL, full reload every RELOAD_INTERVAL"""
+        now = time.monotonic()
+        if now - self._last_reload > RELOAD_INTERVAL and self._reload_task is None:
+            # Full reloads read the whole ID column - keep them off the request path
+            self._reload_task = asyncio.create_task(self._background_reload())
+
+        # Exposure counts sync in the background; pick up what changed since
+        question_exposure.schedule_sync()
+        self._dirty |= question_exposure.take_changed()
+        if question_exposure.fresh_from_id != self._fresh_from_id:
+            self._fresh_from_id = question_exposure.fresh_from_id
+            self._dirty |= set(self._buckets)
+        self._schedule_rebuild()
+
+        if now - self._last_sync < SYNC_INTERVAL or self._lock.locked():
+            return
+
+        async with self._lock:
+            before = self.total()
+            sizes = {key: len(ids) for key, ids in self._buckets.items()}
+            self._max_synced_id = max(
+                self._max_synced_id,
+                await self._load_rows(db, self._buckets, after_id=self._max_synced_id, skip=self._added_since_sync)
+            )
+            self._added_since_sync = {qid for qid in self._added_since_sync if qid > self._max_synced_id}
+            self._last_sync = time.monotonic()
+            self._dirty |= {key for key, ids in self._buckets.items() if len(ids) != sizes.get(key)}
+
+        if self.total() != before:
+            print(f"🗂️ Question bank index synced: +{self.total() - before} questions")
+
+    async def _background_reload(self):
+        try:
+            async with AsyncSessionLocal() as session:
+                await self.load(session)
+        except Exception as e:
+            print(f"⚠️ Question bank index reload failed: {e}")
+        finally:
+            self._last_reload = time.monotonic()
+            self._reload_task = None
+
+    async def _load_rows(self, db: AsyncSession, buckets: Dict[Tuple[str, str], array],
+                         after_id: int, skip: Set[int] = frozenset()) -> int:
+        """Stream (id, category, difficulty) rows with id > after_id into buckets"""
+        max_id = after_id
+        result = await db.stream(
+            select(AptitudeQuestion.id, AptitudeQuestion.category, AptitudeQuestion.difficulty)
+            .where(AptitudeQuestion.id > after_id)
+            .order_by(AptitudeQuestion.id)
+        )
+        async for partition in result.partitions(LOAD_BATCH_SIZE):
+            for question_id, category, difficulty in partition:
+                if question_id not in skip:
+                    buckets.setdefault((category, difficulty), array("i")).append(question_id)
+                max_id = question_id
+        return max_id
+
+    # =================== ALIAS TABLES ===================
+    def _schedule_rebuild(self):
+        """Start a background rebuild of the dirty strata, at most every ALIAS_REBUILD_INTERVAL"""
+        if not self._dirty or not question_exposure.loaded or self._rebuild_task is not None:
+            return
+        if time.monotonic() - self._last_rebuild < ALIAS_REBUILD_INTERVAL:
+            return
+        self._rebuild_task = asyncio.create_task(self._background_rebuild())
+
+    async def _background_rebuild(self):
+        try:
+            await self.rebuild_alias_tables()
+        except Exception as e:
+            print(f"⚠️ Alias table rebuild failed: {e}")
+        finally:
+            self._last_rebuild = time.monotonic()
+            self._rebuild_task = None
+
+    async def rebuild_alias_tables(self):
+        """Rebuild the tables of the dirty strata off the event loop and swap them in"""
+        keys, self._dirty = self._dirty, set()
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if not bucket:
+                self._alias.pop(key, None)
+                continue
+            try:
+                table = await asyncio.to_thread(self._build_alias_table, bucket)
+            except Exception:
+                self._dirty.add(key)
+                raise
+            if self._buckets.get(key) is bucket:
+                self._alias[key] = table
+            else:
+                self._dirty.add(key)  # reloaded or pruned while we were building
+
+    def _build_alias_table(self, bucket: array) -> AliasTable:
+        """Alias table over the IDs currently in bucket (runs in a worker thread)"""
+        ids = bucket[:]  # later appends go past these positions, so the table stays valid
+        unexposed = sum(1 for qid in ids if question_exposure.count(qid) == 0)
+        return AliasTable(bucket, [self._weight(qid) for qid in ids], unexposed)
+
+    # =================== UPDATES ===================
+    def add(self, questions: Iterable):
+        """Register freshly inserted AptitudeQuestion rows"""
+        if not self.loaded:
+            return
+        for question in questions:
+            if question.id is None or question.id <= self._max_synced_id:
+                continue
+            if question.id in self._added_since_sync:
+                continue
+            key = (question.category, question.difficulty)
+            self._buckets.setdefault(key, array("i")).append(question.id)
+            self._added_since_sync.add(question.id)
+            self._dirty.add(key)
+
+    def discard(self, question_ids: Iterable[int]):
+        """Forget IDs whose rows no longer exist (O(bucket size), only on misses)"""
+        stale = set(question_ids)
+        if not stale:
+            return
+        question_json_cache.invalidate(stale)
+        for key, ids in self._buckets.items():
+            if any(qid in stale for qid in ids):
+                self._buckets[key] = array("i", (qid for qid in ids if qid not in stale))
+                self._alias.pop(key, None)
+                self._dirty.add(key)
+        # Rows were deleted elsewhere; there are probably more, so reload soon
+        self._last_reload = 0.0
+        print(f"🗂️ Dropped {len(stale)} stale IDs from question bank index")
+
+    # =================== QUERIES ===================
+    def _category_buckets(self, category: str, difficulty: str) -> List[array]:
+        if difficulty != "all":
+            bucket = self._buckets.get((category, difficulty))
+            return [bucket] if bucket else []
+        return [ids for (cat, _), ids in self._buckets.items() if cat == category]
+
+    def count(self, category: str, difficulty: str = "all") -> int:
+        return sum(len(ids) for ids in self._category_buckets(category, difficulty))
+
+    def unexposed_count(self, category: str, difficulty: str = "all") -> int:
+        """Questions nobody had answered at the last alias rebuild, plus those added since"""
+        unexposed = 0
+        for key in self._category_keys(category, difficulty):
+            bucket = self._buckets.get(key)
+            if not bucket:
+                continue
+            table = self._alias.get(key)
+            if table is None:
+                # Stratum not built yet (new, or exposure just loaded) - count it directly
+                unexposed += sum(1 for qid in bucket if question_exposure.count(qid) == 0)
+            else:
+                unexposed += table.unexposed + max(0, len(bucket) - table.size)
+        return unexposed
+
+    def total(self) -> int:
+        return sum(len(ids) for ids in self._buckets.values())
+
+    def sample(self, category: str, difficulty: str, k: int, exclude=None) -> List[int]:
+        """Pick up to k distinct IDs not in exclude, weighted by exposure once counts are loaded"""
+        if not question_exposure.loaded:
+            return self._uniform_sample(category, difficulty, k, exclude)
+        
+        # Strata without a table yet are left to the uniform top-up below
+        tables = [self._alias[key] for key in self._category_keys(category, difficulty) if key in self._alias]
+        weights = [table.total_weight for table in tables]
+        
+        picked = {}
+        for _ in range(WEIGHTED_DRAWS_PER_ITEM * k + 8):
+            if len(picked) >= k or not tables:
+                break
+            table = tables[0] if len(tables) == 1 else random.choices(tables, weights)[0]
+            question_id = table.draw()
+            if question_id in picked or (exclude and question_id in exclude):
+                continue
+            picked[question_id] = None
+        
+        if len(picked) < k:
+            # Small bucket or mostly excluded: finish off uniformly (over-asking by
+            # len(picked) so overlaps with the weighted picks cannot leave us short)
+            for question_id in self._uniform_sample(category, difficulty, k + len(picked), exclude):
+                picked.setdefault(question_id)
+                if len(picked) == k:
+                    break
+        return list(picked)
+    
+    def _category_keys(self, category: str, difficulty: str) -> List[Tuple[str, str]]:
+        if difficulty != "all":
+            return [(category, difficulty)]
+        return [key for key in self._buckets if key[0] == category]
+    
+    def _weight(self, question_id: int) -> float:
+        fresh = self._fresh_from_id is not None and question_id >= self._fresh_from_id
+        return (1.0 + FRESH_BOOST * fresh) / (1 + question_exposure.count(question_id))
+    
+    def _uniform_sample(self, category: str, difficulty: str, k: int, exclude=None) -> List[int]:
+        """Pick up to k distinct random IDs not in exclude - O(k) unless exclude covers most of the bucket"""
+        buckets = self._category_buckets(category, difficulty)
+        total = sum(len(ids) for ids in buckets)
+        if total == 0:
+            return []
+        
+        def at(position):
+            for ids in buckets:
+                if position < len(ids):
+                    return ids[position]
+                position -= len(ids)
+        
+        if not exclude:
+            # Sample positions in the concatenation of the buckets
+            return [at(position) for position in random.sample(range(total), min(k, total))]
+        
+        # Rejection sampling while seen IDs are a minority of the bucket...
+        sampled, tried = [], set()
+        for _ in range(EXCLUDE_SAMPLE_ROUNDS):
+            want = min(total - len(tried), 2 * (k - len(sampled)) + 8)
+            if want <= 0:
+                break
+            for position in random.sample(range(total), min(total, want + len(tried))):
+                if position in tried:
+                    continue
+                tried.add(position)
+                question_id = at(position)
+                if question_id not in exclude:
+                    sampled.append(question_id)
+                    if len(sampled) == k:
+                        return sampled
+        
+        # ...then a single pass over the bucket for users who have seen most of it
+        unseen = [qid for ids in buckets for qid in ids if qid not in exclude]
+        return random.sample(unseen, min(k, len(unseen)))
+    
+    def memory_bytes(self) -> int:
+        """Bytes held by the ID arrays"""
+        return sum(ids.buffer_info()[1] * ids.itemsize for ids in self._buckets.values())
+
+
+# Global instance
+question_bank_index = QuestionBankIndex()
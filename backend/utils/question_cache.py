@@ -0,0 +1,132 @@
+# backend/utils/question_cache.py
+"""
+Pre-serialized question JSON
+
+question_to_dict is the one place a question is turned into the dict the
+managers serve. QuestionJSONCache keeps the /question/{id} shape (the same
+fields, minus the "source" tag) already encoded as JSON bytes per question
+ID (LRU, QUESTION_CACHE_SIZE entries), so the question endpoints answer by
+joining cached fragments; misses are read in one column query without ORM
+hydration. The public encoding leaves out the answer key (correct_answer and
+explanation) and is cached separately, for endpoints that serve questions
+before they are answered. ORM updates/deletes of a question invalidate its entry in this
+process; QUESTION_CACHE_TTL bounds how long a change made by another process
+(scripts, other workers) can stay unseen.
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db_models import AptitudeQuestion
+
+CACHE_SIZE = int(os.getenv("QUESTION_CACHE_SIZE", 50_000))
+CACHE_TTL = int(os.getenv("QUESTION_CACHE_TTL", 600))  # seconds
+
+_COLUMNS = (
+    AptitudeQuestion.id,
+    AptitudeQuestion.category,
+    AptitudeQuestion.subcategory,
+    AptitudeQuestion.difficulty,
+    AptitudeQuestion.question_text,
+    AptitudeQuestion.options,
+    AptitudeQuestion.correct_answer,
+    AptitudeQuestion.explanation,
+    AptitudeQuestion.time_limit,
+)
+_ANSWER_KEY = ("correct_answer", "explanation")
+
+
+def question_to_dict(question, lean: bool = False) -> Dict:
+    """
+    API representation of a question (ORM object or row with the same attributes).
+    lean leaves out the explanation, so it does not have to be loaded.
+    """
+    question_dict = {
+        "id": question.id,
+        "category": question.category,
+        "subcategory": question.subcategory,
+        "difficulty": question.difficulty,
+        "question_text": question.question_text,
+        "options": question.options,
+        "correct_answer": question.correct_answer,
+        "time_limit": question.time_limit,
+        "source": "database"
+    }
+    if not lean:
+        question_dict["explanation"] = question.explanation
+    return question_dict
+
+
+def _encode(question, public: bool = False) -> bytes:
+    """The question endpoints' JSON: every served column, without question_to_dict's "source" tag"""
+    fields = {
+        column.key: getattr(question, column.key) for column in _COLUMNS
+        if not (public and column.key in _ANSWER_KEY)
+    }
+    return json.dumps(fields, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class QuestionJSONCache:
+    def __init__(self, max_size: int = CACHE_SIZE, ttl: int = CACHE_TTL):
+        # Keyed by (question ID, public)
+        self._entries: "OrderedDict[Tuple[int, bool], Tuple[bytes, float]]" = OrderedDict()
+        self._max_size = max_size
+        self._ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def get_many(self, db: AsyncSession, question_ids: List[int], public: bool = False) -> Dict[int, bytes]:
+        """Encoded question per ID (without the answer key if public); IDs that do not exist are left out"""
+        now = time.monotonic()
+        found: Dict[int, bytes] = {}
+        missing = []
+        for question_id in dict.fromkeys(question_ids):
+            entry = self._entries.get((question_id, public))
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end((question_id, public))
+                found[question_id] = entry[0]
+            else:
+                missing.append(question_id)
+
+        self.hits += len(found)
+        self.misses += len(missing)
+        if missing:
+            result = await db.execute(select(*_COLUMNS).where(AptitudeQuestion.id.in_(missing)))
+            for row in result.all():
+                fragment = _encode(row, public)
+                found[row.id] = fragment
+                self._store((row.id, public), fragment, now)
+        return found
+
+    def _store(self, key: Tuple[int, bool], fragment: bytes, now: float):
+        self._entries[key] = (fragment, now + self._ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, question_ids: Iterable[int]):
+        for question_id in question_ids:
+            self._entries.pop((question_id, False), None)
+            self._entries.pop((question_id, True), None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Global instance
+question_json_cache = QuestionJSONCache()
+
+
+@event.listens_for(AptitudeQuestion, "after_update")
+@event.listens_for(AptitudeQuestion, "after_delete")
+def _invalidate_question(mapper, connection, target):
+    question_json_cache.invalidate([target.id])
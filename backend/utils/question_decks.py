@@ -0,0 +1,221 @@
+# backend/utils/question_decks.py
+"""
+Pre-built question decks
+
+A deck is a ready-to-serve list of validated, option-shuffled question dicts.
+QuestionDeckPool keeps a few decks per key (e.g. (category, difficulty,
+question_count) for practice drills) and a background task tops them up, so a
+request only has to pop a deck instead of sampling, validating and shuffling
+inline. Keys are registered on first demand and dropped again after they have
+not been asked for in a while, unless they were pinned with warm().
+
+Decks are shared by all users, so a returning user's deck almost always holds
+a few questions they have already answered. pop_unseen hands those out
+separately; the caller replaces just them instead of building a whole deck.
+"""
+
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Container, Deque, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import AsyncSessionLocal
+
+DECK_DEPTH = int(os.getenv("QUESTION_DECK_DEPTH", 5))  # decks kept ready per key
+DECK_IDLE_TTL = int(os.getenv("QUESTION_DECK_IDLE_TTL", 3600))  # seconds before an unused key is dropped
+REFILL_INTERVAL = 30  # seconds between refill passes when nobody pops a deck
+
+
+def validate_questions(questions: List[Dict]) -> List[Dict]:
+    """Drop questions that cannot be served and normalise correct_answer"""
+    validated_questions = []
+    for i, q in enumerate(questions):
+        # Check required fields
+        if not all(key in q for key in ['question_text', 'options', 'correct_answer']):
+            print(f"❌ Invalid question at index {i}: {q}")
+            continue
+
+        # Validate correct_answer format
+        correct_answer = str(q['correct_answer']).upper().strip()
+        if correct_answer not in ['A', 'B', 'C', 'D']:
+            print(f"⚠️ Fixing invalid correct_answer: {q['correct_answer']}")
+            # Default to A if invalid
+            correct_answer = 'A'
+        q['correct_answer'] = correct_answer
+
+        # Validate options count
+        if not isinstance(q['options'], list) or len(q['options']) != 4:
+            print(f"⚠️ Invalid options for question: {q['question_text'][:50]}...")
+            continue
+
+        validated_questions.append(q)
+    return validated_questions
+
+
+def shuffle_question_options(questions: List[Dict]) -> List[Dict]:
+    """Shuffle options of each question in place to prevent pattern recognition"""
+    for question in questions:
+        options = question["options"][:]
+        correct_answer = question["correct_answer"]
+
+        shuffled_indices = list(range(len(options)))
+        random.shuffle(shuffled_indices)
+
+        # Map old letter -> new letter
+        option_mapping = {
+            chr(65 + old_idx): chr(65 + new_idx)
+            for new_idx, old_idx in enumerate(shuffled_indices)
+        }
+
+        question["options"] = [options[i] for i in shuffled_indices]
+        question["correct_answer"] = option_mapping[correct_answer]
+        question["original_correct_answer"] = correct_answer  # Store for verification
+        # Original letter of each served option ("CADB": served A is the stored C) -
+        # echoed back on submit so the answer can be graded; says nothing about which is right
+        question["option_order"] = "".join(chr(65 + old_idx) for old_idx in shuffled_indices)
+    return questions
+
+
+def unshuffle_answer(answer: str, option_order: Optional[str]) -> str:
+    """The stored letter of the option answered from a question served in option_order"""
+    if not option_order:
+        return answer  # served unshuffled
+    if sorted(option_order) != [chr(65 + i) for i in range(len(option_order))]:
+        raise ValueError(f"Invalid option_order: {option_order}")
+    position = ord(answer) - 65 if isinstance(answer, str) and len(answer) == 1 else -1
+    return option_order[position] if 0 <= position < len(option_order) else answer
+
+
+def shuffle_answer(answer: str, option_order: Optional[str]) -> str:
+    """The served letter of a stored answer letter (inverse of unshuffle_answer)"""
+    if not option_order or answer not in option_order:
+        return answer
+    return chr(65 + option_order.index(answer))
+
+
+def strip_answer_key(questions: List[Dict]) -> List[Dict]:
+    """Remove answers from questions served before they are answered (submit returns them)"""
+    for question in questions:
+        question.pop("correct_answer", None)
+        question.pop("original_correct_answer", None)
+        question.pop("explanation", None)
+    return questions
+
+
+DeckBuilder = Callable[[AsyncSession, Hashable], Awaitable[Optional[List[Dict]]]]
+
+
+class QuestionDeckPool:
+    def __init__(self, name: str, builder: DeckBuilder, depth: int = DECK_DEPTH):
+        self.name = name
+        self._builder = builder
+        self._depth = depth
+        self._decks: Dict[Hashable, Deque[List[Dict]]] = {}
+        self._last_demand: Dict[Hashable, float] = {}
+        self._pinned: set = set()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0  # decks served as they were
+        self.patched = 0  # decks served with seen questions replaced
+        self.misses = 0  # no deck ready, built inline
+        self.replaced = 0  # questions replaced in patched decks
+
+    def pop(self, key: Hashable) -> Optional[List[Dict]]:
+        """Take a ready deck for key, or None if the pool has none yet"""
+        self._last_demand[key] = time.monotonic()
+        decks = self._decks.get(key)
+        deck = decks.popleft() if decks else None
+        # Top up (or start filling a newly seen key) in the background
+        self._wake.set()
+        return deck
+
+    def pop_unseen(self, key: Hashable, seen: Container[int]) -> Tuple[Optional[List[Dict]], List[Dict]]:
+        """
+        Take a ready deck for key as (questions not in seen, questions in seen);
+        (None, []) if the pool has none yet. The caller replaces the second list.
+        """
+        deck = self.pop(key)
+        if deck is None:
+            self.misses += 1
+            return None, []
+        unseen = [q for q in deck if q["id"] not in seen]
+        removed = [q for q in deck if q["id"] in seen]
+        if removed:
+            self.patched += 1
+            self.replaced += len(removed)
+        else:
+            self.hits += 1
+        return unseen, removed
+
+    def stats(self) -> Dict:
+        served = self.hits + self.patched + self.misses
+        return {
+            "keys": len(self._last_demand),
+            "decks_ready": sum(len(decks) for decks in self._decks.values()),
+            "hits": self.hits,
+            "patched": self.patched,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.patched) / served, 3) if served else None,
+            "replaced_questions": self.replaced,
+        }
+
+    def warm(self, key: Hashable):
+        """Keep key filled from startup on, whether or not anyone has asked for it yet"""
+        self._pinned.add(key)
+        self._last_demand[key] = time.monotonic()
+        self._wake.set()
+
+    def size(self, key: Hashable) -> int:
+        return len(self._decks.get(key, ()))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._refill_loop())
+            print(f"🃏 {self.name} deck refiller started (depth {self._depth})")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refill_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=REFILL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            try:
+                await self._refill_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ {self.name} deck refill failed: {e}")
+
+    async def _refill_all(self):
+        now = time.monotonic()
+        for key in list(self._last_demand):
+            if key not in self._pinned and now - self._last_demand[key] > DECK_IDLE_TTL:
+                del self._last_demand[key]
+                self._decks.pop(key, None)
+                continue
+
+            decks = self._decks.setdefault(key, deque())
+            if len(decks) >= self._depth:
+                continue
+
+            async with AsyncSessionLocal() as db:
+                while len(decks) < self._depth:
+                    deck = await self._builder(db, key)
+                    if not deck:
+                        break
+                    decks.append(deck)
@@ -0,0 +1,106 @@
+# backend/utils/question_exposure.py
+"""
+How often each question has been answered, for exposure-weighted sampling
+
+Counts come from aptitude_attempts. They are aggregated once at startup and then
+incrementally (only attempts with id > the last one seen), in a background task,
+so neither the answer-submit route nor the sampler ever waits on them. The
+question bank index asks take_changed() which (category, difficulty) strata
+need their sampling weights rebuilt.
+
+"Fresh" questions are the ones created in the last FRESH_DAYS; since IDs grow
+with time this is tracked as the ID of the oldest such question (fresh_from_id),
+a single probe of the created_at index.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import AsyncSessionLocal
+from backend.db_models import AptitudeAttempt, AptitudeQuestion, AptitudeTest
+
+SYNC_INTERVAL = 60  # seconds between incremental syncs
+FRESH_DAYS = int(os.getenv("QUESTION_FRESH_DAYS", 7))
+
+
+class QuestionExposure:
+    def __init__(self):
+        self._counts: Dict[int, int] = {}
+        self._changed: Set[Tuple[str, str]] = set()
+        self._max_attempt_id = 0
+        self._last_sync = 0.0
+        self._sync_task = None
+        self.fresh_from_id: Optional[int] = None
+        self.loaded = False
+
+    def count(self, question_id: int) -> int:
+        return self._counts.get(question_id, 0)
+
+    def take_changed(self) -> Set[Tuple[str, str]]:
+        """Strata whose counts moved since the last call"""
+        changed, self._changed = self._changed, set()
+        return changed
+
+    async def load(self, db: AsyncSession):
+        await self._sync(db)
+        self.loaded = True
+        print(f"📈 Question exposure loaded: {sum(self._counts.values())} attempts over {len(self._counts)} questions")
+
+    def schedule_sync(self):
+        """Start a background sync if the last one is older than SYNC_INTERVAL"""
+        if not self.loaded or self._sync_task is not None:
+            return
+        if time.monotonic() - self._last_sync < SYNC_INTERVAL:
+            return
+        self._sync_task = asyncio.create_task(self._background_sync())
+
+    async def _background_sync(self):
+        try:
+            async with AsyncSessionLocal() as session:
+                await self._sync(session)
+        except Exception as e:
+            print(f"⚠️ Question exposure sync failed: {e}")
+        finally:
+            self._last_sync = time.monotonic()
+            self._sync_task = None
+
+    async def _sync(self, db: AsyncSession):
+        # New attempts per question (SJT attempts hold scenario IDs - skip them)
+        result = await db.execute(
+            select(
+                AptitudeAttempt.question_id,
+                AptitudeQuestion.category,
+                AptitudeQuestion.difficulty,
+                func.count(),
+                func.max(AptitudeAttempt.id),
+            )
+            .join(AptitudeTest, AptitudeTest.id == AptitudeAttempt.test_id)
+            .join(AptitudeQuestion, AptitudeQuestion.id == AptitudeAttempt.question_id)
+            .where(AptitudeAttempt.id > self._max_attempt_id, AptitudeTest.test_type != "sjt")
+            .group_by(AptitudeAttempt.question_id, AptitudeQuestion.category, AptitudeQuestion.difficulty)
+        )
+        max_attempt_id = self._max_attempt_id
+        for question_id, category, difficulty, attempts, last_attempt_id in result.all():
+            self._counts[question_id] = self._counts.get(question_id, 0) + attempts
+            self._changed.add((category, difficulty))
+            max_attempt_id = max(max_attempt_id, last_attempt_id)
+        self._max_attempt_id = max_attempt_id
+
+        result = await db.execute(
+            select(AptitudeQuestion.id)
+            .where(AptitudeQuestion.created_at >= datetime.utcnow() - timedelta(days=FRESH_DAYS))
+            .order_by(AptitudeQuestion.created_at)
+            .limit(1)
+        )
+        self.fresh_from_id = result.scalar()
+        self._last_sync = time.monotonic()
+
+
+# Global instance
+question_exposure = QuestionExposure()
@@ -1,96 +1,93 @@
 # backend/utils/question_manager.py
+import asyncio
 import random
 from typing import List, Dict
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from backend.db_models import AptitudeQuestion
-from backend.utils.ai_question_generator import AIQuestionGenerator
-import json
-import hashlib
+from sqlalchemy import select, func, union, union_all
+from sqlalchemy.orm import load_only
+from backend.database import AsyncSessionLocal
+from backend.db_models import AptitudeQuestion, content_hash
+from backend.utils.ai_question_generator import DOMAIN_MAPPING, AIQuestionGenerator, get_ai_generator
+from backend.utils.content_hash import dedupe_by_content_hash, insert_new_rows
+from backend.utils.near_duplicate import filter_near_duplicates, near_duplicate_index
+from backend.utils.question_bank_index import question_bank_index
+from backend.utils.question_cache import question_to_dict
+from backend.utils.question_replenisher import QUESTION_CATEGORIES, QUESTION_DIFFICULTIES, question_replenisher
+from backend.utils.seen_questions import SeenBitmap
+from backend.utils.single_flight import generation_flights, advisory_xact_lock
+from backend.utils.test_blueprint import Quotas, rebalance_quotas
 from datetime import datetime
 
+# Extra random_key probes issued on top of the requested count
+SAMPLE_PROBE_SLACK = 5
+
+# Columns a question is served with. Sampling never needs the bookkeeping
+# columns (random_key, content_hash, ...), and lean loads also leave out
+# explanation, which practice only shows after submit (read there).
+SERVED_COLUMNS = (
+    AptitudeQuestion.id, AptitudeQuestion.category, AptitudeQuestion.subcategory,
+    AptitudeQuestion.difficulty, AptitudeQuestion.question_text, AptitudeQuestion.options,
+    AptitudeQuestion.correct_answer, AptitudeQuestion.explanation, AptitudeQuestion.time_limit,
+)
+LEAN_COLUMNS = tuple(c for c in SERVED_COLUMNS if c is not AptitudeQuestion.explanation)
 
 class QuestionManager:
     def __init__(self):
-        self.ai_generator = AIQuestionGenerator()
         print("✅ Database-only QuestionManager initialized")
     
-    async def get_questions_by_domain(self, db: AsyncSession, domain: str, count: int = 10, difficulty: str = "all") -> List[Dict]:
+    @property
+    def ai_generator(self) -> AIQuestionGenerator:
+        return get_ai_generator()
+    
+    async def get_questions_by_domain(self, db: AsyncSession, domain: str, count: int = 10, difficulty: str = "all",
+                                      exclude: SeenBitmap = None, lean: bool = False) -> List[Dict]:
         """
-        Get questions from database, ensuring fresh questions each time
+        Get questions from database, ensuring fresh questions each time.
+        Questions in exclude (a user's seen set) are only used as a last resort.
+        With lean=True the explanation is neither loaded nor returned.
         """
         print(f"🔧 Getting {count} {difficulty} questions for {domain} from database")
         
         try:
-            # Build query based on difficulty
-            if difficulty == "all":
-                query = select(AptitudeQuestion).where(
-                    AptitudeQuestion.category == domain
-                )
-            else:
-                query = select(AptitudeQuestion).where(
-                    AptitudeQuestion.category == domain,
-                    AptitudeQuestion.difficulty == difficulty
-                )
+            selected_questions = await self._sample_questions(db, domain, count, difficulty, exclude=exclude, lean=lean)
             
-            result = await db.execute(query.order_by(func.random()))
-            available_questions = result.scalars().all()
+            if exclude and len(selected_questions) < count:
+                # The user has seen (nearly) everything here - repeat seen questions
+                # rather than make them wait for generation
+                print(f"♻️ Only {len(selected_questions)} unseen {domain} questions, topping up with repeats")
+                question_replenisher.nudge(domain, difficulty)
+                chosen = {q.id for q in selected_questions}
+                repeats = await self._sample_questions(db, domain, count, difficulty, lean=lean)
+                selected_questions.extend([q for q in repeats if q.id not in chosen][:count - len(selected_questions)])
             
-            print(f"🔧 Found {len(available_questions)} questions in database for {domain}")
+            print(f"🔧 Sampled {len(selected_questions)} questions from database for {domain}")
             
             # If there are no questions at all in the database
-            if len(available_questions) == 0:
-                print(f"⚠️ No questions found in database for {domain}, generating emergency questions...")
-                # Generate emergency questions
-                emergency_questions = await self._generate_emergency_questions(db, domain, count, difficulty)
+            if len(selected_questions) == 0:
+                print(f"⚠️ No questions found in database for {domain}, using emergency questions...")
+                question_replenisher.nudge(domain, difficulty)
+                # Concurrent requests for an empty category share one emergency save
+                emergency_questions = await generation_flights.run(
+                    ("emergency", domain, difficulty),
+                    lambda: self._generate_emergency_questions(domain, count, difficulty)
+                )
                 if emergency_questions:
-                    print(f"✅ Generated {len(emergency_questions)} emergency questions")
-                    return emergency_questions
+                    print(f"✅ Saved {len(emergency_questions)} emergency questions")
+                    return emergency_questions[:count]
                 else:
-                    print(f"❌ Failed to generate emergency questions for {domain}")
+                    print(f"❌ No emergency questions for {domain}")
                     return []
             
-            # If not enough questions, generate more with improved logic
-            if len(available_questions) < count:
-                needed = count - len(available_questions)
-                print(f"🔄 Need {needed} more questions, generating via AI...")
-                
-                # Generate new questions
-                new_questions = await self._generate_and_save_questions_needed(
-                    db, domain, needed * 2, difficulty
-                )
-                
-                if new_questions:
-                    # Re-query to get all questions including new ones
-                    if difficulty == "all":
-                        query = select(AptitudeQuestion).where(
-                            AptitudeQuestion.category == domain
-                        )
-                    else:
-                        query = select(AptitudeQuestion).where(
-                            AptitudeQuestion.category == domain,
-                            AptitudeQuestion.difficulty == difficulty
-                        )
-                    
-                    result = await db.execute(query.order_by(func.random()))
-                    available_questions = result.scalars().all()
-                    print(f"✅ Now have {len(available_questions)} total questions")
-            
-            # Select final questions
-            selected_questions = []
-            question_ids = [q.id for q in available_questions]
-            
-            if len(question_ids) > count:
-                import random
-                selected_ids = random.sample(question_ids, min(count, len(question_ids)))
-                selected_questions = [q for q in available_questions if q.id in selected_ids]
-            else:
-                selected_questions = available_questions
+            # Not enough questions: serve what there is, the replenisher generates more
+            # in the background (requests never wait on the LLM)
+            if len(selected_questions) < count:
+                print(f"🔄 Only {len(selected_questions)}/{count} questions for {domain}, queued for replenishment")
+                question_replenisher.nudge(domain, difficulty)
             
             print(f"✅ Returning {len(selected_questions)} questions for {domain}")
             
             # Convert to dict format for frontend
-            return [self._question_to_dict(q) for q in selected_questions]
+            return [self._question_to_dict(q, lean=lean) for q in selected_questions]
             
         except Exception as e:
             print(f"❌ Error in get_questions_by_domain: {e}")
@@ -98,68 +95,197 @@ class QuestionManager:
             traceback.print_exc()
             return []
     
-    async def _generate_and_save_questions_needed(self, db: AsyncSession, domain: str, count: int, difficulty: str) -> List[Dict]:
-        """Generate new questions using AI and save to database"""
+    def _domain_filters(self, domain: str, difficulty: str) -> list:
+        """WHERE clauses selecting one category (and optionally one difficulty)"""
+        filters = [AptitudeQuestion.category == domain]
+        if difficulty != "all":
+            filters.append(AptitudeQuestion.difficulty == difficulty)
+        return filters
+    
+    async def _sample_questions(self, db: AsyncSession, domain: str, count: int, difficulty: str,
+                                exclude: SeenBitmap = None, lean: bool = False) -> List[AptitudeQuestion]:
+        """
+        Pick up to `count` random questions without reading the whole category.
+        
+        When the in-process question bank index is loaded the IDs come from it
+        and only the chosen rows are fetched by primary key. Otherwise each
+        probe draws a point r in [0, 1) and takes the first row with
+        random_key >= r through the (category, [difficulty,] random_key) index,
+        so the query touches roughly `count` index entries no matter how big
+        the bank is. All probes go out as one UNION, and only the chosen rows
+        are hydrated.
+        
+        Questions in exclude are skipped, so fewer than `count` may come back
+        when the user has seen most of the category. Only the served columns
+        are loaded (LEAN_COLUMNS when lean).
+        """
+        columns = load_only(*(LEAN_COLUMNS if lean else SERVED_COLUMNS))
+        if question_bank_index.loaded:
+            await question_bank_index.refresh_if_stale(db)
+            question_ids = list(dict.fromkeys(question_bank_index.sample(domain, difficulty, count, exclude=exclude)))
+            questions = await self._fetch_questions_by_ids(db, question_ids, columns)
+            if len(questions) == count or (exclude and len(questions) == len(question_ids)):
+                return questions
+            # Short bucket (maybe rows from another worker not synced yet) or rows
+            # deleted behind the index's back - forget the stale IDs and probe instead
+            question_bank_index.discard(set(question_ids) - {q.id for q in questions})
+        
+        filters = self._domain_filters(domain, difficulty)
+        
+        # Overshoot a little: two probes can land in the same gap, and probes
+        # above the highest key find nothing
+        probe_count = count + max(SAMPLE_PROBE_SLACK, count // 2)
+        probes = [
+            select(AptitudeQuestion.id)
+            .where(*filters, AptitudeQuestion.random_key >= random.random())
+            .order_by(AptitudeQuestion.random_key)
+            .limit(1)
+            for _ in range(probe_count)
+        ]
+        
+        probed_ids = union(*probes).subquery()
+        result = await db.execute(
+            select(AptitudeQuestion).options(columns).where(AptitudeQuestion.id.in_(select(probed_ids.c.id)))
+        )
+        questions = [q for q in result.scalars().all() if not exclude or q.id not in exclude]
+        
+        if len(questions) < count:
+            # Small bank, or the probes collided: wrap around from the low end
+            # of the key range. For a bank smaller than 2 * count this reads it all.
+            # Widened by the seen-set size so it still holds 2 * count unseen rows
+            result = await db.execute(
+                select(AptitudeQuestion)
+                .options(columns)
+                .where(*filters, AptitudeQuestion.id.notin_([q.id for q in questions]))
+                .order_by(AptitudeQuestion.random_key)
+                .limit(count * 2 + (len(exclude) if exclude else 0))
+            )
+            extra = [q for q in result.scalars().all() if not exclude or q.id not in exclude]
+            questions.extend(random.sample(extra, min(count - len(questions), len(extra))))
+        
+        random.shuffle(questions)
+        return questions[:count]
+    
+    async def get_stratified_questions(self, db: AsyncSession, quotas: Quotas, exclude: SeenBitmap = None) -> List[Dict]:
+        """
+        Fill per-(category, difficulty) quotas in a single database round trip.
+        
+        With the question bank index loaded the stock per stratum is known up
+        front, so quotas are rebalanced, IDs sampled in memory and the rows
+        fetched by primary key. Otherwise every stratum contributes a window of
+        the random_key index starting at its own random pivot (wrapping around),
+        all combined in one UNION ALL, and the quotas are rebalanced against
+        what came back.
+        
+        Questions in exclude (a user's seen set) are skipped; only when there
+        are not enough unseen ones is the test topped up with repeats.
+        """
+        questions = await self._pick_stratified(db, quotas, exclude)
+        
+        shortfall = sum(quotas.values()) - len(questions)
+        if exclude and shortfall > 0:
+            print(f"♻️ Not enough unseen questions, repeating {shortfall} seen ones")
+            chosen = {q.id for q in questions}
+            repeats = await self._pick_stratified(db, quotas, None)
+            questions.extend([q for q in repeats if q.id not in chosen][:shortfall])
+        
+        random.shuffle(questions)
+        return [self._question_to_dict(q) for q in questions]
+    
+    async def _pick_stratified(self, db: AsyncSession, quotas: Quotas, exclude) -> List[AptitudeQuestion]:
+        # Any stratum may have to cover its whole category's quota
+        category_totals: Dict[str, int] = {}
+        for (category, _), n in quotas.items():
+            category_totals[category] = category_totals.get(category, 0) + n
+        
+        if question_bank_index.loaded:
+            await question_bank_index.refresh_if_stale(db)
+            if exclude:
+                # Unseen stock is only known by drawing it
+                candidates = {
+                    key: question_bank_index.sample(*key, category_totals[key[0]], exclude=exclude)
+                    for key in quotas
+                }
+                plan = rebalance_quotas(quotas, {key: len(ids) for key, ids in candidates.items()})
+                question_ids = [qid for key, n in plan.items() for qid in candidates[key][:n]]
+            else:
+                available = {key: question_bank_index.count(*key) for key in quotas}
+                plan = rebalance_quotas(quotas, available)
+                question_ids = [
+                    qid
+                    for (category, difficulty), n in plan.items()
+                    for qid in question_bank_index.sample(category, difficulty, n)
+                ]
+            questions = await self._fetch_questions_by_ids(db, question_ids, load_only(*SERVED_COLUMNS))
+            if len(questions) == len(question_ids):
+                return questions
+            question_bank_index.discard(set(question_ids) - {q.id for q in questions})
+        
+        windows = []
+        for category, difficulty in quotas:
+            cap = category_totals[category]
+            pivot = random.random()
+            stratum = select(*SERVED_COLUMNS).where(*self._domain_filters(category, difficulty))
+            windows.append(
+                stratum.where(AptitudeQuestion.random_key >= pivot).order_by(AptitudeQuestion.random_key).limit(cap)
+            )
+            windows.append(
+                stratum.where(AptitudeQuestion.random_key < pivot).order_by(AptitudeQuestion.random_key).limit(cap)
+            )
+        
+        result = await db.execute(select(AptitudeQuestion).from_statement(union_all(*windows)))
+        by_stratum: Dict[tuple, List[AptitudeQuestion]] = {key: [] for key in quotas}
+        for question in result.scalars().all():
+            if exclude and question.id in exclude:
+                continue
+            key = (question.category, question.difficulty)
+            if key in by_stratum and len(by_stratum[key]) < category_totals[question.category]:
+                by_stratum[key].append(question)
+        
+        plan = rebalance_quotas(quotas, {key: len(rows) for key, rows in by_stratum.items()})
+        return [
+            question
+            for key, n in plan.items()
+            for question in random.sample(by_stratum[key], n)
+        ]
+    
+    async def _fetch_questions_by_ids(self, db: AsyncSession, question_ids: List[int], columns) -> List[AptitudeQuestion]:
+        """Load questions by primary key, keeping the order of question_ids"""
+        if not question_ids:
+            return []
+        result = await db.execute(
+            select(AptitudeQuestion).options(columns).where(AptitudeQuestion.id.in_(question_ids))
+        )
+        by_id = {q.id: q for q in result.scalars().all()}
+        return [by_id[qid] for qid in question_ids if qid in by_id]
+    
+    async def generate_and_save_questions(self, db: AsyncSession, domain: str, count: int, difficulty: str) -> List[AptitudeQuestion]:
+        """
+        Generate new questions using AI and save to database; returns the newly saved rows.
+        Questions are streamed and each is committed (and servable) as soon as
+        the model finishes it, rather than after the whole batch.
+        """
+        saved_questions = []
+        if not self.ai_generator.available():
+            print(f"⚡ LLM unavailable, not generating {domain}/{difficulty} questions")
+            return saved_questions
         try:
-            print(f"🤖 Generating {count} new {difficulty} questions for {domain}")
-            new_questions = self.ai_generator.generate_questions(domain, count, difficulty)
-            
-            if not new_questions:
-                print("❌ AI generator returned no questions")
-                return []
-            
-            saved_questions = []
-            
-            for q_data in new_questions:
-                # Validate the question first
-                if not self._validate_question_structure(q_data):
-                    print(f"⚠️ Skipping invalid question structure")
-                    continue
-                
-                # Fix duplicate options
-                q_data = self._fix_duplicate_options(q_data)
-                
-                # Check if question already exists - FIXED: use .first() instead of .scalar_one_or_none()
-                result = await db.execute(
-                    select(AptitudeQuestion).where(
-                        AptitudeQuestion.question_text == q_data["question_text"]
-                    ).limit(1)  # Add limit to ensure we only get one
-                )
-                existing_question = result.first()  # Use .first() which returns a tuple
+            # One generation per domain/difficulty across workers. The lock lives on its
+            # own connection so per-question commits keep it; anyone else serves existing stock
+            async with AsyncSessionLocal() as lock_session:
+                if not await advisory_xact_lock(lock_session, f"question-generation:{domain}:{difficulty}", wait=False):
+                    print(f"⏭️ {domain}/{difficulty} questions are already being generated elsewhere")
+                    return []
                 
-                if existing_question:
-                    # Extract the question object from the tuple
-                    existing_question = existing_question[0] if existing_question else None
-                    print(f"⚠️ Question already exists in DB: {existing_question.id if existing_question else 'unknown'}")
-                    if existing_question:
-                        saved_questions.append(existing_question)
-                else:
-                    # Create new database entry
-                    question = AptitudeQuestion(
-                        category=q_data["category"],
-                        subcategory=q_data.get("subcategory", "General"),
-                        difficulty=q_data.get("difficulty", "medium"),
-                        question_text=q_data["question_text"],
-                        options=q_data["options"],
-                        correct_answer=q_data["correct_answer"],
-                        explanation=q_data.get("explanation", ""),
-                        time_limit=q_data.get("time_limit", 60),
-                        created_at=datetime.now()
-                    )
-                    db.add(question)
-                    # Commit immediately to avoid session issues
-                    try:
-                        await db.commit()
-                        await db.refresh(question)
-                        saved_questions.append(question)
-                        print(f"✅ Saved new question to DB: {question.id}")
-                    except Exception as commit_error:
-                        await db.rollback()
-                        print(f"❌ Commit error: {commit_error}")
-                        # Try to continue with other questions
-                        continue
+                print(f"🤖 Generating {count} new {difficulty} questions for {domain}")
+                streamed = 0
+                async for q_data in self.ai_generator.stream_questions(domain, count, difficulty):
+                    streamed += 1
+                    saved_questions.extend((await self.save_generated_questions(db, [q_data]))["saved"])
             
-            print(f"🎉 Successfully processed {len(saved_questions)} questions")
+            if not streamed:
+                print("❌ AI generator returned no questions")
+            print(f"🎉 Successfully saved {len(saved_questions)} questions")
             return saved_questions
             
         except Exception as e:
@@ -167,7 +293,55 @@ class QuestionManager:
             print(f"❌ Error generating/saving questions: {e}")
             import traceback
             traceback.print_exc()
-            return []
+            return saved_questions
+    
+    async def save_generated_questions(self, db: AsyncSession, new_questions: List[Dict], commit: bool = True) -> Dict:
+        """
+        Validate, dedupe and save a batch from the AI generator.
+        Returns {"saved": rows, "rejected": n, "duplicates": n}. With commit=False
+        the rows are only flushed and the caller commits (then calls index_saved_questions).
+        """
+        valid_questions = []
+        for q_data in new_questions:
+            # Validate the question first
+            if not self._validate_question_structure(q_data):
+                print(f"⚠️ Skipping invalid question structure")
+                continue
+            
+            # Fix duplicate options
+            valid_questions.append(self._fix_duplicate_options(q_data))
+        
+        # One content_hash lookup for the whole batch
+        fresh_questions, existing_questions = await dedupe_by_content_hash(
+            db, AptitudeQuestion, valid_questions, "question_text"
+        )
+        for existing_question in existing_questions:
+            print(f"⚠️ Question already exists in DB: {existing_question.id}")
+        distinct_questions = await filter_near_duplicates(db, fresh_questions)
+        outcome = {
+            "saved": [],
+            "rejected": len(new_questions) - len(valid_questions),
+            "duplicates": len(valid_questions) - len(distinct_questions),
+        }
+        
+        # One statement; rows another worker saved since the lookup are skipped, not fatal
+        new_rows = await insert_new_rows(db, AptitudeQuestion, [
+            self._question_values(q_data, created_at=datetime.now()) for q_data in distinct_questions
+        ])
+        outcome["duplicates"] += len(distinct_questions) - len(new_rows)
+        outcome["saved"] = new_rows
+        
+        if commit:
+            await db.commit()
+            self.index_saved_questions(new_rows)
+        return outcome
+    
+    def index_saved_questions(self, questions: List[AptitudeQuestion]):
+        """Add committed questions to the in-memory bank and near-duplicate indexes"""
+        if questions:
+            question_bank_index.add(questions)
+            near_duplicate_index.add_questions(questions)
+            print(f"✅ Saved {len(questions)} new questions to DB")
     
     def _validate_question_structure(self, q_data: dict) -> bool:
         """Validate question structure before saving"""
@@ -256,56 +430,45 @@ class QuestionManager:
         
         return q_data
 
-    async def _generate_emergency_questions(self, db: AsyncSession, domain: str, count: int, difficulty: str) -> List[Dict]:
-        """Generate emergency questions when database is empty"""
-        try:
-            print(f"🚨 EMERGENCY: Generating {count} questions for {domain}")
-            
-            # Try AI generation first
-            new_questions = self.ai_generator.generate_questions(domain, count, difficulty)
-            
-            if not new_questions:
-                print("❌ AI generation failed, creating manual questions")
-                # Create simple manual questions as fallback
+    async def _generate_emergency_questions(self, domain: str, count: int, difficulty: str) -> List[Dict]:
+        """
+        Save built-in questions when the category is empty (AI generation is left to the replenisher).
+        Runs in its own session under a cross-worker lock: one worker saves them,
+        the others find them already saved.
+        """
+        async with AsyncSessionLocal() as db:
+            try:
+                print(f"🚨 EMERGENCY: Creating {count} manual questions for {domain}")
                 new_questions = self._create_manual_questions(domain, count, difficulty)
-            
-            if new_questions:
-                saved_questions = []
-                for q_data in new_questions:
-                    from datetime import datetime
-                    question = AptitudeQuestion(
-                        category=q_data["category"],
-                        subcategory=q_data.get("subcategory", "General"),
-                        difficulty=q_data.get("difficulty", "medium"),
-                        question_text=q_data["question_text"],
-                        options=q_data["options"],
-                        correct_answer=q_data["correct_answer"],
-                        explanation=q_data.get("explanation", ""),
-                        time_limit=q_data.get("time_limit", 60)
-                    )
-                    db.add(question)
-                    saved_questions.append(question)
                 
-                await db.commit()
+                if new_questions:
+                    await advisory_xact_lock(db, f"emergency-questions:{domain}:{difficulty}")
+                    fresh_questions, existing_questions = await dedupe_by_content_hash(
+                        db, AptitudeQuestion, new_questions, "question_text"
+                    )
+                    fresh_questions = await filter_near_duplicates(db, fresh_questions)
+                    saved_questions = await insert_new_rows(
+                        db, AptitudeQuestion, [self._question_values(q_data) for q_data in fresh_questions]
+                    )
+                    await db.commit()
+                    question_bank_index.add(saved_questions)
+                    near_duplicate_index.add_questions(saved_questions)
+                    saved_questions = list(existing_questions) + saved_questions
+                    
+                    print(f"✅ Saved {len(saved_questions)} emergency questions")
+                    return [self._question_to_dict(q) for q in saved_questions]
                 
-                # Refresh to get IDs
-                for q in saved_questions:
-                    await db.refresh(q)
+                return []
                 
-                print(f"✅ Saved {len(saved_questions)} emergency questions")
-                return [self._question_to_dict(q) for q in saved_questions]
-            
-            return []
-            
-        except Exception as e:
-            await db.rollback()
-            print(f"❌ Emergency generation failed: {e}")
-            return []
+            except Exception as e:
+                await db.rollback()
+                print(f"❌ Emergency generation failed: {e}")
+                return []
     
     def _create_manual_questions(self, domain: str, count: int, difficulty: str) -> List[Dict]:
         """Create simple manual questions as ultimate fallback"""
         base_questions = {
-            "Logical Reasoning": [
+            "Logical": [
                 {
                     "question_text": "What comes next: A, C, E, G, ?",
                     "options": ["H", "I", "J", "K"],
@@ -313,7 +476,7 @@ class QuestionManager:
                     "explanation": "The sequence skips one letter each time: A, C, E, G, I"
                 }
             ],
-            "Quantitative Aptitude": [
+            "Quantitative": [
                 {
                     "question_text": "What is 15% of 200?",
                     "options": ["15", "30", "25", "20"],
@@ -321,7 +484,7 @@ class QuestionManager:
                     "explanation": "15% of 200 = 0.15 × 200 = 30"
                 }
             ],
-            "Verbal Ability": [
+            "Verbal": [
                 {
                     "question_text": "Choose the correctly spelled word:",
                     "options": ["Accomodate", "Acommodate", "Accommodate", "Acomodate"],
@@ -329,7 +492,7 @@ class QuestionManager:
                     "explanation": "Accommodate has double 'c' and double 'm'"
                 }
             ],
-            "Coding Challenge": [
+            "Coding": [
                 {
                     "question_text": "Which data structure uses LIFO (Last In First Out)?",
                     "options": ["Queue", "Stack", "Array", "Linked List"],
@@ -339,7 +502,8 @@ class QuestionManager:
             ]
         }
         
-        questions = base_questions.get(domain, [])
+        # Keyed by the served (short) names; the long display names map onto them
+        questions = base_questions.get(DOMAIN_MAPPING.get(domain, domain), [])
         # Repeat questions if needed to reach count
         while len(questions) < count and questions:
             questions.append(questions[0])
@@ -356,20 +520,26 @@ class QuestionManager:
         
         return questions[:count]
     
-    def _question_to_dict(self, question) -> Dict:
+    def _question_values(self, q_data: Dict, **extra) -> Dict:
+        """Column values of a new AptitudeQuestion row (for insert_new_rows) from generated question data"""
+        return dict(
+            category=q_data["category"],
+            subcategory=q_data.get("subcategory", "General"),
+            difficulty=q_data.get("difficulty", "medium"),
+            question_text=q_data["question_text"],
+            options=q_data["options"],
+            correct_answer=q_data["correct_answer"],
+            explanation=q_data.get("explanation", ""),
+            time_limit=q_data.get("time_limit", 60),
+            # Never an explicit NULL: that would bypass the unique index ON CONFLICT relies on
+            content_hash=q_data.get("content_hash") or content_hash(q_data["question_text"]),
+            minhash_signature=q_data.get("minhash_signature"),
+            **extra
+        )
+    
+    def _question_to_dict(self, question, lean: bool = False) -> Dict:
         """Convert SQLAlchemy question object to dict"""
-        return {
-            "id": question.id,
-            "category": question.category,
-            "subcategory": question.subcategory,
-            "difficulty": question.difficulty,
-            "question_text": question.question_text,
-            "options": question.options,
-            "correct_answer": question.correct_answer,
-            "explanation": question.explanation,
-            "time_limit": question.time_limit,
-            "source": "database"
-        }
+        return question_to_dict(question, lean=lean)
     
     async def get_all_domains(self, db: AsyncSession) -> List[str]:
         """Get list of all available domains from database"""
@@ -378,9 +548,9 @@ class QuestionManager:
         )
         domains = [row[0] for row in result.all()]
         
-        # If no domains found, return ONLY THESE 4 CATEGORIES
+        # If no domains found, return the categories the app serves
         if not domains:
-            domains = ["Logical Reasoning", "Quantitative Aptitude", "Verbal Ability", "Coding Challenge"]
+            domains = list(QUESTION_CATEGORIES)
         
         print(f"🌐 Available domains in DB: {domains}")
         return domains
@@ -419,51 +589,35 @@ class QuestionManager:
     async def refresh_question_bank(self, db: AsyncSession, domains: List[str] = None, 
                                   difficulties: List[str] = None, questions_per_combination: int = 3) -> int:
         """Refresh question bank by generating new questions"""
-        # Use ONLY THESE 4 CATEGORIES
+        # Only the categories the app serves
         if domains is None:
-            domains = ["Logical Reasoning", "Quantitative Aptitude", "Verbal Ability", "Coding Challenge"]
+            domains = QUESTION_CATEGORIES
         
         if difficulties is None:
-            difficulties = ["easy", "medium", "hard"]
+            difficulties = QUESTION_DIFFICULTIES
         
         total_generated = 0
+        if not self.ai_generator.available():
+            print("⚡ LLM unavailable, question bank refresh skipped")
+            return total_generated
         
-        for domain in domains:
-            for difficulty in difficulties:
-                print(f"🤖 Generating {questions_per_combination} {difficulty} questions for {domain}")
-                new_questions = self.ai_generator.generate_questions(domain, questions_per_combination, difficulty)
-                
-                if new_questions:
-                    saved_count = 0
-                    for q_data in new_questions:
-                        # Check if question already exists
-                        result = await db.execute(
-                            select(AptitudeQuestion).where(
-                                AptitudeQuestion.question_text == q_data["question_text"]
-                            )
-                        )
-                        existing_question = result.scalars().first()
-                        
-                        if not existing_question:
-                            # Create new database entry
-                            from datetime import datetime
-                            question = AptitudeQuestion(
-                                category=q_data["category"],
-                                subcategory=q_data.get("subcategory", "General"),
-                                difficulty=q_data.get("difficulty", "medium"),
-                                question_text=q_data["question_text"],
-                                options=q_data["options"],
-                                correct_answer=q_data["correct_answer"],
-                                explanation=q_data.get("explanation", ""),
-                                time_limit=q_data.get("time_limit", 60)
-                            )
-                            db.add(question)
-                            saved_count += 1
-                    
-                    if saved_count > 0:
-                        await db.commit()
-                        total_generated += saved_count
-                        print(f"✅ Added {saved_count} new questions for {domain}/{difficulty}")
+        async def generate(domain: str, difficulty: str):
+            print(f"🤖 Generating {questions_per_combination} {difficulty} questions for {domain}")
+            return domain, difficulty, await self.ai_generator.generate_questions(domain, questions_per_combination, difficulty)
+        
+        # All combinations at once - the LLM rate limiter bounds concurrency and pace.
+        # Batches are saved one at a time as they arrive (the session is not shared).
+        for next_batch in asyncio.as_completed([
+            generate(domain, difficulty) for domain in domains for difficulty in difficulties
+        ]):
+            domain, difficulty, new_questions = await next_batch
+            if not new_questions:
+                continue
+            
+            added_questions = (await self.save_generated_questions(db, new_questions))["saved"]
+            if added_questions:
+                total_generated += len(added_questions)
+                print(f"✅ Added {len(added_questions)} new questions for {domain}/{difficulty}")
         
         print(f"🎉 Total new questions generated: {total_generated}")
         return total_generated
\ No newline at end of file
@@ -0,0 +1,257 @@
+# backend/utils/question_replenisher.py
+"""
+Background replenishment of the question bank and SJT scenarios
+
+Inventory is tracked per (category, difficulty) and per SJT category as the
+number of items nobody has answered yet ("unseen"). Every CHECK_INTERVAL the
+replenisher measures it, and each target below its low-water mark is queued;
+a single worker then generates batches for it until it is back at the
+high-water mark. Request paths never call the LLM - when they run short they
+only nudge() the replenisher and serve what exists.
+
+A target whose batch adds nothing (LLM down, everything a duplicate) backs off
+for FAILURE_BACKOFF seconds. While the LLM circuit breaker is open no batch is
+attempted: targets wait out the breaker and the existing stock is served.
+metrics() reports queue depth and inventory.
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import select, func, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import AsyncSessionLocal
+from backend.db_models import AptitudeAttempt, AptitudeQuestion, AptitudeTest, SJTScenario
+from backend.utils.circuit_breaker import llm_circuit_breaker
+from backend.utils.question_bank_index import question_bank_index
+from backend.utils.question_exposure import question_exposure
+
+QUESTION_CATEGORIES = [c.strip() for c in os.getenv("QUESTION_CATEGORIES", "Logical,Quantitative,Verbal,Coding").split(",")]
+QUESTION_DIFFICULTIES = ["easy", "medium", "hard"]
+SJT_CATEGORIES = ["Teamwork", "Leadership", "Problem Solving", "Communication", "Ethics"]
+
+QUESTION_LOW_WATER = int(os.getenv("QUESTION_LOW_WATER", 50))
+QUESTION_HIGH_WATER = int(os.getenv("QUESTION_HIGH_WATER", 150))
+SJT_LOW_WATER = int(os.getenv("SJT_LOW_WATER", 15))
+SJT_HIGH_WATER = int(os.getenv("SJT_HIGH_WATER", 50))
+GENERATION_BATCH = int(os.getenv("AI_GENERATION_BATCH", 10))  # items asked of the LLM per call
+CHECK_INTERVAL = int(os.getenv("REPLENISH_CHECK_INTERVAL", 60))  # seconds between inventory checks
+FAILURE_BACKOFF = 300  # seconds before retrying a target whose batch added nothing
+
+Target = Tuple[str, str, str]  # ("question", category, difficulty) or ("sjt", category, "")
+
+
+class QuestionReplenisher:
+    def __init__(self):
+        self._queue: "asyncio.Queue[Target]" = None
+        self._queued: Set[Target] = set()
+        self._inventory: Dict[Target, Dict[str, int]] = {}
+        self._backoff_until: Dict[Target, float] = {}
+        self._generated: Dict[Target, int] = {}
+        self._task = None
+        self._question_manager = None
+        self._sjt_manager = None
+        self.in_flight: Optional[Target] = None
+        self.failures = 0
+        self.last_check: Optional[float] = None
+
+    # =================== LIFECYCLE ===================
+    def start(self, question_manager, sjt_manager):
+        """Start the worker (app startup); generation goes through the managers' save paths"""
+        if self._task is not None:
+            return
+        self._question_manager, self._sjt_manager = question_manager, sjt_manager
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+        print(f"🌱 Question replenisher started (low {QUESTION_LOW_WATER} / high {QUESTION_HIGH_WATER}, "
+              f"SJT low {SJT_LOW_WATER} / high {SJT_HIGH_WATER})")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    # =================== DEMAND SIGNALS ===================
+    def nudge(self, category: str, difficulty: str = "all"):
+        """A request ran short on questions: refill now instead of at the next check"""
+        difficulties = QUESTION_DIFFICULTIES if difficulty == "all" else [difficulty]
+        for level in difficulties:
+            self._enqueue(("question", category, level))
+
+    def nudge_sjt(self, category: str = None):
+        for sjt_category in [category] if category else SJT_CATEGORIES:
+            self._enqueue(("sjt", sjt_category, ""))
+
+    def _enqueue(self, target: Target):
+        # Only configured targets - request paths pass user input through here
+        kind, category, difficulty = target
+        known = SJT_CATEGORIES if kind == "sjt" else QUESTION_CATEGORIES
+        if self._queue is None or category not in known or target in self._queued:
+            return
+        if kind == "question" and difficulty not in QUESTION_DIFFICULTIES:
+            return
+        if self._backoff_until.get(target, 0) > time.monotonic():
+            return
+        self._queued.add(target)
+        self._queue.put_nowait(target)
+
+    # =================== WORKER ===================
+    async def _run(self):
+        while True:
+            try:
+                if self.last_check is None or time.monotonic() - self.last_check >= CHECK_INTERVAL:
+                    await self._check()
+                try:
+                    target = await asyncio.wait_for(self._queue.get(), timeout=CHECK_INTERVAL)
+                except asyncio.TimeoutError:
+                    continue
+                self._queued.discard(target)
+                await self._refill(target)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Question replenisher error: {e}")
+                await asyncio.sleep(CHECK_INTERVAL)
+
+    async def _check(self):
+        """Measure inventory and queue every target below its low-water mark"""
+        async with AsyncSessionLocal() as session:
+            self._inventory = await self.measure(session)
+        self.last_check = time.monotonic()
+        for target, levels in self._inventory.items():
+            if levels["unseen"] < self._water_marks(target)[0]:
+                self._enqueue(target)
+
+    async def _refill(self, target: Target):
+        kind, category, difficulty = target
+        levels = self._inventory.setdefault(target, {"total": 0, "unseen": 0})
+        high_water = self._water_marks(target)[1]
+        if levels["unseen"] >= high_water:
+            return
+        if llm_circuit_breaker.is_open():
+            # Not this target's failure - try again once the breaker lets a call through
+            self._backoff_until[target] = time.monotonic() + llm_circuit_breaker.retry_in()
+            return
+
+        self.in_flight = target
+        try:
+            batch = min(GENERATION_BATCH, high_water - levels["unseen"])
+            async with AsyncSessionLocal() as session:
+                if kind == "sjt":
+                    added = await self._sjt_manager.generate_and_save_scenarios(session, category, batch)
+                else:
+                    added = len(await self._question_manager.generate_and_save_questions(
+                        session, category, batch, difficulty
+                    ))
+        finally:
+            self.in_flight = None
+
+        if not added:
+            self.failures += 1
+            self._backoff_until[target] = time.monotonic() + FAILURE_BACKOFF
+            print(f"⚠️ Replenishing {self._label(target)} added nothing, retrying in {FAILURE_BACKOFF}s")
+            return
+
+        levels["total"] += added
+        levels["unseen"] += added
+        self._generated[target] = self._generated.get(target, 0) + added
+        print(f"🌱 Replenished {self._label(target)}: +{added} ({levels['unseen']}/{high_water} unseen)")
+        if levels["unseen"] < high_water:
+            self._enqueue(target)
+
+    # =================== INVENTORY ===================
+    async def measure(self, db: AsyncSession) -> Dict[Target, Dict[str, int]]:
+        """Total and unseen (never answered) items per target"""
+        inventory = {
+            ("question", category, difficulty): {"total": 0, "unseen": 0}
+            for category in QUESTION_CATEGORIES for difficulty in QUESTION_DIFFICULTIES
+        }
+        inventory.update({("sjt", category, ""): {"total": 0, "unseen": 0} for category in SJT_CATEGORIES})
+
+        if question_bank_index.loaded and question_exposure.loaded:
+            for category in QUESTION_CATEGORIES:
+                for difficulty in QUESTION_DIFFICULTIES:
+                    inventory[("question", category, difficulty)] = {
+                        "total": question_bank_index.count(category, difficulty),
+                        "unseen": question_bank_index.unexposed_count(category, difficulty),
+                    }
+        else:
+            answered = exists().where(
+                AptitudeAttempt.question_id == AptitudeQuestion.id,
+                AptitudeTest.id == AptitudeAttempt.test_id,
+                AptitudeTest.test_type != "sjt"
+            )
+            result = await db.execute(
+                select(
+                    AptitudeQuestion.category, AptitudeQuestion.difficulty,
+                    func.count(), func.count().filter(~answered)
+                )
+                .where(AptitudeQuestion.category.in_(QUESTION_CATEGORIES))
+                .group_by(AptitudeQuestion.category, AptitudeQuestion.difficulty)
+            )
+            for category, difficulty, total, unseen in result.all():
+                if ("question", category, difficulty) in inventory:
+                    inventory[("question", category, difficulty)] = {"total": total, "unseen": unseen}
+
+        # SJT attempts store scenario IDs in aptitude_attempts.question_id
+        answered = exists().where(
+            AptitudeAttempt.question_id == SJTScenario.id,
+            AptitudeTest.id == AptitudeAttempt.test_id,
+            AptitudeTest.test_type == "sjt"
+        )
+        result = await db.execute(
+            select(SJTScenario.category, func.count(), func.count().filter(~answered))
+            .where(SJTScenario.category.in_(SJT_CATEGORIES))
+            .group_by(SJTScenario.category)
+        )
+        for category, total, unseen in result.all():
+            inventory[("sjt", category, "")] = {"total": total, "unseen": unseen}
+        return inventory
+
+    # =================== METRICS ===================
+    def metrics(self) -> Dict:
+        now = time.monotonic()
+        return {
+            "running": self._task is not None,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queued": [self._label(target) for target in self._queued],
+            "in_flight": self._label(self.in_flight) if self.in_flight else None,
+            "failures": self.failures,
+            "seconds_since_check": round(now - self.last_check, 1) if self.last_check else None,
+            "water_marks": {
+                "questions": {"low": QUESTION_LOW_WATER, "high": QUESTION_HIGH_WATER},
+                "sjt": {"low": SJT_LOW_WATER, "high": SJT_HIGH_WATER},
+            },
+            "inventory": {
+                self._label(target): {
+                    **levels,
+                    "below_low_water": levels["unseen"] < self._water_marks(target)[0],
+                    "generated": self._generated.get(target, 0),
+                    "backoff_seconds": max(0, round(self._backoff_until.get(target, 0) - now)),
+                }
+                for target, levels in sorted(self._inventory.items())
+            },
+        }
+
+    @staticmethod
+    def _water_marks(target: Target) -> Tuple[int, int]:
+        if target[0] == "sjt":
+            return SJT_LOW_WATER, SJT_HIGH_WATER
+        return QUESTION_LOW_WATER, QUESTION_HIGH_WATER
+
+    @staticmethod
+    def _label(target: Target) -> str:
+        kind, category, difficulty = target
+        return f"sjt/{category}" if kind == "sjt" else f"{category}/{difficulty}"
+
+
+# Global instance
+question_replenisher = QuestionReplenisher()
@@ -0,0 +1,131 @@
+# backend/utils/rate_limiter.py
+"""
+Client-side rate limiting for LLM calls
+
+The provider enforces requests-per-minute and tokens-per-minute limits; going
+over them only buys 429s and retry sleeps. LLMRateLimiter keeps every call in
+the process under both with two token buckets, and caps how many calls are in
+flight at once, so callers can fan out generation freely (asyncio.gather) and
+the limiter decides the pace.
+
+A call reserves its estimated token cost up front (prompt size + max_tokens)
+and gives back what it did not use once the response reports actual usage.
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+AI_REQUESTS_PER_MINUTE = int(os.getenv("AI_REQUESTS_PER_MINUTE", 30))
+AI_TOKENS_PER_MINUTE = int(os.getenv("AI_TOKENS_PER_MINUTE", 20_000))
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", 4))
+
+
+class TokenBucket:
+    """Holds up to `capacity` tokens, refilled continuously at `rate` tokens per second"""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self.bind()
+
+    def bind(self):
+        """(Re)create the asyncio primitives for the running event loop"""
+        self._lock = asyncio.Lock()
+        self._refunded = asyncio.Event()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1):
+        """Wait until `amount` tokens are available and take them (callers are served in order)"""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self._tokens < amount:
+                # Sleep until refilled, or until a refund makes room sooner
+                self._refunded.clear()
+                try:
+                    await asyncio.wait_for(self._refunded.wait(), timeout=(amount - self._tokens) / self.rate)
+                except asyncio.TimeoutError:
+                    pass
+                self._refill()
+            self._tokens -= amount
+
+    def refund(self, amount: float):
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + amount)
+        self._refunded.set()
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+
+class LLMRateLimiter:
+    def __init__(self, requests_per_minute: int = AI_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = AI_TOKENS_PER_MINUTE, max_concurrency: int = AI_MAX_CONCURRENCY):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+        self.max_concurrency = max_concurrency
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop = None
+        self.waiting = 0
+        self.in_flight = 0
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Bound to the running loop (scripts may call asyncio.run() more than once)
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots, self._slots_loop = asyncio.Semaphore(self.max_concurrency), loop
+            self.requests.bind()
+            self.tokens.bind()
+        return self._slots
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int):
+        """
+        Wait for a concurrency slot and for room in both buckets. Yields a dict;
+        set "tokens_used" in it to refund the unused part of the estimate.
+        """
+        usage = {"tokens_used": None}
+        admitted = False
+        self.waiting += 1
+        try:
+            async with self._semaphore():
+                await self.requests.acquire(1)
+                await self.tokens.acquire(estimated_tokens)
+                self.waiting -= 1
+                admitted = True
+                self.in_flight += 1
+                try:
+                    yield usage
+                finally:
+                    self.in_flight -= 1
+                    if usage["tokens_used"] is not None and usage["tokens_used"] < estimated_tokens:
+                        self.tokens.refund(estimated_tokens - usage["tokens_used"])
+        finally:
+            if not admitted:
+                self.waiting -= 1  # cancelled while queued
+
+    def stats(self) -> dict:
+        return {
+            "requests_per_minute": round(self.requests.rate * 60),
+            "tokens_per_minute": round(self.tokens.rate * 60),
+            "max_concurrency": self.max_concurrency,
+            "request_budget": round(self.requests.available, 1),
+            "token_budget": round(self.tokens.available),
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+        }
+
+
+# Global instance - shared by every LLM call in the process
+llm_rate_limiter = LLMRateLimiter()
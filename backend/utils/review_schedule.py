@@ -0,0 +1,113 @@
+# backend/utils/review_schedule.py
+"""
+Spaced-repetition review of missed questions
+
+Every practice answer updates one row of aptitude_review_items (SM-2 style):
+a wrong answer (re)schedules the question FIRST_INTERVAL_DAYS out and lowers
+its ease; a correct answer on a scheduled question stretches the interval by
+the ease factor, and after GRADUATE_STREAK correct reviews in a row the
+question leaves the queue. Each update is a single B-tree lookup/write on the
+(user_id, question_id) index, and a review set is a range read on
+(user_id, category, due_at) - the attempt history is never scanned per request.
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+
+from backend.db_models import AptitudeQuestion, AptitudeReviewItem
+
+FIRST_INTERVAL_DAYS = float(os.getenv("REVIEW_FIRST_INTERVAL_DAYS", 1))
+GRADUATE_STREAK = int(os.getenv("REVIEW_GRADUATE_STREAK", 3))
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+EASE_PENALTY = 0.2
+
+
+class ReviewSchedule:
+    async def record_answer(self, db: AsyncSession, user_id: int, question_id: int, category: str,
+                            is_correct: bool):
+        """Reschedule question_id after an answer; the caller commits"""
+        now = datetime.utcnow()
+        if not is_correct:
+            table = AptitudeReviewItem.__table__
+            insert = pg_insert(AptitudeReviewItem).values(
+                user_id=user_id, question_id=question_id, category=category,
+                due_at=now + timedelta(days=FIRST_INTERVAL_DAYS), interval_days=FIRST_INTERVAL_DAYS,
+                ease=DEFAULT_EASE, streak=0, lapses=1, updated_at=now
+            )
+            await db.execute(insert.on_conflict_do_update(
+                index_elements=["user_id", "question_id"],
+                set_={
+                    "due_at": insert.excluded.due_at,
+                    "interval_days": FIRST_INTERVAL_DAYS,
+                    "ease": func.greatest(MIN_EASE, table.c.ease - EASE_PENALTY),
+                    "streak": 0,
+                    "lapses": table.c.lapses + 1,
+                    "updated_at": now,
+                }
+            ))
+            return
+
+        # Correct: only questions already in the queue move
+        result = await db.execute(
+            select(AptitudeReviewItem)
+            .where(AptitudeReviewItem.user_id == user_id, AptitudeReviewItem.question_id == question_id)
+            .with_for_update()
+        )
+        item = result.scalar_one_or_none()
+        if item is None:
+            return
+        if item.streak + 1 >= GRADUATE_STREAK:
+            await db.execute(delete(AptitudeReviewItem).where(AptitudeReviewItem.id == item.id))
+            return
+        item.streak += 1
+        item.interval_days = item.interval_days * item.ease
+        item.due_at = now + timedelta(days=item.interval_days)
+        item.updated_at = now
+
+    async def due_questions(self, db: AsyncSession, user_id: int, category: str, count: int,
+                            columns=None) -> List[AptitudeQuestion]:
+        """Up to `count` of the user's questions due for review in category, most overdue first"""
+        query = (
+            select(AptitudeQuestion)
+            .join(AptitudeReviewItem, AptitudeReviewItem.question_id == AptitudeQuestion.id)
+            .where(
+                AptitudeReviewItem.user_id == user_id,
+                AptitudeReviewItem.category == category,
+                AptitudeReviewItem.due_at <= datetime.utcnow()
+            )
+            .order_by(AptitudeReviewItem.due_at)
+            .limit(count)
+        )
+        if columns:
+            query = query.options(load_only(*columns))
+        result = await db.execute(query)
+        return list(result.scalars().all())
+
+    async def summary(self, db: AsyncSession, user_id: int) -> Dict[str, Dict]:
+        """Per category: questions due now, questions queued, and the next due date"""
+        now = datetime.utcnow()
+        result = await db.execute(
+            select(
+                AptitudeReviewItem.category,
+                func.count().filter(AptitudeReviewItem.due_at <= now),
+                func.count(),
+                func.min(AptitudeReviewItem.due_at),
+            )
+            .where(AptitudeReviewItem.user_id == user_id)
+            .group_by(AptitudeReviewItem.category)
+        )
+        return {
+            category: {"due": due, "scheduled": scheduled, "next_due_at": next_due.isoformat()}
+            for category, due, scheduled, next_due in result.all()
+        }
+
+
+# Global instance
+review_schedule = ReviewSchedule()
@@ -0,0 +1,204 @@
+# backend/utils/seen_questions.py
+"""
+Questions each user has already attempted, per category
+
+SeenBitmap is a small roaring-style compressed bitmap: question IDs are split
+by their high 16 bits into containers, each either a sorted array of the low
+16 bits (sparse) or an 8 KB bitmap (dense). Membership is O(1)/O(log n), so
+the sampler can skip seen questions while drawing IDs instead of sending a
+NOT IN subquery over the attempts table. Serialised with zlib.
+
+SeenQuestionStore keeps one bitmap per (user, category) in
+aptitude_seen_questions. The row is seeded from AptitudeAttempt history on the
+user's first answer in a category; after that every submitted answer updates
+it in the same transaction.
+"""
+
+import struct
+import zlib
+from array import array
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db_models import AptitudeAttempt, AptitudeQuestion, AptitudeSeenQuestions, AptitudeTest
+
+ARRAY_CONTAINER_LIMIT = 4096  # above this many IDs a 8 KB bitmap is smaller than an array
+_BITMAP_BYTES = 1 << 13
+_HEADER = struct.Struct("<HBI")  # high bits, container kind, length
+
+Container = Union[array, bytearray]
+
+
+class SeenBitmap:
+    def __init__(self, values: Iterable[int] = ()):
+        self._containers: Dict[int, Container] = {}
+        self.update(values)
+
+    # =================== UPDATES ===================
+    def add(self, value: int):
+        high, low = value >> 16, value & 0xFFFF
+        container = self._containers.get(high)
+        if container is None:
+            self._containers[high] = array("H", [low])
+        elif isinstance(container, bytearray):
+            container[low >> 3] |= 1 << (low & 7)
+        else:
+            index = bisect_left(container, low)
+            if index < len(container) and container[index] == low:
+                return
+            if len(container) >= ARRAY_CONTAINER_LIMIT:
+                self._containers[high] = bitmap = bytearray(_BITMAP_BYTES)
+                for existing in container:
+                    bitmap[existing >> 3] |= 1 << (existing & 7)
+                bitmap[low >> 3] |= 1 << (low & 7)
+            else:
+                insort(container, low)
+
+    def update(self, values: Iterable[int]):
+        for value in values:
+            self.add(value)
+
+    def __ior__(self, other: "SeenBitmap") -> "SeenBitmap":
+        for value in other:
+            self.add(value)
+        return self
+
+    # =================== QUERIES ===================
+    def __contains__(self, value: int) -> bool:
+        container = self._containers.get(value >> 16)
+        if container is None:
+            return False
+        low = value & 0xFFFF
+        if isinstance(container, bytearray):
+            return bool(container[low >> 3] & (1 << (low & 7)))
+        index = bisect_left(container, low)
+        return index < len(container) and container[index] == low
+
+    def __iter__(self) -> Iterator[int]:
+        for high in sorted(self._containers):
+            container = self._containers[high]
+            base = high << 16
+            if isinstance(container, bytearray):
+                for byte_index, byte in enumerate(container):
+                    if byte:
+                        for bit in range(8):
+                            if byte & (1 << bit):
+                                yield base | (byte_index << 3) | bit
+            else:
+                for low in container:
+                    yield base | low
+
+    def __len__(self) -> int:
+        return sum(
+            sum(bin(byte).count("1") for byte in container) if isinstance(container, bytearray) else len(container)
+            for container in self._containers.values()
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self._containers)
+
+    def unseen(self, question_ids: Iterable[int]) -> List[int]:
+        """question_ids minus the bitmap"""
+        return [qid for qid in question_ids if qid not in self]
+
+    # =================== SERIALISATION ===================
+    def to_bytes(self) -> bytes:
+        parts = []
+        for high in sorted(self._containers):
+            container = self._containers[high]
+            if isinstance(container, bytearray):
+                parts.append(_HEADER.pack(high, 1, len(container)))
+                parts.append(bytes(container))
+            else:
+                parts.append(_HEADER.pack(high, 0, len(container)))
+                parts.append(container.tobytes())
+        return zlib.compress(b"".join(parts))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SeenBitmap":
+        bitmap = cls()
+        raw = zlib.decompress(data)
+        offset = 0
+        while offset < len(raw):
+            high, kind, length = _HEADER.unpack_from(raw, offset)
+            offset += _HEADER.size
+            if kind == 1:
+                bitmap._containers[high] = bytearray(raw[offset:offset + length])
+                offset += length
+            else:
+                container = array("H")
+                container.frombytes(raw[offset:offset + length * 2])
+                bitmap._containers[high] = container
+                offset += length * 2
+        return bitmap
+
+
+class SeenQuestionStore:
+    async def get(self, db: AsyncSession, user_id: int, category: str) -> SeenBitmap:
+        """The user's seen questions in category (from attempt history until the first stored row)"""
+        row = await self._load_row(db, user_id, category)
+        if row is not None:
+            return SeenBitmap.from_bytes(row.bitmap)
+        return await self._from_history(db, user_id, category)
+
+    async def get_many(self, db: AsyncSession, user_id: int, categories: Iterable[str]) -> SeenBitmap:
+        """Union of the user's seen questions over several categories"""
+        seen = SeenBitmap()
+        for category in categories:
+            seen |= await self.get(db, user_id, category)
+        return seen
+
+    async def mark_seen(self, db: AsyncSession, user_id: int, category: str, question_ids: Iterable[int]):
+        """Add question_ids to the user's set; the caller commits"""
+        row = await self._load_row(db, user_id, category, for_update=True)
+        if row is None:
+            # First answer in this category: seed the row from history (the new
+            # attempt is already in the session, so it is included)
+            seen = await self._from_history(db, user_id, category)
+            await db.execute(
+                pg_insert(AptitudeSeenQuestions)
+                .values(user_id=user_id, category=category, bitmap=seen.to_bytes(), question_count=len(seen))
+                .on_conflict_do_nothing(index_elements=["user_id", "category"])
+            )
+            row = await self._load_row(db, user_id, category, for_update=True)
+
+        seen = SeenBitmap.from_bytes(row.bitmap)
+        seen.update(question_ids)
+        row.bitmap = seen.to_bytes()
+        row.question_count = len(seen)
+        row.updated_at = datetime.utcnow()
+
+    async def _load_row(self, db: AsyncSession, user_id: int, category: str,
+                        for_update: bool = False) -> Optional[AptitudeSeenQuestions]:
+        query = select(AptitudeSeenQuestions).where(
+            AptitudeSeenQuestions.user_id == user_id,
+            AptitudeSeenQuestions.category == category
+        )
+        if for_update:
+            query = query.with_for_update().execution_options(populate_existing=True)
+        result = await db.execute(query)
+        return result.scalar_one_or_none()
+
+    async def _from_history(self, db: AsyncSession, user_id: int, category: str) -> SeenBitmap:
+        # SJT attempts store scenario IDs in question_id - leave them out
+        result = await db.execute(
+            select(AptitudeAttempt.question_id)
+            .join(AptitudeTest, AptitudeTest.id == AptitudeAttempt.test_id)
+            .join(AptitudeQuestion, AptitudeQuestion.id == AptitudeAttempt.question_id)
+            .where(
+                AptitudeTest.user_id == user_id,
+                AptitudeTest.test_type != "sjt",
+                AptitudeQuestion.category == category
+            )
+            .distinct()
+        )
+        return SeenBitmap(result.scalars())
+
+
+# Global instance
+seen_questions = SeenQuestionStore()
@@ -0,0 +1,63 @@
+# backend/utils/single_flight.py
+"""
+Coalescing of duplicate generation work
+
+SingleFlight runs one call per key at a time inside this process: concurrent
+callers with the same key await the first caller's result instead of repeating
+the work. advisory_xact_lock extends that across app workers with a Postgres
+transaction-level advisory lock, released on commit or rollback (or when the
+holder's connection dies).
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await fn() - or, if a call with this key is already running, its result.
+        The call runs as its own task so one caller going away does not cancel
+        it for the others; fn must therefore not use the caller's DB session.
+        """
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda finished: self._forget(key, finished))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled():
+            task.exception()  # retrieved by the callers; don't warn if none were left
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+
+async def advisory_xact_lock(db: AsyncSession, key: str, wait: bool = True) -> bool:
+    """
+    Take the advisory lock for key until db's transaction ends. With wait=False
+    returns False at once if another transaction holds it.
+    """
+    if wait:
+        await db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": key})
+        return True
+    result = await db.execute(text("SELECT pg_try_advisory_xact_lock(hashtext(:key))"), {"key": key})
+    return bool(result.scalar())
+
+
+# Global instance - keys are (kind, category, difficulty)
+generation_flights = SingleFlight()
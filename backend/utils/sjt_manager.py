@@ -9,17 +9,23 @@ from typing import List, Dict
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from backend.db_models import SJTScenario
-from backend.utils.ai_question_generator import AIQuestionGenerator
+from backend.utils.ai_question_generator import AIQuestionGenerator, get_ai_generator
+from backend.utils.content_hash import dedupe_by_content_hash, insert_new_rows
+from backend.utils.question_replenisher import question_replenisher
+from backend.utils.single_flight import advisory_xact_lock
 
 
 class SJTManager:
     def __init__(self):
-        self.ai_generator = AIQuestionGenerator()
         print("✅ SJT Manager initialized")
     
+    @property
+    def ai_generator(self) -> AIQuestionGenerator:
+        return get_ai_generator()
+    
     async def get_scenarios_by_category(self, db: AsyncSession, category: str = None, count: int = 10) -> List[Dict]:
         """
-        Get SJT scenarios from database, generating new ones if needed
+        Get SJT scenarios from database (the replenisher generates more when short)
         """
         print(f"🔧 Getting {count} SJT scenarios for category: {category or 'all'}")
         
@@ -37,28 +43,11 @@ class SJTManager:
             
             print(f"🔧 Found {len(available_scenarios)} SJT scenarios in database")
             
-            # If not enough scenarios, generate more
+            # Not enough scenarios: serve what there is, the replenisher generates more
+            # in the background (requests never wait on the LLM)
             if len(available_scenarios) < count:
-                needed = count - len(available_scenarios)
-                print(f"🔄 Need {needed} more SJT scenarios, generating via AI...")
-                
-                # Determine category for generation
-                gen_category = category or random.choice(["Teamwork", "Leadership", "Problem Solving", "Communication", "Ethics"])
-                
-                # Generate new scenarios
-                await self._generate_and_save_scenarios(db, gen_category, needed)
-                
-                # Re-query to get all scenarios including new ones
-                if category:
-                    query = select(SJTScenario).where(
-                        SJTScenario.category == category
-                    ).limit(count * 2)
-                else:
-                    query = select(SJTScenario).limit(count * 2)
-                
-                result = await db.execute(query)
-                available_scenarios = result.scalars().all()
-                print(f"✅ Now have {len(available_scenarios)} total SJT scenarios")
+                print(f"🔄 Only {len(available_scenarios)}/{count} SJT scenarios, queued for replenishment")
+                question_replenisher.nudge_sjt(category)
             
             # Select final scenarios randomly
             if len(available_scenarios) > count:
@@ -77,56 +66,68 @@ class SJTManager:
             traceback.print_exc()
             return []
     
-    async def _generate_and_save_scenarios(self, db: AsyncSession, category: str, count: int) -> bool:
-        """Generate new SJT scenarios using AI and save to database"""
+    async def generate_and_save_scenarios(self, db: AsyncSession, category: str, count: int) -> int:
+        """Generate new SJT scenarios using AI and save to database; returns how many were saved"""
+        if not self.ai_generator.available():
+            print(f"⚡ LLM unavailable, not generating SJT scenarios for {category}")
+            return 0
         try:
+            # One generation per category across workers, held until the batch is committed
+            if not await advisory_xact_lock(db, f"sjt-generation:{category}", wait=False):
+                print(f"⏭️ SJT scenarios for {category} are already being generated elsewhere")
+                await db.rollback()
+                return 0
+            
             print(f"🤖 Generating {count} new SJT scenarios for {category}")
             
             # Generate scenarios via AI
-            new_scenarios = self.ai_generator.generate_sjt_scenarios(category, count)
+            new_scenarios = await self.ai_generator.generate_sjt_scenarios(category, count)
             
             if not new_scenarios:
                 print("❌ AI generator returned no SJT scenarios")
-                return False
+                await db.rollback()
+                return 0
             
-            saved_count = 0
-            for s_data in new_scenarios:
-                # Check if scenario already exists
-                result = await db.execute(
-                    select(SJTScenario).where(
-                        SJTScenario.scenario_text == s_data["scenario_text"]
-                    )
-                )
-                existing_scenario = result.scalars().first()
-                
-                if existing_scenario:
-                    print(f"⚠️ SJT scenario already exists in DB: {existing_scenario.id}")
-                else:
-                    # Create new database entry
-                    from datetime import datetime
-                    scenario = SJTScenario(
-                        scenario_text=s_data["scenario_text"],
-                        options=s_data["options"],
-                        most_effective=s_data["most_effective"],
-                        least_effective=s_data["least_effective"],
-                        explanation=s_data.get("explanation", ""),
-                        category=s_data["category"]
-                    )
-                    db.add(scenario)
-                    await db.commit()  # Commit each to avoid session issues
-                    await db.refresh(scenario)
-                    saved_count += 1
-                    print(f"✅ Saved new SJT scenario to DB: {scenario.id}")
+            saved_count = len((await self.save_generated_scenarios(db, new_scenarios))["saved"])
             
             print(f"🎉 Saved {saved_count} new SJT scenarios")
-            return saved_count > 0
+            return saved_count
             
         except Exception as e:
             await db.rollback()
             print(f"❌ Error generating/saving SJT scenarios: {e}")
             import traceback
             traceback.print_exc()
-            return False
+            return 0
+    
+    async def save_generated_scenarios(self, db: AsyncSession, new_scenarios: List[Dict], commit: bool = True) -> Dict:
+        """
+        Dedupe and save a batch from the AI generator.
+        Returns {"saved": rows, "duplicates": n}; with commit=False the caller commits.
+        """
+        # One content_hash lookup for the whole batch
+        fresh_scenarios, existing_scenarios = await dedupe_by_content_hash(
+            db, SJTScenario, new_scenarios, "scenario_text"
+        )
+        for existing_scenario in existing_scenarios:
+            print(f"⚠️ SJT scenario already exists in DB: {existing_scenario.id}")
+        
+        # One statement; scenarios another worker saved since the lookup are skipped
+        scenarios = await insert_new_rows(db, SJTScenario, [
+            dict(
+                scenario_text=s_data["scenario_text"],
+                options=s_data["options"],
+                most_effective=s_data["most_effective"],
+                least_effective=s_data["least_effective"],
+                explanation=s_data.get("explanation", ""),
+                category=s_data["category"],
+                content_hash=s_data["content_hash"]
+            )
+            for s_data in fresh_scenarios
+        ])
+        if commit:
+            await db.commit()
+        return {"saved": scenarios, "duplicates": len(new_scenarios) - len(scenarios)}
     
     def _scenario_to_dict(self, scenario) -> Dict:
         """Convert SQLAlchemy SJT scenario object to dict"""
@@ -0,0 +1,66 @@
+# backend/utils/test_blueprint.py
+"""
+Test blueprints - how many questions of each (category, difficulty) a test needs
+
+build_quotas splits a test length over categories and the difficulty mix with
+largest-remainder rounding, so the quotas always add up to the exact total.
+rebalance_quotas moves quota a stratum cannot fill (not enough stock) to other
+difficulties of the same category first, then to any category with spare stock.
+"""
+
+import random
+from typing import Dict, List, Tuple
+
+# 40% easy, 40% medium, 20% hard
+MOCK_DIFFICULTY_MIX = {"easy": 0.4, "medium": 0.4, "hard": 0.2}
+
+Quotas = Dict[Tuple[str, str], int]
+
+
+def build_quotas(categories: List[str], total: int, mix: Dict[str, float] = MOCK_DIFFICULTY_MIX) -> Quotas:
+    """Exact per-(category, difficulty) question counts summing to total"""
+    if not categories:
+        return {}
+
+    exact = {
+        (category, difficulty): total * share / len(categories)
+        for category in categories
+        for difficulty, share in mix.items()
+    }
+    quotas = {key: int(value) for key, value in exact.items()}
+
+    # Hand out the rounding remainder by largest fractional part (random tie-break
+    # so the same categories don't always get the extra question)
+    remainder = total - sum(quotas.values())
+    by_fraction = sorted(exact, key=lambda key: (exact[key] - quotas[key], random.random()), reverse=True)
+    for key in by_fraction[:remainder]:
+        quotas[key] += 1
+
+    return quotas
+
+
+def rebalance_quotas(quotas: Quotas, available: Dict[Tuple[str, str], int]) -> Quotas:
+    """Cap quotas at available stock and move the shortfall to strata with spare stock"""
+    plan = {key: min(count, available.get(key, 0)) for key, count in quotas.items()}
+
+    def spread(keys, shortfall):
+        # One question at a time, round-robin, bigger quotas first - keeps the
+        # result as close to the intended mix as the stock allows
+        keys = sorted(keys, key=lambda key: quotas[key], reverse=True)
+        while shortfall > 0:
+            open_keys = [key for key in keys if available.get(key, 0) > plan[key]]
+            if not open_keys:
+                break
+            for key in open_keys[:shortfall]:
+                plan[key] += 1
+                shortfall -= 1
+
+    # Same category first, so a short "hard" bucket is made up with medium/easy
+    for category in {category for category, _ in quotas}:
+        keys = [key for key in quotas if key[0] == category]
+        spread(keys, sum(quotas[key] - plan[key] for key in keys))
+
+    # Then anything left over from any category with stock to spare
+    spread(list(quotas), sum(quotas.values()) - sum(plan.values()))
+
+    return plan
@@ -87,6 +87,17 @@ export const generateAIQuestions = async (
   }
 };
 
+// Progress of a queued AI generation job (Admin only)
+export const getGenerationJob = async (jobId) => {
+  try {
+    const response = await api.get(`/api/aptitude/ai/generate-questions/${jobId}`);
+    return response.data;
+  } catch (error) {
+    console.error("Error fetching generation job:", error);
+    throw error;
+  }
+};
+
 // Get available AI domains
 export const getAIDomains = async () => {
   try {
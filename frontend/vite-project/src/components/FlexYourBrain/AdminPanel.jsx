@@ -1,17 +1,26 @@
 // frontend/vite-project/src/components/FlexYourBrain/AdminPanel.jsx
-import React, { useState, useEffect } from 'react';
-import { generateAIQuestions, resetQuestionUsage, getAIQuestionStats } from '../../api/aptitude';
+import React, { useState, useEffect, useRef } from 'react';
+import { generateAIQuestions, getGenerationJob, resetQuestionUsage, getAIQuestionStats } from '../../api/aptitude';
+
+// How often, and for how long at most, a generation job is polled
+const JOB_POLL_INTERVAL_MS = 2000;
+const JOB_POLL_TIMEOUT_MS = 10 * 60 * 1000;
 
 const AdminPanel = () => {
   const [stats, setStats] = useState(null);
   const [loading, setLoading] = useState(false);
   const [message, setMessage] = useState('');
+  const mounted = useRef(true);
 
-  const domains = ['Logical', 'Quantitative', 'Verbal', 'Coding', 'Data Interpretation'];
+  const domains = ['Logical', 'Quantitative', 'Verbal', 'Coding'];
   const difficulties = ['easy', 'medium', 'hard'];
 
   useEffect(() => {
+    mounted.current = true;
     loadStats();
+    return () => {
+      mounted.current = false; // stops any job polling
+    };
   }, []);
 
   const loadStats = async () => {
@@ -27,13 +36,36 @@ const AdminPanel = () => {
     setLoading(true);
     setMessage('');
     try {
-      const result = await generateAIQuestions(selectedDomains, selectedDifficulties);
-      setMessage(`Successfully generated ${result.new_questions_count} new questions!`);
+      let job = await generateAIQuestions(selectedDomains, selectedDifficulties);
+      // Generation runs as a background job - poll until it finishes, we time out or unmount
+      const deadline = Date.now() + JOB_POLL_TIMEOUT_MS;
+      while (job.status === 'queued' || job.status === 'running') {
+        if (!mounted.current) {
+          return;
+        }
+        if (Date.now() > deadline) {
+          throw new Error(`job ${job.job_id} is still ${job.status}, check back later`);
+        }
+        setMessage(`Generating questions... ${job.combinations_done}/${job.combinations_total} combinations done`);
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        job = await getGenerationJob(job.job_id);
+      }
+      if (!mounted.current) {
+        return;
+      }
+      if (job.status === 'failed') {
+        throw new Error(job.error);
+      }
+      setMessage(`Successfully generated ${job.accepted} new questions! (${job.duplicates} duplicates, ${job.rejected} rejected)`);
       await loadStats(); // Refresh stats
     } catch (error) {
-      setMessage('Error generating questions: ' + error.response?.data?.detail || error.message);
+      if (mounted.current) {
+        setMessage('Error generating questions: ' + (error.response?.data?.detail || error.message));
+      }
     } finally {
-      setLoading(false);
+      if (mounted.current) {
+        setLoading(false);
+      }
     }
   };
 
@@ -49,7 +81,7 @@ const AdminPanel = () => {
       setMessage('Question usage tracking reset successfully!');
       await loadStats(); // Refresh stats
     } catch (error) {
-      setMessage('Error resetting usage: ' + error.response?.data?.detail || error.message);
+      setMessage('Error resetting usage: ' + (error.response?.data?.detail || error.message));
     } finally {
       setLoading(false);
     }
@@ -236,6 +236,8 @@ export default function PracticeDrill() {
         body: JSON.stringify({
           question_id: testSession.questions[currentQuestion].id,
           user_answer: answer,
+          // Options were shuffled when served - lets the server grade the right letter
+          option_order: testSession.questions[currentQuestion].option_order,
           time_taken: timeSpent
         })
       });